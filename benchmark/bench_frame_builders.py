@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmark of ELD broadcast frame building (no can-bus needed)
+- before: new can.Message built for every frame (signal encoding on every call)
+- after:  frames cached by value / preallocated frame patched in place
+
+Usage (from repository root): python3 -m benchmark.bench_frame_builders [nmb_frames]
+"""
+
+import sys
+import time
+
+from src import frame_cache
+from src.can_simulator import CanSimulator
+
+NMB_FRAMES = 300000
+
+
+def measure(name, build_frames, nmb_frames):
+    """
+    Measure frames per second of frame building function
+    :param name: benchmark name
+    :param build_frames: function building 3 frames (EEC1, CCVS, VDHR) per call
+    :param nmb_frames: number of frames to build
+    :return: frames per second
+    """
+    nmb_calls = nmb_frames // 3
+    start_time = time.perf_counter()
+    for i in range(nmb_calls):
+        build_frames()
+    duration = time.perf_counter() - start_time
+    frames_per_second = nmb_calls * 3 / duration
+    print('{0:<45} {1:>12.0f} frames/s'.format(name, frames_per_second))
+    return frames_per_second
+
+
+def build_new_frames():
+    frame_cache.EEC1_ENGINE_SPEED.get_message(600)
+    frame_cache.CCVS_VEHICLE_SPEED.get_message(10)
+    frame_cache.VDHR_DISTANCE.get_message(10500)
+
+
+def build_cached_frames():
+    CanSimulator.get_EEC1_message(600)
+    CanSimulator.get_CCVS1_message(10)
+    CanSimulator.get_VDHR_message(10500)
+
+
+eec1_frame = frame_cache.SignalFrame(frame_cache.EEC1_ENGINE_SPEED)
+ccvs_frame = frame_cache.SignalFrame(frame_cache.CCVS_VEHICLE_SPEED)
+vdhr_frame = frame_cache.SignalFrame(frame_cache.VDHR_DISTANCE)
+
+
+def patch_preallocated_frames():
+    eec1_frame.set_value(600)
+    ccvs_frame.set_value(10)
+    vdhr_frame.set_value(10500)
+
+
+if __name__ == "__main__":
+    nmb_frames = int(sys.argv[1]) if len(sys.argv) > 1 else NMB_FRAMES
+
+    before = measure('before: new frame per call', build_new_frames, nmb_frames)
+    cached = measure('after: frame cache keyed on value', build_cached_frames, nmb_frames)
+    patched = measure('after: preallocated frame (steady state)', patch_preallocated_frames, nmb_frames)
+    print('Speed-up: cache {0:.1f}x, preallocated frame {1:.1f}x'.format(cached / before, patched / before))
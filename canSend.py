@@ -3,6 +3,8 @@
 import sys
 import src.param
 import src.can_simulator
+import src.fleet
+import src.render
 
 can_interface = 'vcan0'
 #can_interface = 'can0'
@@ -14,7 +16,14 @@ if __name__ == "__main__":
     if simulator_parameters is None:
         exit()
 
-    simulator = src.can_simulator.CanSimulator(simulator_parameters, can_interface)
-    simulator.run_action()
+    if simulator_parameters.action in src.param.FLEET_SIMULATION:
+        # Every vehicle opens its own can interface (see fleet file)
+        src.fleet.simulate_fleet(simulator_parameters.file_name)
+    elif simulator_parameters.render_file_name is not None:
+        # Scenario is rendered into trace file, can interface is not opened
+        src.render.render_scenario(simulator_parameters, can_interface)
+    else:
+        simulator = src.can_simulator.CanSimulator(simulator_parameters, can_interface)
+        simulator.run_action()
 
     print("- Done -")
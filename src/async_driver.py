@@ -0,0 +1,145 @@
+import asyncio
+
+"""
+asyncio front end of CanDriver
+- can socket is registered in event loop (no polling, no receive thread)
+- coroutine versions of send, periodic send and wait primitives
+- several simulated behaviours (coroutines) can run concurrently in one process
+"""
+
+RECEIVE_BATCH_SIZE = 256  # max. frames read in one socket readable callback
+
+
+class AsyncCanDriver:
+    """
+    Event loop driven can-bus interface
+    - every received frame is passed to all subscribers and to the waiters whose match function accepts it
+    - timers are event loop timers (absolute deadlines of monotonic loop clock)
+    """
+
+    def __init__(self, can_driver, loop=None):
+        """
+        :param can_driver: opened CanDriver
+        :param loop: asyncio event loop (default event loop when None)
+        """
+        self.can_driver = can_driver
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.subscribers = []
+        self.waiters = []  # (match_function, future)
+        self.file_descriptor = None
+
+    def start(self):
+        """
+        Register can socket in event loop
+        :return: True if socket was registered
+        """
+        can_socket = getattr(self.can_driver.bus, 'socket', None)
+        if can_socket is None:
+            print('Error: No socket for can device available!')
+            return False
+
+        self.file_descriptor = can_socket.fileno()
+        self.loop.add_reader(self.file_descriptor, self.__on_readable)
+        return True
+
+    def stop(self):
+        """
+        Unregister can socket from event loop and cancel all waiters
+        :return:
+        """
+        if self.file_descriptor is not None:
+            self.loop.remove_reader(self.file_descriptor)
+            self.file_descriptor = None
+        for match_function, future in self.waiters:
+            future.cancel()
+        self.waiters = []
+
+    def __on_readable(self):
+        for i in range(RECEIVE_BATCH_SIZE):
+            msg = self.can_driver.get_one_msg()
+            if msg is None:
+                return
+            self.dispatch(msg)
+
+    def dispatch(self, msg):
+        """
+        Pass received message to subscribers and waiters
+        :param msg: can message
+        :return:
+        """
+        for callback in list(self.subscribers):
+            callback(msg)
+
+        for waiter in list(self.waiters):
+            match_function, future = waiter
+            if not future.done() and match_function(msg):
+                future.set_result(msg)
+                self.waiters.remove(waiter)
+
+    def subscribe(self, callback):
+        """
+        Call 'callback(msg)' for every received message
+        :param callback:
+        :return: callback (use it for unsubscribe())
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    async def send(self, can_msg):
+        """
+        Send one can message
+        :param can_msg:
+        :return:
+        """
+        self.can_driver.send_one_msg(can_msg)
+
+    async def wait_for_matching_msg(self, match_function, max_timeout_seconds):
+        """
+        Wait for one can message accepted by 'match_function'
+        :param match_function: function(msg) returning True for wanted message
+        :param max_timeout_seconds: max. waiting time [s]
+        :return: can message or None on timeout
+        """
+        waiter = (match_function, self.loop.create_future())
+        self.waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter[1], max_timeout_seconds)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    async def send_periodic(self, get_msg, period_s, duration_s=None):
+        """
+        Send message periodically at absolute deadlines 'start + n * period' (cycles overdue by whole period
+        are skipped, timing does not drift)
+        :param get_msg: function returning can message to send (payload can change between cycles)
+        :param period_s: period [s]
+        :param duration_s: duration [s] (None = until cancelled)
+        :return: number of sent messages
+        """
+        start_time = self.loop.time()
+        end_time = None if duration_s is None else start_time + duration_s
+        cycle_index = 0
+        nmb_sent = 0
+
+        while True:
+            deadline = start_time + cycle_index * period_s
+            if end_time is not None and deadline >= end_time:
+                return nmb_sent
+
+            delay = deadline - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.can_driver.send_one_msg(get_msg())
+            nmb_sent += 1
+
+            cycle_index += 1
+            now = self.loop.time()
+            if now >= start_time + cycle_index * period_s:
+                cycle_index = int((now - start_time) // period_s) + 1
@@ -0,0 +1,210 @@
+import functools
+import time
+
+"""
+Helper methods to compute can-bus load
+- exact number of bits of can frame on the wire (including bit stuffing, CRC, ACK, EOF and interframe space)
+- bus load meter (frames/s, bits/s, bus load %)
+- bus load generator (rate controller for target bus load)
+"""
+
+DEFAULT_BITRATE = 250000  # J1939 default baud rate
+CRC15_POLYNOMIAL = 0x4599
+STUFF_WIDTH = 5  # after 5 equal bits one opposite bit is inserted
+FRAME_TAIL_BITS = 13  # CRC delimiter 1 + ACK slot and delimiter 2 + EOF 7 + interframe space 3
+LOAD_MAX_BURST_S = 0.010  # max. bus time of frames sent at once by load generator after late tick
+
+
+def get_bits(value, width):
+    """
+    Get list of bits of value (MSB first)
+    :param value:
+    :param width: number of bits
+    :return: list of 0/1
+    """
+    return [(value >> i) & 1 for i in range(width - 1, -1, -1)]
+
+
+def get_crc15(bits):
+    """
+    Compute CAN CRC-15 of bit sequence
+    :param bits: list of 0/1
+    :return: int
+    """
+    crc = 0
+    for bit in bits:
+        crc_next = bit ^ ((crc >> 14) & 1)
+        crc = (crc << 1) & 0x7FFF
+        if crc_next:
+            crc ^= CRC15_POLYNOMIAL
+    return crc
+
+
+def get_stuff_bits_count(bits):
+    """
+    Count stuff bits inserted into bit sequence
+    :param bits: list of 0/1 (SOF ... CRC)
+    :return: int
+    """
+    stuff_bits = 0
+    last_bit = None
+    run_length = 0
+    for bit in bits:
+        if bit == last_bit:
+            run_length += 1
+        else:
+            last_bit = bit
+            run_length = 1
+
+        if run_length == STUFF_WIDTH:
+            # Inserted stuff bit is opposite and starts new run
+            stuff_bits += 1
+            last_bit = 1 - bit
+            run_length = 1
+    return stuff_bits
+
+
+@functools.lru_cache(maxsize=4096)
+def get_frame_bits(arbitration_id, data, extended=True):
+    """
+    Get exact number of bits of data frame on the wire (frames are cached, repeated frames cost nothing)
+    :param arbitration_id:
+    :param data: bytes
+    :param extended: 29-bit ID
+    :return: number of bits including stuff bits and interframe space
+    """
+    bits = [0]  # SOF
+    if extended:
+        # base ID, SRR, IDE, extended ID, RTR, r1, r0
+        bits += get_bits(arbitration_id >> 18, 11) + [1, 1] + get_bits(arbitration_id & 0x3FFFF, 18) + [0, 0, 0]
+    else:
+        # ID, RTR, IDE, r0
+        bits += get_bits(arbitration_id, 11) + [0, 0, 0]
+    bits += get_bits(len(data), 4)
+    for byte in data:
+        bits += get_bits(byte, 8)
+    bits += get_bits(get_crc15(bits), 15)
+
+    return len(bits) + get_stuff_bits_count(bits) + FRAME_TAIL_BITS
+
+
+def get_msg_bits(msg):
+    """
+    Get exact number of bits of can message on the wire
+    :param msg: can message
+    :return: int
+    """
+    extended = getattr(msg, 'is_extended_id', getattr(msg, 'id_type', True))
+    return get_frame_bits(msg.arbitration_id, bytes(msg.data), bool(extended))
+
+
+class BusLoadMeter:
+    """
+    Measure achieved frames/s, bits/s and bus load of sent frames
+    """
+
+    def __init__(self, bitrate=DEFAULT_BITRATE, clock=time.monotonic):
+        self.bitrate = bitrate
+        self.clock = clock
+        self.frames = 0
+        self.bits = 0
+        self.start_time = None
+        self.stop_time = None
+
+    def start(self):
+        self.start_time = self.clock()
+        self.stop_time = None
+
+    def stop(self):
+        self.stop_time = self.clock()
+
+    def add_msg(self, msg):
+        """
+        Account one sent can message
+        :param msg: can message
+        :return:
+        """
+        self.frames += 1
+        self.bits += get_msg_bits(msg)
+
+    def add_msgs(self, msgs):
+        """
+        Account list of sent can messages
+        :param msgs: list of can messages
+        :return:
+        """
+        for msg in msgs:
+            self.add_msg(msg)
+
+    def get_duration(self):
+        end_time = self.stop_time if self.stop_time is not None else self.clock()
+        return end_time - self.start_time
+
+    def get_bus_load(self):
+        """
+        Bus load [%] for configured bit rate
+        :return: float
+        """
+        duration = self.get_duration()
+        if duration <= 0:
+            return 0.0
+        return self.bits / duration / self.bitrate * 100
+
+    def print(self):
+        """
+        Print achieved throughput and bus load
+        :return:
+        """
+        duration = self.get_duration()
+        if duration <= 0:
+            print('Bus load: no frames sent')
+            return
+        print('Sent {0} frames in {1:.3f} s: {2:.0f} frames/s; {3:.0f} bits/s; bus load {4:.1f}% of {5} bit/s'
+              .format(self.frames, duration, self.frames / duration, self.bits / duration, self.get_bus_load(),
+                      self.bitrate))
+
+
+def get_periodic_bits_per_s(periodic_msgs):
+    """
+    Get bus bandwidth used by periodic messages
+    :param periodic_msgs: list of (can message, period [s])
+    :return: bits/s
+    """
+    return sum(get_msg_bits(msg) / period_s for msg, period_s in periodic_msgs)
+
+
+class LoadGenerator:
+    """
+    Rate controller of bus load generator (token bucket in bits)
+    - bus time of every frame is exact number of its bits (stuffing included), so target load is met for any ID/DLC mix
+    - bandwidth of other traffic (e.g. ELD broadcasts) is subtracted from target load
+    - frames of mix are sent in round robin
+    """
+
+    def __init__(self, msgs, load_percent, bitrate=DEFAULT_BITRATE, background_bits_per_s=0.0, clock=time.monotonic):
+        self.msgs = msgs
+        self.msg_bits = [get_msg_bits(msg) for msg in msgs]
+        self.bits_per_s = max(bitrate * load_percent / 100.0 - background_bits_per_s, 0.0)
+        self.max_credit_bits = max([self.bits_per_s * LOAD_MAX_BURST_S] + self.msg_bits)
+        self.clock = clock
+        self.index = 0
+        self.credit_bits = 0.0
+        self.last_time = None
+
+    def get_due_msgs(self):
+        """
+        Get messages which have to be sent now to keep target bus load
+        :return: list of can messages
+        """
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time = now
+        self.credit_bits = min(self.credit_bits + (now - self.last_time) * self.bits_per_s, self.max_credit_bits)
+        self.last_time = now
+
+        due_msgs = []
+        while self.msgs and self.credit_bits >= self.msg_bits[self.index]:
+            self.credit_bits -= self.msg_bits[self.index]
+            due_msgs.append(self.msgs[self.index])
+            self.index = (self.index + 1) % len(self.msgs)
+        return due_msgs
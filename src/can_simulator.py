@@ -1,14 +1,48 @@
 import time
+import asyncio
 import can
+import functools
+import signal
 import subprocess
 
 import canSend
 from src import param
+from src import async_driver
+from src import bus_load
 from src import candriver
+from src import ecu_network
 from src import file_io
+from src import frame_cache
+from src import j1939
+from src import latency
+from src import recorder
+from src import scheduler
+from src import signal_profile
+from src import sim_clock
+from src import trace_io
+from src import transport
 from src.eld_simulation import ELD_simulation
 from src.eld_msg_group import ELD_msg_group
 
+PERIODIC_BUSY_WAIT_S = 0.0003  # last 300us of each period are busy-waited for precise cycle time
+
+# J1939 broadcast cycle times of ELD messages
+EEC1_CYCLE_S = 0.020
+CCVS_CYCLE_S = 0.100
+VDHR_CYCLE_S = 1.000
+ADDR_CLAIM_BROADCAST_CYCLE_S = 0.050  # ELD broadcast cycle while waiting for Address claim
+INSTALL_WIZARD_CYCLE_S = 0.100
+HOURS_UPDATE_CYCLE_S = 1.000  # update of Engine hours response in stages with signal profiles
+
+SIMULATOR_ADDRESS = 0x01  # J1939 source address of simulated ECU
+TP_PACKET_GAP_S = 0.050  # According J1939 std. multi frame messages with 50ms time delay (10 - 200ms)
+TP_MAX_TRANSFER_S = 10.0
+BUS_LOAD_CYCLE_S = 0.002  # tick of bus load generator (frames due since last tick are sent by one batch)
+RECORDER_RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024  # socket receive buffer absorbs writer stalls of fully loaded bus
+RECORDER_POLL_S = 0.100
+FLOOD_BATCH_SIZE = 64  # trace frames sent by one batch in flood mode
+VIN_CODE = [ord(c) for c in '5GZCZ43D13S812715*']  # '*' = end of VIN code
+
 
 class CanSimulator:
     """
@@ -16,10 +50,25 @@ class CanSimulator:
     from file, address collision simulations, VIN code responses, engine RPM simulations, ...)
     """
 
-    def __init__(self, cmd_parameters, can_interface):
+    def __init__(self, cmd_parameters, can_interface, clock=None, can_driver=None):
+        """
+        :param cmd_parameters: param.Param
+        :param can_interface: can interface name
+        :param clock: simulation clock (see sim_clock module), default is selected by 'clock_speed' parameter
+        :param can_driver: object with CanDriver interface (e.g. render.TraceRenderDriver), default is CanDriver
+                           opened on 'can_interface'
+        """
         self.param = cmd_parameters
         self.interface = can_interface
-        self.can_bus = candriver.CanDriver(self.interface)
+        self.clock = clock if clock is not None else sim_clock.get_clock(cmd_parameters.clock_speed)
+        self.can_bus = can_driver if can_driver is not None else candriver.CanDriver(self.interface)
+        # Preallocated ELD broadcast frames
+        self.ccvs_frame = frame_cache.SignalFrame(frame_cache.CCVS_VEHICLE_SPEED, SIMULATOR_ADDRESS)
+        self.eec1_frame = frame_cache.SignalFrame(frame_cache.EEC1_ENGINE_SPEED, SIMULATOR_ADDRESS)
+        self.vdhr_frame = frame_cache.SignalFrame(frame_cache.VDHR_DISTANCE, SIMULATOR_ADDRESS)
+        # Self-latency instrumentation (request received -> response sent, periodic transmit lateness)
+        self.latency_histograms = latency.LatencyHistograms()
+        self.__pending_responses = {}  # response arbitration ID -> (name, request receive time)
 
     def run_action(self):
         """
@@ -27,6 +76,59 @@ class CanSimulator:
         :param param:
         :return:
         """
+        if self.param.action is not None and self.param.action not in param.OFFLINE_ACTIONS \
+                and not self.can_bus.is_open():
+            print('Error: Can interface {0} is not open - action {1} cannot be run!'.format(self.interface,
+                                                                                          self.param.action))
+            return
+
+        receive_pgns = self.__get_receive_pgns(self.param.action)
+        if receive_pgns is not None and self.can_bus.bus is not None:
+            self.can_bus.set_pgn_filters(receive_pgns)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.print_latency_histograms())
+
+        self.__run_selected_action()
+
+        if receive_pgns is not None and self.can_bus.bus is not None:
+            print('Frames dropped by kernel receive filters: {0}'.format(self.can_bus.get_filtered_out_count()))
+            self.can_bus.set_pgn_filters(None)
+        if self.latency_histograms.names:
+            self.print_latency_histograms()
+
+    def print_latency_histograms(self):
+        """
+        Print simulator self-latency histograms (called at exit and on SIGUSR1)
+        :return:
+        """
+        print('- Simulator latency -')
+        self.latency_histograms.print()
+
+    @staticmethod
+    def __get_receive_pgns(action):
+        """
+        Get PGNs which action waits for (other frames are filtered out by kernel)
+        :param action:
+        :return: list of PGNs or None when action receives all frames (or nothing)
+        """
+        if action in param.RECEIVE_MULTI_MSG or action in param.ADDR_CLAIM_NO_RESPONSE \
+                or action in param.ADDR_CLAIM_ADDR_USED_MULTI or action in param.NEW_DEV_ADDR_USED_MULTI:
+            return [j1939.PGN_ADDRESS_CLAIM]
+        elif action in param.VIN_CODE_RESPONSE or action in param.ENGINE_HOURS:
+            return [j1939.PGN_REQUEST]
+        elif action in param.VIN_CODE_RESPONSE_MULTI or action in param.INSTALL_WIZARD_VIN \
+                or action in param.ELD_MSGS_SIMULATION or action in param.ELD_MSGS_FILE_SIMULATION \
+                or action in param.ELD_MSGS_FILE_SIMULATION_BCM or action in param.BUS_LOAD:
+            return [j1939.PGN_REQUEST, j1939.PGN_TP_CM, j1939.PGN_TP_DT]
+        elif action in param.ELD_FILE_ADDR_CLAIM_MULTI or action in param.MULTI_ECU_FILE_SIMULATION:
+            return [j1939.PGN_REQUEST, j1939.PGN_TP_CM, j1939.PGN_TP_DT, j1939.PGN_ADDRESS_CLAIM]
+        return None
+
+    def __run_selected_action(self):
+        """
+        Run simulator action selected by command line parameters
+        :return:
+        """
         if self.param.action in param.LIST:
             print('CanSimulator: print out device info')
             self.__list()
@@ -46,6 +148,18 @@ class CanSimulator:
         elif self.param.action in param.SEND_FILE_MSG:
             print('- Sending messages from text file -')
             self.__send_file_messages(self.param.file_name)
+        elif self.param.action in param.FLOOD_FILE_MSG:
+            print('- Flooding can-bus with messages from text file ({0}x) -'.format(self.param.nmb_repeats))
+            self.__flood_file_messages(self.param.file_name, self.param.nmb_repeats)
+        elif self.param.action in param.COMPILE_MSG_FILE:
+            print('- Compiling messages text file into binary file -')
+            self.__compile_messages_file(self.param.file_name, self.param.output_file_name)
+        elif self.param.action in param.SEND_COMPILED_MSG:
+            print('- Sending messages from compiled binary file -')
+            self.__send_compiled_messages(self.param.file_name)
+        elif self.param.action in param.REPLAY_TRACE:
+            print('- Replaying trace file (speed {0}x) -'.format(self.param.speed))
+            self.__replay_trace(self.param.file_name, self.param.speed)
         elif self.param.action in param.SEND_DEFAULT:
             print('- Sending default messages -')
             self.__send_default_messages()
@@ -55,6 +169,10 @@ class CanSimulator:
         elif self.param.action in param.RECEIVE_MULTI_MSG:
             print('- Receiving multi messages -')
             self.__receive_multi_msg(self.param.max_wait_time_ms)
+        elif self.param.action in param.RECORD_MSGS:
+            print('- Recording messages -')
+            self.__record_messages(self.param.max_wait_time_ms, self.param.file_name, self.param.max_file_mb,
+                                   self.param.max_file_s)
         elif self.param.action in param.ADDR_CLAIM_NO_RESPONSE:
             print('- Wait for one Address Claim request and send no response -')
             max_wait_s = self.__ms_to_seconds(self.param.max_wait_time_ms)
@@ -97,10 +215,27 @@ class CanSimulator:
         elif self.param.action in param.ELD_MSGS_FILE_SIMULATION:
             print('- Simulating ELD messages specified in text file -')
             self.__eld_file_simulation(self.param.file_name)
+        elif self.param.action in param.ELD_MSGS_FILE_SIMULATION_BCM:
+            print('- Simulating ELD messages specified in text file (kernel cyclic transmission) -')
+            self.__eld_file_simulation_bcm(self.param.file_name)
+        elif self.param.action in param.ELD_FILE_ADDR_CLAIM_MULTI:
+            print('- Simulating ELD messages specified in text file with concurrent address collisions -')
+            collision_count = self.__eld_file_simulation_with_addr_claims(self.param.file_name, self.param.nmb_msgs)
+            print('Address Claim collisions count: {0}'.format(collision_count))
+        elif self.param.action in param.MULTI_ECU_FILE_SIMULATION:
+            print('- Simulating truck network (multiple ECUs) with ELD values specified in text file -')
+            self.__multi_ecu_file_simulation(self.param.file_name)
         elif self.param.action in param.SPEED_SHIFT:
             print('- Simulating Vehicle Speed Shift -')
             self.__simulate_speed_shift(self.param.speed_value1, self.param.value_1_ms, self.param.speed_value2,
                                         self.param.value_2_ms)
+        elif self.param.action in param.REQUEST_LATENCY:
+            print('- Measuring request / response latency of ECU {0:02X} -'.format(self.param.target_address))
+            self.__measure_request_latency(self.param.max_wait_time_ms, self.param.target_address, self.param.rate_hz,
+                                           self.param.request_pgns)
+        elif self.param.action in param.BUS_LOAD:
+            print('- Simulating ELD messages under {0}% bus load -'.format(self.param.load_percent))
+            self.__generate_bus_load(self.param.max_wait_time_ms, self.param.load_percent, self.param.file_name)
         else:
             print('Unknown action')
             print('Exit')
@@ -114,7 +249,7 @@ class CanSimulator:
             print('Error: No SocketCan device connected!')
             return
 
-        dev_info = self.can_bus.bus.socket
+        dev_info = getattr(self.can_bus.bus, 'socket', None)
         if dev_info is None:
             print('Error: No socket for can device available!')
         else:
@@ -124,13 +259,39 @@ class CanSimulator:
     def __print_actual_baudrate(self):
         """
         Print actual baudrate via bash 'ip' command
-        # ip -details -statistics link show can0
         :return:
         """
-        stdoutdata = subprocess.getoutput("ip -details -statistics link show can0")
-        baudrate_str = stdoutdata.split('bitrate ')[1]
-        baudrate_str = baudrate_str.split(' ')[0]
-        print('Baud rate: {0}'.format(baudrate_str))
+        baudrate = self.__get_actual_baudrate()
+        if baudrate is None:
+            print("Error: Cannot read baud rate of interface '{0}'".format(self.interface))
+        else:
+            print('Baud rate: {0}'.format(baudrate))
+
+    def __get_actual_baudrate(self):
+        """
+        Get actual baudrate via bash 'ip' command
+        # ip -details -statistics link show can0
+        :return: int or None when interface has no bit rate (e.g. virtual can)
+        """
+        # Loopback bus has simulated bit rate
+        if getattr(self.can_bus.bus, 'bitrate', None):
+            return self.can_bus.bus.bitrate
+        stdoutdata = subprocess.getoutput('ip -details -statistics link show {0}'.format(self.interface))
+        if 'bitrate ' not in stdoutdata:
+            return None
+        baudrate_str = stdoutdata.split('bitrate ')[1].split(' ')[0]
+        return int(baudrate_str) if baudrate_str.isdigit() else None
+
+    def __get_bus_load_meter(self):
+        """
+        Get bus load meter for actual interface baud rate (J1939 default baud rate for virtual can)
+        :return: BusLoadMeter
+        """
+        baudrate = self.__get_actual_baudrate()
+        if baudrate is None:
+            baudrate = bus_load.DEFAULT_BITRATE
+            print('Interface has no baud rate, bus load is computed for {0} bit/s'.format(baudrate))
+        return bus_load.BusLoadMeter(baudrate)
 
     def __set_baudrate(self, baud_rate):
         """
@@ -161,9 +322,47 @@ class CanSimulator:
         :param msg_to_send can message to be sent
         """
         self.can_bus.send_one_msg(msg_to_send)
+        if self.__pending_responses:
+            self.__record_response_time(msg_to_send.arbitration_id)
         if print_msg_flag:
             self.__print_msg(msg_to_send, received=False)
 
+    def __expect_response(self, name, response_arbitration_id):
+        """
+        Start measuring response time of just received request (see __record_response_time())
+        :param name: name of response in latency histograms
+        :param response_arbitration_id: arbitration ID of first frame of response
+        :return:
+        """
+        self.__pending_responses[response_arbitration_id] = (name, self.can_bus.last_rx_time)
+
+    def __record_response_time(self, arbitration_id):
+        """
+        Record time from request receipt (kernel timestamp) to first response frame sent
+        :param arbitration_id: arbitration ID of sent frame
+        :return:
+        """
+        pending = self.__pending_responses.pop(arbitration_id, None)
+        if pending is not None and pending[1] is not None:
+            self.latency_histograms.add('Response {0}'.format(pending[0]), self.can_bus.last_tx_time - pending[1])
+
+    def __print_clock(self):
+        if self.clock.is_virtual:
+            print('Simulation clock: virtual time (no waiting)')
+        elif not self.clock.is_real:
+            print('Simulation clock: {0}x real time'.format(self.clock.speed))
+
+    def __get_cyclic_scheduler(self):
+        """
+        Get multi-rate scheduler driven by simulation clock, transmit lateness of periodic jobs is recorded into latency
+        histograms
+        :return: scheduler.CyclicScheduler
+        """
+        # Busy-wait makes sense only in real time
+        busy_wait_s = PERIODIC_BUSY_WAIT_S if self.clock.is_real else 0.0
+        return scheduler.CyclicScheduler(busy_wait_s, sim_clock=self.clock, lateness_handler=lambda job, lateness_s:
+                                         self.latency_histograms.add('Lateness {0}'.format(job.name), lateness_s))
+
     def __send_one_msg_no_printout(self, msg_to_send):
         """
         Send one message action
@@ -177,17 +376,21 @@ class CanSimulator:
         """
         delay_seconds = self.__ms_to_seconds(delay_ms)
         print('Delay between messages: {0} [seconds]'.format(delay_seconds))
-        for i in range(nmb_msgs):
+
+        def send_action():
             self.__print_msg(msg_to_send, received=False)
             self.can_bus.send_one_msg(msg_to_send)
-            time.sleep(delay_seconds)
+
+        periodic = scheduler.PeriodicScheduler(delay_seconds, PERIODIC_BUSY_WAIT_S)
+        statistics = periodic.run_count(send_action, nmb_msgs)
+        statistics.print('Achieved ')
 
     def __send_default_messages(self):
         """
         Sends default messages
         """
-        msg1 = can.Message(arbitration_id=0x18FEF101, extended_id=True, data=([0, 0, 0x32, 0, 0, 0, 0, 0]))
-        msg2 = can.Message(arbitration_id=0x0CF00402, extended_id=True, data=([0, 0, 0xAA, 0, 0xAA, 0, 0, 0]))
+        msg1 = j1939.get_message(0x18FEF101, [0, 0, 0x32, 0, 0, 0, 0, 0])
+        msg2 = j1939.get_message(0x0CF00402, [0, 0, 0xAA, 0, 0xAA, 0, 0, 0])
         messages = [msg1, msg2]
 
         for msg in messages:
@@ -197,16 +400,152 @@ class CanSimulator:
 
     def __send_file_messages(self, file_name):
         """
-        Send messages specified in text file
+        Send messages specified in text file (file is read while sending, first group is sent immediately)
+        """
+        total_msgs = queued_msgs = 0
+        deadline = self.clock.now()
+
+        for msg_group in file_io.iter_messages_from_file(file_name):
+            total_msgs += len(msg_group.messages)
+            queued_msgs += self.can_bus.send_batch(msg_group.messages)
+
+            # Absolute deadlines - time spent by sending does not accumulate
+            deadline += self.__ms_to_seconds(msg_group.delay)
+            scheduler.wait_until(deadline, sim_clock=self.clock)
+
+        print('Queued messages: {0} / {1} (tx queue full: {2}x)'.format(queued_msgs, total_msgs,
+                                                                       self.can_bus.enobufs_count))
+
+    def __flood_file_messages(self, file_name, nmb_repeats):
+        """
+        Send messages from text file as fast as interface accepts them (delays are ignored)
+        - file is read by stream in every repeat (memory use does not depend on file size), every message group is
+          converted and written to socket by one batch, full tx queue is handled by back-off
+        - achieved frames/s, bits/s and bus load are reported
         """
-        msg_group_list = file_io.read_messages_from_file(file_name)
+        meter = self.__get_bus_load_meter()
+        total_msgs = queued_msgs = 0
+        tx_queue_full = False
+
+        meter.start()
+        for _ in range(nmb_repeats):
+            for msg_group in file_io.iter_messages_from_file(file_name):
+                queued = self.can_bus.send_raw_batch(candriver.get_raw_frames(msg_group.messages))
+                meter.add_msgs(msg_group.messages[:queued])
+                queued_msgs += queued
+                total_msgs += len(msg_group.messages)
+                if queued < len(msg_group.messages):
+                    tx_queue_full = True
+                    break
+            if tx_queue_full:
+                break
+        meter.stop()
+
+        print('Queued messages: {0} / {1} (tx queue full: {2}x)'.format(queued_msgs, total_msgs,
+                                                                       self.can_bus.enobufs_count))
+        meter.print()
+
+    @staticmethod
+    def __compile_messages_file(file_name, compiled_file_name):
+        """
+        Compile messages text file into binary file
+        """
+        nmb_msgs = file_io.compile_messages_file(file_name, compiled_file_name)
+        print('Compiled messages: {0} -> \'{1}\''.format(nmb_msgs, compiled_file_name))
+
+    def __send_compiled_messages(self, compiled_file_name):
+        """
+        Send messages from compiled binary file (memory mapped, frames are sent without any conversion)
+        - frames with the same timestamp are sent as one batch at absolute deadline (start + timestamp)
+        - timestamps are relative to first frame (recordings with absolute timestamps can be sent too)
+        """
+        start_time = self.clock.now()
+        batch = []
+        first_timestamp_us = batch_timestamp_us = None
+        total_msgs = queued_msgs = 0
+
+        for timestamp_us, raw_frame in file_io.iter_compiled_frames(compiled_file_name):
+            if first_timestamp_us is None:
+                first_timestamp_us = batch_timestamp_us = timestamp_us
+            if timestamp_us != batch_timestamp_us:
+                queued_msgs += self.can_bus.send_raw_batch(batch)
+                total_msgs += len(batch)
+                batch = []
+                batch_timestamp_us = timestamp_us
+                scheduler.wait_until(start_time + (timestamp_us - first_timestamp_us) / 1000000.0,
+                                     PERIODIC_BUSY_WAIT_S, sim_clock=self.clock)
+            batch.append(raw_frame)
+
+        queued_msgs += self.can_bus.send_raw_batch(batch)
+        total_msgs += len(batch)
+        print('Queued messages: {0} / {1} (tx queue full: {2}x)'.format(queued_msgs, total_msgs,
+                                                                       self.can_bus.enobufs_count))
+
+    def __replay_trace(self, file_name, speed):
+        """
+        Replay candump / ASC trace with original inter-frame timing
+        - frame is due at 'start + (frame timestamp - first timestamp) / speed' (monotonic clock, no drift)
+        - speed 0 = as fast as possible (see __flood_trace())
+        - worst-case and mean lateness of sent frames are reported
+        """
+        if speed == 0:
+            self.__flood_trace(file_name)
+            return
+
+        start_time = time.monotonic()
+        first_timestamp = None
+        nmb_msgs = 0
+        max_lateness = total_lateness = 0.0
 
-        for msg_group in msg_group_list:
-            for one_msg in msg_group.messages:
-                self.can_bus.send_one_msg(one_msg)
+        for timestamp, msg in trace_io.iter_trace(file_name):
+            if first_timestamp is None:
+                first_timestamp = timestamp
 
-            delay_sec = self.__ms_to_seconds(msg_group.delay)
-            time.sleep(delay_sec)
+            deadline = start_time + (timestamp - first_timestamp) / speed
+            scheduler.sleep_until(deadline, PERIODIC_BUSY_WAIT_S)
+            self.can_bus.send_one_msg(msg)
+            lateness = time.monotonic() - deadline
+            total_lateness += lateness
+            max_lateness = max(max_lateness, lateness)
+            nmb_msgs += 1
+
+        duration = time.monotonic() - start_time
+        print('Replayed messages: {0} in {1:.3f} seconds'.format(nmb_msgs, duration))
+        if nmb_msgs > 0:
+            print('Lateness: max={0:.3f} ms; mean={1:.3f} ms'.format(max_lateness * 1000,
+                                                                   total_lateness / nmb_msgs * 1000))
+
+    def __flood_trace(self, file_name):
+        """
+        Replay candump / ASC trace as fast as interface accepts frames (timestamps are ignored)
+        - frames are sent by batches with tx queue backpressure handling, bus load is reported
+        """
+        meter = self.__get_bus_load_meter()
+        batch = []
+        total_msgs = queued_msgs = 0
+
+        meter.start()
+        for _, msg in trace_io.iter_trace(file_name):
+            batch.append(msg)
+            if len(batch) < FLOOD_BATCH_SIZE:
+                continue
+            queued = self.can_bus.send_batch(batch)
+            meter.add_msgs(batch[:queued])
+            queued_msgs += queued
+            total_msgs += len(batch)
+            batch = []
+            if queued < FLOOD_BATCH_SIZE:
+                break
+        else:
+            queued = self.can_bus.send_batch(batch)
+            meter.add_msgs(batch[:queued])
+            queued_msgs += queued
+            total_msgs += len(batch)
+        meter.stop()
+
+        print('Queued messages: {0} / {1} (tx queue full: {2}x)'.format(queued_msgs, total_msgs,
+                                                                       self.can_bus.enobufs_count))
+        meter.print()
 
     def __receive_one_msg(self, max_timeout_ms):
         """
@@ -219,21 +558,70 @@ class CanSimulator:
 
     def __receive_multi_msg(self, max_timeout_ms):
         """
-        Wait for multiple messages - stop receiving when there are no messages for max_timeout_ms
+        Wait for multiple messages - print all 'Address Claim' messages received in max_timeout_ms
         :param max_timeout_ms:
         :return:
         """
         max_time_s = self.__ms_to_seconds(max_timeout_ms)
-        actual_waiting_time = 0
-        start_time = time.time()
-        while actual_waiting_time <= max_time_s:
-            msg = self.can_bus.wait_for_one_msg(0.05)
+        self.__wait_for_addr_claims(max_time_s, lambda msg: False)
 
+    def __record_messages(self, max_timeout_ms, file_name, max_file_mb, max_file_s):
+        """
+        Record all received frames with kernel timestamps into file(s) (no printing of frames)
+        - frames are read from socket by batches and written by background thread
+        - frames dropped by full socket receive queue (socket overruns) are reported
+        :param max_timeout_ms: recording time [ms]
+        :param file_name: binary file or candump log ('*.log')
+        :param max_file_mb: max. file size [MB] (0 = no size rotation)
+        :param max_file_s: max. time [s] covered by one file (0 = no time rotation)
+        :return:
+        """
+        if self.can_bus.bus is None:
+            print('Error: No SocketCan device connected!')
+            return
+        self.can_bus.enable_rx_timestamps(RECORDER_RECEIVE_BUFFER_SIZE)
+
+        bus_recorder = recorder.BusRecorder(file_name, self.interface, max_file_mb * 1000000, max_file_s)
+        bus_recorder.start()
+        deadline = time.monotonic() + self.__ms_to_seconds(max_timeout_ms)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not bus_recorder.add_frames(self.can_bus.receive_raw_frames(min(remaining, RECORDER_POLL_S))):
+                break
+        bus_recorder.stop()
+
+        bus_recorder.print_statistics()
+        print('Socket overruns (frames dropped by kernel): {0}'.format(self.can_bus.rx_overflow_count))
+
+    def __wait_for_addr_claims(self, max_time_s, addr_claim_handler, broadcast_msg_group=None, delayed_action=None):
+        """
+        Wait max. time for 'Address Claim' messages and pass each of them to handler
+        - ELD broadcast messages are sent every 50ms when 'broadcast_msg_group' is specified
+        - process sleeps until 'Address Claim' arrives or next broadcast is due (no polling)
+        :param max_time_s: max. waiting time [s]
+        :param addr_claim_handler: function(msg) called for every 'Address Claim', returns True to stop waiting
+        :param broadcast_msg_group: ELD_msg_group with values of broadcast messages or None
+        :param delayed_action: (delay [s], action) run once after delay or None
+        :return:
+        """
+        cyclic = self.__get_cyclic_scheduler()
+        if broadcast_msg_group is not None:
+            # J1939 messages need to be broadcast for Address claim Ehubo2 mechanism
+            cyclic.add_periodic('ELD broadcast', ADDR_CLAIM_BROADCAST_CYCLE_S,
+                                lambda: self.__send_eld_broadcast_mesages(broadcast_msg_group))
+        if delayed_action is not None:
+            cyclic.add_one_shot(*delayed_action)
+
+        def wait_for_addr_claim(timeout_s):
+            msg = self.can_bus.wait_for_matching_msg(lambda m: self.__is_addr_claim_msg(m.arbitration_id), timeout_s)
             if msg is not None:
-                if self.__is_addr_claim_msg(msg.arbitration_id):
-                    self.__print_msg(msg)
+                self.__print_msg(msg)
+                if addr_claim_handler(msg):
+                    cyclic.stop()
 
-            actual_waiting_time = time.time() - start_time
+        cyclic.run_for(max_time_s, wait_for_addr_claim)
 
     def __wait_for_addr_claim(self, max_wait_time_ms):
         """
@@ -242,25 +630,18 @@ class CanSimulator:
         :return:
         """
         max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
 
         description = "ELD broadcast msgs for Address claim simulation"
         msg_group = ELD_msg_group(description, 10, 600, 10500, 1000, None, None)
 
-        while actual_waiting_time <= max_time_s:
-            # J1939 messages need to be broadcast for Address claim Ehubo2 mechanism
-            self.__send_eld_broadcast_mesages(msg_group)
-            msg = self.can_bus.wait_for_one_msg(0.05)
-
-            if msg is not None:
-                if self.__is_addr_claim_msg(msg.arbitration_id):
-                    self.__print_msg(msg)
-                    return msg
+        received = []
 
-            actual_waiting_time = time.time() - start_time
+        def stop_on_first_addr_claim(msg):
+            received.append(msg)
+            return True
 
-        return None
+        self.__wait_for_addr_claims(max_time_s, stop_on_first_addr_claim, msg_group)
+        return received[0] if received else None
 
     def __wait_for_addr_claim_no_collision_continuous(self, max_wait_time_ms):
         """
@@ -269,23 +650,11 @@ class CanSimulator:
         :return:
         """
         max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
 
         description = "ELD broadcast msgs for Address claim simulation"
         msg_group = ELD_msg_group(description, 10, 600, 10500, 1000, None, None)
 
-        while actual_waiting_time <= max_time_s:
-            # J1939 messages need to be broadcast for Address claim Ehubo2 mechanism
-            self.__send_eld_broadcast_mesages(msg_group)
-            msg = self.can_bus.wait_for_one_msg(0.05)
-
-            if msg is not None:
-                if self.__is_addr_claim_msg(msg.arbitration_id):
-                    self.__print_msg(msg)
-
-            actual_waiting_time = time.time() - start_time
-
+        self.__wait_for_addr_claims(max_time_s, lambda msg: False, msg_group)
         return None
 
     def __wait_for_addr_claim_multi_collisions_continuous(self, max_wait_time_ms, nmb_collisions):
@@ -296,8 +665,6 @@ class CanSimulator:
         :return:
         """
         max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
 
         # Generate can-bus ELD messages for establishing ecm_link connection
         description = "ELD broadcast msgs for Address claim simulation"
@@ -308,27 +675,23 @@ class CanSimulator:
         # Needs to send back with the same msg ID to create Address Collision
         max_addr_claim_response_delay_ms = 500  # 250ms request + 250ms response TODO: 250 or 500 ? If works with 250 keep 250ms
         actual_collisions_count = 0
+        collision_tx_time = None
 
-        while actual_waiting_time <= max_time_s:
-            # J1939 messages need to be broadcast for Address claim Ehubo2 mechanism
-            self.__send_eld_broadcast_mesages(msg_group)
-
-            msg = self.can_bus.wait_for_one_msg(0.05)  # Wait/Read Address request from Ehubo2
-
-            if msg is not None:
-                if self.__is_addr_claim_msg(msg.arbitration_id):
-                    self.__print_msg(msg)
-                    if actual_collisions_count < nmb_collisions:
-                        # Generate Address Collision J1939 message and send it into can-bus
-                        addr_collision_response = can.Message(arbitration_id=msg.arbitration_id, extended_id=True,
-                                                              data=data_to_send)
-                        self.__send_one_msg(addr_collision_response, print_msg_flag=True)
-                        actual_collisions_count += 1
-                    else:
-                        pass
-
-            actual_waiting_time = time.time() - start_time
-
+        def generate_collision(msg):
+            nonlocal actual_collisions_count, collision_tx_time
+            if collision_tx_time is not None:
+                self.__print_response_time('Address claim', collision_tx_time)
+                collision_tx_time = None
+            if actual_collisions_count < nmb_collisions:
+                # Generate Address Collision J1939 message and send it into can-bus
+                addr_collision_response = j1939.get_message(msg.arbitration_id, data_to_send)
+                self.__expect_response('Address claim collision', msg.arbitration_id)
+                self.__send_one_msg(addr_collision_response, print_msg_flag=True)
+                collision_tx_time = self.can_bus.last_tx_time
+                actual_collisions_count += 1
+            return False
+
+        self.__wait_for_addr_claims(max_time_s, generate_collision, msg_group)
         return actual_collisions_count
 
     @staticmethod
@@ -338,87 +701,27 @@ class CanSimulator:
         :param msg_id:
         :return:
         """
-        MSG_ID_MASK = 0x00FF0000
-        ADDR_CLAIM_MSG_ID = 0xEE
-        masked_msg_id = (MSG_ID_MASK & arbitration_id) >> 16
-
-        if masked_msg_id == ADDR_CLAIM_MSG_ID:
-            return True
-        else:
-            False
+        return j1939.is_addr_claim_msg(arbitration_id)
 
     @staticmethod
     def is_VIN_code_request_msg(msg):
         """
-        Check if 'arbitration_id' from can-bus is 'VIN code request' message ID
-        :param msg_id:
+        Check if message from can-bus is 'VIN code request' message
+        :param msg:
         :return:
         """
         assert isinstance(msg, can.Message)
-        MSG_ID_MASK = 0x00FF0000
-        REQUEST_MSG_ID = 0xEA  # J1939 Request message ID
-        VIN_CODE_MSG_ID = 0xFEEC
-        requested_msg_id = 0  # J1939 msg ID which is requested from network
-        masked_msg_id = (MSG_ID_MASK & msg.arbitration_id) >> 16
-        if masked_msg_id == REQUEST_MSG_ID:
-
-            requested_msg_id |= msg.data[2] << 16  # 0x00
-            requested_msg_id |= msg.data[1] << 8  # 0xFE
-            requested_msg_id |= msg.data[0]  # 0xEC
-
-            if requested_msg_id == VIN_CODE_MSG_ID:
-                return True
-            else:
-                return False
-        else:
-            False
+        return j1939.get_requested_pgn(msg) == j1939.PGN_VIN
 
     @staticmethod
     def is_engine_hours_request_msg(msg):
         """
-        Check if 'arbitration_id' from can-bus is 'Engine hours' message ID
-        :param msg_id:
-        :return:
-        """
-        assert isinstance(msg, can.Message)
-        MSG_ID_MASK = 0x00FF0000
-        REQUEST_MSG_ID = 0xEA  # J1939 Request message ID
-        ENGINE_HOURS_MSG_ID = 0xFEE5
-        requested_msg_id = 0  # J1939 msg ID which is requested from network
-        masked_msg_id = (MSG_ID_MASK & msg.arbitration_id) >> 16
-        if masked_msg_id == REQUEST_MSG_ID:
-            requested_msg_id |= msg.data[2] << 16  # 0x00
-            requested_msg_id |= msg.data[1] << 8  # 0xFE
-            requested_msg_id |= msg.data[0]  # 0xEC
-            return requested_msg_id == ENGINE_HOURS_MSG_ID
-        else:
-            False
-
-    @staticmethod
-    def __is_engine_hours_request_msg(msg):
-        """
-        Check if 'arbitration_id' from can-bus is 'engine hours request' message ID
-        :param msg_id:
+        Check if message from can-bus is 'Engine hours request' message
+        :param msg:
         :return:
         """
         assert isinstance(msg, can.Message)
-        MSG_ID_MASK = 0x00FF0000
-        REQUEST_MSG_ID = 0xEA  # J1939 Request message ID
-        ENGINE_HOURS_MSG_ID = 0xFEE5
-        requested_msg_id = 0  # J1939 msg ID which is requested from network
-        masked_msg_id = (MSG_ID_MASK & msg.arbitration_id) >> 16
-        if masked_msg_id == REQUEST_MSG_ID:
-
-            requested_msg_id |= msg.data[2] << 16
-            requested_msg_id |= msg.data[1] << 8
-            requested_msg_id |= msg.data[0]
-
-            if requested_msg_id == ENGINE_HOURS_MSG_ID:
-                return True
-            else:
-                return False
-        else:
-            False
+        return j1939.get_requested_pgn(msg) == j1939.PGN_ENGINE_HOURS
 
     def __wait_for_one_addr_claim(self, max_wait_time_s):
         """
@@ -426,19 +729,22 @@ class CanSimulator:
         :param max_wait_time_s:
         :return:
         """
-        start_time = time.time()
-        actual_waiting_time = 0.0
-        while actual_waiting_time <= max_wait_time_s:
-            msg = self.can_bus.wait_for_one_msg(0.05)
-
-            if msg is not None:
-                if self.__is_addr_claim_msg(msg.arbitration_id):
-                    self.__print_msg(msg)
-                    return msg
-
-            actual_waiting_time = time.time() - start_time
+        msg = self.can_bus.wait_for_matching_msg(lambda m: self.__is_addr_claim_msg(m.arbitration_id),
+                                                 max_wait_time_s)
+        if msg is not None:
+            self.__print_msg(msg)
+        return msg
 
-        return None
+    def __print_response_time(self, description, tx_time):
+        """
+        Print time between sent message and kernel receive timestamp of last received message
+        :param description: name of received message
+        :param tx_time: monotonic time of sent message (see CanDriver.last_tx_time)
+        :return:
+        """
+        response_time = self.can_bus.get_response_time(tx_time)
+        if response_time is not None:
+            print('{0} received {1:.0f} us after sent message'.format(description, response_time * 1000000))
 
     @staticmethod
     def __ms_to_seconds(ms_time):
@@ -459,7 +765,7 @@ class CanSimulator:
         """
         # Data need to have higher priority (= smaller number) than Gen2 NAME: 0x00, 0x00, 0x40, 0x32, 0x00, 0xff, 0x02, 0x10
         data_to_send = [0x00, 0x00, 0x00, 0x00, 0x00, 0x01, 0x02, 0x03]
-        return can.Message(arbitration_id=msg_arbitration_id, extended_id=True, data=data_to_send)
+        return j1939.get_message(msg_arbitration_id, data_to_send)
 
     def __new_device_addr_collisions_multi_continuous(self, max_wait_time_ms, nmb_collisions):
         """
@@ -475,42 +781,36 @@ class CanSimulator:
         DELAY_FOR_ECM_LINK_S = 2  # provide Ehubo2 time to re-establish ecm_link
 
         max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
+        addr_claim_tx_time = None
 
         # Generate can-bus ELD messages for establishing ecm_link connection
         description = "ELD broadcast msgs for Address claim simulation"
         msg_group = ELD_msg_group(description, 10, 600, 10500, 1000, None, None)
 
-        initial_request = True
+        collisions_started = False
         actual_collisions_count = 0
-        while actual_waiting_time <= max_time_s:
-
-            self.__send_eld_broadcast_mesages(msg_group)    # Broadcast messages required by ELD
-            if actual_collisions_count < nmb_collisions:
-                if actual_waiting_time > DELAY_FOR_ECM_LINK_S:  # Provide Ehubo2 enough time to re-establish ecm_link
-                    if initial_request:
-                        # Default Ehubo2 address is 0xfb -> default arbitration_id = 0x18eefffb
-                        self.__send_one_msg(self.__get_addr_claim_req_msg(0x18eefffb), print_msg_flag=True)
-                        initial_request = False
-
-                    addr_claim_msg = self.__wait_for_one_addr_claim(0.5)
-
-                    if addr_claim_msg is not None:
-                        if self.__is_addr_claim_msg(addr_claim_msg.arbitration_id):
-                            # Generate next collision here
-                            self.__send_one_msg(self.__get_addr_claim_req_msg(addr_claim_msg.arbitration_id),
-                                                print_msg_flag=True)
-                            actual_collisions_count += 1
-
-                else:
-                    time.sleep(0.05)
-
-            else:
-                time.sleep(0.05)
-
-            actual_waiting_time = time.time() - start_time
 
+        def send_initial_request():
+            nonlocal collisions_started, addr_claim_tx_time
+            if nmb_collisions > 0:
+                # Default Ehubo2 address is 0xfb -> default arbitration_id = 0x18eefffb
+                self.__send_one_msg(self.__get_addr_claim_req_msg(0x18eefffb), print_msg_flag=True)
+                addr_claim_tx_time = self.can_bus.last_tx_time
+                collisions_started = True
+
+        def generate_collision(msg):
+            nonlocal actual_collisions_count, addr_claim_tx_time
+            # Address claims before ecm_link delay and after last collision are not answered
+            if collisions_started and actual_collisions_count < nmb_collisions:
+                self.__print_response_time('Address claim', addr_claim_tx_time)
+                self.__expect_response('Address claim collision', msg.arbitration_id)
+                self.__send_one_msg(self.__get_addr_claim_req_msg(msg.arbitration_id), print_msg_flag=True)
+                addr_claim_tx_time = self.can_bus.last_tx_time
+                actual_collisions_count += 1
+            return False
+
+        self.__wait_for_addr_claims(max_time_s, generate_collision, msg_group,
+                                    (DELAY_FOR_ECM_LINK_S, send_initial_request))
         return actual_collisions_count
 
     def __wait_and_reply_VIN_single_frame(self, max_wait_time_ms):
@@ -535,12 +835,13 @@ class CanSimulator:
         # ASCII '*' -> 0x2A     ('*' = end of VIN code)
         # no data   -> 0xFF
         vin_code_data = [0x56, 0x49, 0x4E, 0x31, 0x32, 0x33, 0x2A, 0xFF]
-        vin_code_msg = can.Message(arbitration_id=vin_code_msg_id, extended_id=True, data=vin_code_data)
+        vin_code_msg = j1939.get_message(vin_code_msg_id, vin_code_data)
+        self.__expect_response('VIN', vin_code_msg_id)
         self.__send_one_msg(vin_code_msg)
 
     def __wait_and_reply_VIN_multi_frame(self, max_wait_time_ms):
         """
-        Wait max. time for VIN code request and reply by VIN code as single can frame message
+        Wait max. time for VIN code request and reply by VIN code as multi frame message (J1939 transport protocol)
         :param max_wait_time_ms:
         :return:
         """
@@ -551,33 +852,39 @@ class CanSimulator:
             return
 
         # Build and send VIN code message as multi-frame can message
-        vin_code_multi_messages = self.__get_VIN_code_multi_frame()
-        for can_frame in vin_code_multi_messages:
-            self.__send_one_msg(can_frame, print_msg_flag=True)
-            time.sleep(0.050)  # According J1939 std. multi frame messages with 50ms time delay
+        cyclic = self.__get_cyclic_scheduler()
+        tp = self.__get_transport(cyclic, print_msg_flag=True)
+        self.__expect_response('VIN', self.__get_tp_cm_arbitration_id())
+        tp.send(j1939.PGN_VIN, VIN_CODE)
+
+        def wait_for_transfer(timeout_s):
+            if tp.is_idle():
+                cyclic.stop()
+                return
+            msg = self.can_bus.wait_for_one_msg(timeout_s)
+            if msg is not None:
+                tp.on_message(msg)
+
+        cyclic.run_for(TP_MAX_TRANSFER_S, wait_for_transfer)
 
     def __broadcast_and_reply_VIN_multi_frame(self, max_wait_time_ms):
         """
         Broadcast F004 message and response on VIN code request for Install wizard test
         """
-        actual_wait_time = 0
-        start_time = time.time() * 1000
+        cyclic = self.__get_cyclic_scheduler()
+        tp = self.__get_transport(cyclic, print_msg_flag=True)
+        rpm_msg = self.get_EEC1_message(2000)
+        cyclic.add_periodic('EEC1', INSTALL_WIZARD_CYCLE_S, lambda: self.__send_one_msg(rpm_msg, print_msg_flag=True))
 
-        while actual_wait_time < max_wait_time_ms:
-            rpm_msg = self.get_EEC1_message(2000)
-            self.__send_one_msg(rpm_msg, print_msg_flag=True)
-            msg = self.__wait_for_VIN_code_request(100)
-            actual_wait_time = time.time() * 1000 - start_time
-
-            if msg is None:
-                print('No \'VIN code\' request received in {0} seconds'.format(self.__ms_to_seconds(max_wait_time_ms)))
-                continue
+        def reply_vin_code(request_msg):
+            self.__print_msg(request_msg)
+            self.__expect_response('VIN', self.__get_tp_cm_arbitration_id())
+            tp.send(j1939.PGN_VIN, VIN_CODE)
 
-            # Build and send VIN code message as multi-frame can message
-            vin_code_multi_messages = self.__get_VIN_code_multi_frame()
-            for can_frame in vin_code_multi_messages:
-                self.__send_one_msg(can_frame, print_msg_flag=True)
-                time.sleep(0.050)  # According J1939 std. multi frame messages with 50ms time delay
+        responder = j1939.RequestResponder()
+        responder.register(j1939.PGN_VIN, reply_vin_code)
+        cyclic.run_for(self.__ms_to_seconds(max_wait_time_ms),
+                       lambda timeout_s: self.__serve_requests(responder, timeout_s, tp))
 
         print("- Simulation for Install wizard completed. -")
 
@@ -608,126 +915,446 @@ class CanSimulator:
         Perform truck simulation for ELD test procedure - simulation specified in text file
         - keep sending broadcast messages: Speed, Engine speed, Vehicle distance
         - response on request messages: Engine hours and VIN code
+        - vehicle distance and engine hours of first stage are taken from file, next stages continue from end of
+          previous stage (advancing during stage needs NumPy, without it they advance at stage end)
         :param max_wait_time_ms:
         :return:
         """
         eld_simulation = ELD_simulation(file_name)
         eld_simulation.print_simulation_sequence()
+        self.__print_clock()
 
-        for msg_group in eld_simulation.msg_group_list:
+        distance_m = engine_hours = None
+        for stage_index, msg_group in enumerate(eld_simulation.msg_group_list):
             # Iterate over all message group
             print("\nSimulating: {0}\n".format(msg_group.description))
             msg_group.print()
             print('...\n')
 
+            if signal_profile.is_available():
+                distance_m, engine_hours = self.__run_eld_profile_simulation(msg_group, stage_index, distance_m,
+                                                                             engine_hours)
+                continue
+            if msg_group.profiles:
+                print('Error: NumPy is not installed - signal profiles are simulated by their start values!')
+
+            if distance_m is None:
+                distance_m, engine_hours = msg_group.vehicle_distance, msg_group.engine_hours
             ccvs = self.get_CCVS1_message(msg_group.vehicle_speed)
             eec1 = self.get_EEC1_message(msg_group.engine_speed)
-            vdhr = self.get_VDHR_message(msg_group.vehicle_distance)
-            hours = self.get_HOURS_message(msg_group.engine_hours)
+            vdhr = self.get_VDHR_message(distance_m)
+            hours = self.get_HOURS_message(engine_hours)
 
             self.__run_eld_file_simulation(msg_group.duration, ccvs, eec1, vdhr, hours, False)
+            distance_m, engine_hours = signal_profile.get_constant_stage_end(msg_group, distance_m, engine_hours)
         print("- Simulation for ELD completed. -")
 
-    def __run_eld_file_simulation(self, max_duration_s, ccvs, eec1, vdhr, hours, print_out_msg_flag=False):
+    def __eld_file_simulation_bcm(self, file_name):
         """
-        Simulate J1939 messages for ELD behavior
+        Perform truck simulation for ELD test procedure with broadcast messages sent by kernel (SocketCAN BCM)
+        - broadcast messages (Speed, Engine speed, Vehicle distance) are handed over to kernel with theirs cycle times
+        - payload of broadcast messages is only updated when simulation stage changes
+        - response on request messages: Engine hours and VIN code
+        :param file_name:
         :return:
         """
-        actual_duration_time = 0
-        start_time = time.time()
+        eld_simulation = ELD_simulation(file_name)
+        eld_simulation.print_simulation_sequence()
 
-        # Simulate one message group for specific duration time
-        while (time.time() - start_time) < max_duration_s:
-            self.__send_one_msg(eec1, print_out_msg_flag)
-            self.__send_one_msg(ccvs, print_out_msg_flag)
-            self.__send_one_msg(vdhr, print_out_msg_flag)
+        tasks = None
+        for msg_group in eld_simulation.msg_group_list:
+            print("\nSimulating: {0}\n".format(msg_group.description))
+            msg_group.print()
+            print('...\n')
 
-            msg = self.__wait_for_VIN_or_engine_hours_request(100)
+            broadcast_msgs = [(self.get_EEC1_message(msg_group.engine_speed), EEC1_CYCLE_S),
+                              (self.get_CCVS1_message(msg_group.vehicle_speed), CCVS_CYCLE_S),
+                              (self.get_VDHR_message(msg_group.vehicle_distance), VDHR_CYCLE_S)]
+            hours = self.get_HOURS_message(msg_group.engine_hours)
 
-            if msg is None:
-                # print('No \'VIN code\' or \'Engine hours\' request received in {0} seconds'.format(
-                #     self.__ms_to_seconds(max_wait_time_ms)))
-                continue
+            if tasks is None:
+                tasks = [self.can_bus.start_periodic_msg(msg, period_s) for msg, period_s in broadcast_msgs]
+                if None in tasks:
+                    print('Error: Cannot start kernel cyclic transmission (SocketCAN BCM)!')
+                    self.can_bus.stop_all_periodic_msgs()
+                    return
+            else:
+                for task, (msg, period_s) in zip(tasks, broadcast_msgs):
+                    self.can_bus.modify_periodic_msg(task, msg)
 
-            if self.is_VIN_code_request_msg(msg):
-                # Build and send VIN code message as multi-frame can message
-                vin_code_multi_messages = self.__get_VIN_code_multi_frame()
-                for can_frame in vin_code_multi_messages:
-                    print('VIN code request received - sending response now')
-                    self.__send_one_msg(can_frame)
-                    time.sleep(0.050)  # According J1939 std. multi frame messages with 50ms time delay
+            cyclic = self.__get_cyclic_scheduler()
+            tp = self.__get_transport(cyclic)
+            responder = self.__get_eld_responder(tp, hours)
+            cyclic.run_for(msg_group.duration, lambda timeout_s: self.__serve_requests(responder, timeout_s, tp))
 
-            if self.is_engine_hours_request_msg(msg):
-                print('Engine Hours request received - sending response now')
-                self.__send_one_msg(hours)
+        self.can_bus.stop_all_periodic_msgs()
+        print("- Simulation for ELD (kernel cyclic transmission) completed. -")
 
-    def __wait_for_VIN_code_request(self, max_wait_time_ms):
+    def __measure_request_latency(self, max_wait_time_ms, target_address, rate_hz, pgns):
         """
-        Wait max. time for one VIN code request message
+        Send J1939 requests to ECU and measure latency of its responses (mirror of simulator responders)
+        - PGNs are requested in round robin [rate_hz] times per second, max. one outstanding request per PGN
+        - single frame and multi frame (TP BAM / RTS-CTS) responses are matched, latency = request sent ->
+          kernel receive timestamp of response (last data packet of multi frame response)
+        - min / median / p99 / max latency histograms are printed per PGN
         :param max_wait_time_ms:
+        :param target_address: J1939 address of ECU under test
+        :param rate_hz: number of requests per second
+        :param pgns: list of requested PGNs
         :return:
         """
-        max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
+        tracker = latency.RequestTracker(pgns)
+        cyclic = self.__get_cyclic_scheduler()
+        next_index = 0
+
+        def on_tp_message(pgn, data, source_address):
+            if source_address == target_address:
+                tracker.on_response(pgn, self.can_bus.last_rx_time)
+
+        tp = transport.TransportProtocol(lambda msg: self.__send_one_msg(msg), SIMULATOR_ADDRESS, cyclic.add_one_shot,
+                                         TP_PACKET_GAP_S, on_tp_message)
+
+        def send_request():
+            nonlocal next_index
+            tracker.check_timeouts()
+            for i in range(len(pgns)):
+                pgn = pgns[(next_index + i) % len(pgns)]
+                if not tracker.is_outstanding(pgn):
+                    self.__send_one_msg(j1939.get_request_message(pgn, target_address, SIMULATOR_ADDRESS))
+                    tracker.on_request_sent(pgn, self.can_bus.last_tx_time)
+                    next_index = (next_index + i + 1) % len(pgns)
+                    return
+
+        def receive_response(timeout_s):
+            msg = self.can_bus.wait_for_one_msg(timeout_s)
+            if msg is None or j1939.get_source_address(msg.arbitration_id) != target_address:
+                return
+            if tp.on_message(msg):
+                return
+            destination = j1939.get_destination_address(msg.arbitration_id)
+            if destination != SIMULATOR_ADDRESS and destination != j1939.GLOBAL_ADDRESS:
+                return
+
+            nack_pgn = j1939.get_nack_pgn(msg)
+            if nack_pgn is not None:
+                tracker.on_nack(nack_pgn)
+            else:
+                tracker.on_response(j1939.get_pgn(msg.arbitration_id), self.can_bus.last_rx_time)
 
-        while actual_waiting_time <= max_time_s:
-            # msg = self.can_bus.get_one_msg()
-            msg = self.can_bus.wait_for_one_msg(0.005)
+        cyclic.add_periodic('REQUEST', 1.0 / rate_hz, send_request)
+        cyclic.run_for(self.__ms_to_seconds(max_wait_time_ms), receive_response)
+        tracker.check_timeouts()
+        tracker.print()
 
-            if msg is not None:
-                if self.is_VIN_code_request_msg(msg):
-                    self.__print_msg(msg)
-                    return msg
+    def __generate_bus_load(self, max_wait_time_ms, load_percent, file_name):
+        """
+        Perform default ELD truck simulation on congested can-bus
+        - frames from text file (mix of IDs and DLCs) fill bus up to target load together with ELD broadcasts
+        - rate of load frames is computed from interface baud rate and exact frame lengths (bit stuffing included)
+        :param max_wait_time_ms:
+        :param load_percent: target bus load [%]
+        :param file_name: messages text file (delays are ignored)
+        :return:
+        """
+        mix_msgs = [msg for msg_group in file_io.iter_messages_from_file(file_name) for msg in msg_group.messages]
+        if not mix_msgs:
+            print('Error: No messages for bus load in file \'{0}\'!'.format(file_name))
+            return
+
+        msg_group = ELD_msg_group('Default ELD simulation', 10, 600, 10500, 1000, None, max_wait_time_ms / 1000)
+        ccvs = self.get_CCVS1_message(msg_group.vehicle_speed)
+        eec1 = self.get_EEC1_message(msg_group.engine_speed)
+        vdhr = self.get_VDHR_message(msg_group.vehicle_distance)
+        hours = self.get_HOURS_message(msg_group.engine_hours)
 
-            actual_waiting_time = time.time() - start_time
+        meter = self.__get_bus_load_meter()
+        eld_bits_per_s = bus_load.get_periodic_bits_per_s([(eec1, EEC1_CYCLE_S), (ccvs, CCVS_CYCLE_S),
+                                                           (vdhr, VDHR_CYCLE_S)])
+        generator = bus_load.LoadGenerator(mix_msgs, load_percent, meter.bitrate, eld_bits_per_s)
+        print('ELD broadcasts: {0:.0f} bits/s; load frames: {1:.0f} bits/s'.format(eld_bits_per_s,
+                                                                                   generator.bits_per_s))
 
-        return None
+        meter.start()
+        self.__run_eld_file_simulation(msg_group.duration, ccvs, eec1, vdhr, hours, False,
+                                       lambda: meter.add_msgs(self.__send_due_load_msgs(generator)))
+        meter.stop()
+        print('Load frames:')
+        meter.print()
+        print('Bus load including ELD broadcasts: {0:.1f}%'.format(
+            meter.get_bus_load() + eld_bits_per_s / meter.bitrate * 100))
+        print("- Simulation for ELD under bus load completed. -")
 
-    def __wait_for_VIN_or_engine_hours_request(self, max_wait_time_ms):
+    def __send_due_load_msgs(self, generator):
         """
-        Wait max. time for one VIN code or Engine Hours request message
-        :param max_wait_time_ms:
+        Send messages of bus load generator due now
+        :param generator: bus_load.LoadGenerator
+        :return: list of queued messages
+        """
+        due_msgs = generator.get_due_msgs()
+        queued = self.can_bus.send_batch(due_msgs)
+        return due_msgs[:queued]
+
+    def __eld_file_simulation_with_addr_claims(self, file_name, nmb_collisions):
+        """
+        Run ELD simulation from text file and address collision simulation concurrently (asyncio behaviours)
+        :param file_name: ELD simulation text file
+        :param nmb_collisions: max. number of generated address collisions
+        :return: number of generated address collisions
+        """
+        eld_simulation = ELD_simulation(file_name)
+        eld_simulation.print_simulation_sequence()
+        duration_s = sum(msg_group.duration for msg_group in eld_simulation.msg_group_list)
+
+        loop = asyncio.new_event_loop()
+        driver = async_driver.AsyncCanDriver(self.can_bus, loop)
+        if not driver.start():
+            loop.close()
+            return 0
+
+        try:
+            collision_count = loop.run_until_complete(
+                self.__async_eld_with_addr_claims(driver, eld_simulation, nmb_collisions, duration_s))
+        finally:
+            driver.stop()
+            loop.close()
+        print("- Simulation for ELD completed. -")
+        return collision_count
+
+    async def __async_eld_with_addr_claims(self, driver, eld_simulation, nmb_collisions, duration_s):
+        """
+        Run ELD simulation and address collision behaviours concurrently
+        :return: number of generated address collisions
+        """
+        results = await asyncio.gather(self.__async_eld_file_simulation(driver, eld_simulation),
+                                       self.__async_addr_claim_collisions(driver, nmb_collisions, duration_s))
+        return results[1]
+
+    async def __async_eld_file_simulation(self, driver, eld_simulation):
+        """
+        ELD simulation behaviour - broadcasts with J1939 cycle times and responses to VIN code / Engine hours requests
+        :param driver: async_driver.AsyncCanDriver
+        :param eld_simulation: ELD_simulation
         :return:
         """
-        max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
+        tp = transport.TransportProtocol(lambda msg: self.__send_one_msg(msg), SIMULATOR_ADDRESS,
+                                         lambda delay_s, action: driver.loop.call_later(delay_s, action),
+                                         TP_PACKET_GAP_S)
 
-        while actual_waiting_time <= max_time_s:
-            # msg = self.can_bus.get_one_msg()
-            msg = self.can_bus.wait_for_one_msg(0.005)
+        for msg_group in eld_simulation.msg_group_list:
+            print("\nSimulating: {0}\n".format(msg_group.description))
+            ccvs = self.get_CCVS1_message(msg_group.vehicle_speed)
+            eec1 = self.get_EEC1_message(msg_group.engine_speed)
+            vdhr = self.get_VDHR_message(msg_group.vehicle_distance)
+            responder = self.__get_eld_responder(tp, self.get_HOURS_message(msg_group.engine_hours))
+
+            def serve_request(msg):
+                if not tp.on_message(msg):
+                    responder.dispatch(msg)
+
+            driver.subscribe(serve_request)
+            await asyncio.gather(driver.send_periodic(lambda: eec1, EEC1_CYCLE_S, msg_group.duration),
+                                 driver.send_periodic(lambda: ccvs, CCVS_CYCLE_S, msg_group.duration),
+                                 driver.send_periodic(lambda: vdhr, VDHR_CYCLE_S, msg_group.duration))
+            driver.unsubscribe(serve_request)
+
+    async def __async_addr_claim_collisions(self, driver, nmb_collisions, duration_s):
+        """
+        Address collision behaviour - respond to 'Address Claim' messages by the same address claim
+        :param driver: async_driver.AsyncCanDriver
+        :param nmb_collisions: max. number of generated address collisions
+        :param duration_s: max. time [s]
+        :return: number of generated address collisions
+        """
+        end_time = driver.loop.time() + duration_s
+        collisions_count = 0
+
+        while collisions_count < nmb_collisions:
+            remaining = end_time - driver.loop.time()
+            if remaining <= 0:
+                break
+            msg = await driver.wait_for_matching_msg(lambda m: self.__is_addr_claim_msg(m.arbitration_id), remaining)
+            if msg is None:
+                break
+
+            self.__print_msg(msg)
+            self.__expect_response('Address claim collision', msg.arbitration_id)
+            self.__send_one_msg(self.__get_addr_claim_req_msg(msg.arbitration_id), print_msg_flag=True)
+            collisions_count += 1
+        return collisions_count
+
+    def __multi_ecu_file_simulation(self, file_name):
+        """
+        Perform simulation of whole truck network for ELD test procedure - values specified in text file
+        - every ECU sends its broadcasts from own source address, claims its address and serves requests sent to it
+        - all ECUs are served by one receive loop and one cyclic scheduler
+        :param file_name:
+        :return:
+        """
+        eld_simulation = ELD_simulation(file_name)
+        eld_simulation.print_simulation_sequence()
+
+        self.__print_clock()
 
+        network = ecu_network.get_truck_network(VIN_CODE)
+        cyclic = self.__get_cyclic_scheduler()
+        network.start(cyclic, lambda msg: self.__send_one_msg(msg), TP_PACKET_GAP_S)
+
+        def serve_messages(timeout_s):
+            msg = self.can_bus.wait_for_one_msg(self.clock.get_real_timeout(timeout_s))
             if msg is not None:
-                if self.is_VIN_code_request_msg(msg):
-                    self.__print_msg(msg)
-                    return msg
-                elif self.is_engine_hours_request_msg(msg):
-                    self.__print_msg(msg)
-                    return msg
-                else:
-                    pass
+                network.dispatch(msg)
+
+        for msg_group in eld_simulation.msg_group_list:
+            print("\nSimulating: {0}\n".format(msg_group.description))
+            msg_group.print()
+            print('...\n')
 
-            actual_waiting_time = time.time() - start_time
+            network.set_signal(frame_cache.CCVS_VEHICLE_SPEED.name, msg_group.vehicle_speed)
+            network.set_signal(frame_cache.EEC1_ENGINE_SPEED.name, msg_group.engine_speed)
+            network.set_signal(frame_cache.VDHR_DISTANCE.name, msg_group.vehicle_distance)
+            network.set_signal(frame_cache.ENGINE_HOURS.name, msg_group.engine_hours)
+            cyclic.run_for(msg_group.duration, serve_messages)
 
-        return None
+        cyclic.print_statistics()
+        network.print_statistics()
+        print("- Simulation of truck network completed. -")
+
+    def __run_eld_file_simulation(self, max_duration_s, ccvs, eec1, vdhr, hours, print_out_msg_flag=False,
+                                  bus_load_action=None):
+        """
+        Simulate J1939 messages for ELD behavior
+        - every broadcast message is sent with its own J1939 cycle time (EEC1 20ms, CCVS 100ms, VDHR 1s)
+        - VIN code and Engine hours requests are served between broadcast deadlines
+        - optional 'bus_load_action' is run every BUS_LOAD_CYCLE_S
+        :return:
+        """
+        cyclic = self.__get_cyclic_scheduler()
+        cyclic.add_periodic('EEC1', EEC1_CYCLE_S, lambda: self.__send_one_msg(eec1, print_out_msg_flag))
+        cyclic.add_periodic('CCVS', CCVS_CYCLE_S, lambda: self.__send_one_msg(ccvs, print_out_msg_flag))
+        cyclic.add_periodic('VDHR', VDHR_CYCLE_S, lambda: self.__send_one_msg(vdhr, print_out_msg_flag))
+        if bus_load_action is not None:
+            cyclic.add_periodic('LOAD', BUS_LOAD_CYCLE_S, bus_load_action)
+
+        tp = self.__get_transport(cyclic)
+        responder = self.__get_eld_responder(tp, hours)
+
+        # Simulate one message group for specific duration time
+        cyclic.run_for(max_duration_s, lambda timeout_s: self.__serve_requests(responder, timeout_s, tp))
+        cyclic.print_statistics()
+
+    def __run_eld_profile_simulation(self, msg_group, stage_index=0, start_distance_m=None, start_hours=None):
+        """
+        Simulate ELD stage with signal profiles (stage without profiles has constant profiles)
+        - payloads of all cycles are computed before stage is run (see signal_profile.StageProfile)
+        - every cycle copies payload of its cycle index into preallocated frame (skipped cycles keep timing of values)
+        :param msg_group: ELD_msg_group
+        :param stage_index: index of stage in simulation file
+        :param start_distance_m: distance at stage start (None = stage value)
+        :param start_hours: engine hours at stage start (None = stage value)
+        :return: (distance [m], engine hours [h]) at stage end
+        """
+        stage = signal_profile.StageProfile(msg_group, EEC1_CYCLE_S, CCVS_CYCLE_S, VDHR_CYCLE_S, HOURS_UPDATE_CYCLE_S,
+                                            SIMULATOR_ADDRESS, stage_index, start_distance_m, start_hours)
+        cyclic = self.__get_cyclic_scheduler()
+        self.__add_profile_job(cyclic, 'EEC1', EEC1_CYCLE_S, stage.eec1, self.__send_one_msg)
+        self.__add_profile_job(cyclic, 'CCVS', CCVS_CYCLE_S, stage.ccvs, self.__send_one_msg)
+        self.__add_profile_job(cyclic, 'VDHR', VDHR_CYCLE_S, stage.vdhr, self.__send_one_msg)
+        # Engine hours are only updated, they are sent on request
+        self.__add_profile_job(cyclic, 'HOURS', HOURS_UPDATE_CYCLE_S, stage.hours, lambda msg: None)
+
+        tp = self.__get_transport(cyclic)
+        responder = self.__get_eld_responder(tp, stage.hours.msg)
+        cyclic.run_for(msg_group.duration, lambda timeout_s: self.__serve_requests(responder, timeout_s, tp))
+        cyclic.print_statistics()
+        print('Stage end: distance={0:.0f} m; engine_hours={1:.2f} h'.format(stage.end_distance_m, stage.end_hours))
+        return stage.end_distance_m, stage.end_hours
+
+    @staticmethod
+    def __add_profile_job(cyclic, name, period_s, profile_frame, send_function):
+        """
+        Add periodic job sending frame with payload of actual cycle
+        :param cyclic: CyclicScheduler
+        :param name: job name
+        :param period_s: cycle time [s]
+        :param profile_frame: signal_profile.ProfileFrame
+        :param send_function: function(can_msg)
+        :return:
+        """
+        def send_cycle():
+            send_function(profile_frame.get_msg(job.cycle_index))
+
+        job = cyclic.add_periodic(name, period_s, send_cycle)
+
+    def __get_transport(self, cyclic, print_msg_flag=False):
+        """
+        Get J1939 transport protocol engine driven by 'cyclic' scheduler
+        :param cyclic: CyclicScheduler which sends the data packets
+        :param print_msg_flag: print sent frames
+        :return: transport.TransportProtocol
+        """
+        return transport.TransportProtocol(lambda msg: self.__send_one_msg(msg, print_msg_flag), SIMULATOR_ADDRESS,
+                                           cyclic.add_one_shot, TP_PACKET_GAP_S, clock=cyclic.clock)
 
     @staticmethod
-    def __get_VIN_code_multi_frame():
+    def __get_tp_cm_arbitration_id(destination_address=j1939.GLOBAL_ADDRESS):
+        """
+        Arbitration ID of first frame (TP.CM) of multi frame message sent by simulator
+        :param destination_address:
+        :return: int
+        """
+        return j1939.get_arbitration_id(transport.TP_PRIORITY, j1939.PGN_TP_CM, SIMULATOR_ADDRESS, destination_address)
+
+    def __get_eld_responder(self, tp, hours):
         """
-        Generate VIN code messages as list of multi frame messages
+        Get responders to ELD request messages (VIN code and Engine hours)
+        - multi-frame VIN code response is sent by transport protocol engine (broadcasts keep timing)
+        :param tp: transport.TransportProtocol
+        :param hours: Engine hours response message
+        :return: j1939.RequestResponder
+        """
+        def reply_vin_code(request_msg):
+            self.__print_msg(request_msg)
+            print('VIN code request received - sending response now')
+            self.__expect_response('VIN', self.__get_tp_cm_arbitration_id())
+            tp.send(j1939.PGN_VIN, VIN_CODE)
+
+        def reply_engine_hours(request_msg):
+            self.__print_msg(request_msg)
+            print('Engine Hours request received - sending response now')
+            self.__expect_response('Engine hours', hours.arbitration_id)
+            self.__send_one_msg(hours)
+
+        responder = j1939.RequestResponder()
+        responder.register(j1939.PGN_VIN, reply_vin_code)
+        responder.register(j1939.PGN_ENGINE_HOURS, reply_engine_hours)
+        return responder
+
+    def __serve_requests(self, responder, timeout_s, tp=None):
+        """
+        Wait max. time for one can message and dispatch it to request responders and transport protocol
+        :param responder: j1939.RequestResponder
+        :param timeout_s: max. waiting time [s] of simulation clock
+        :param tp: transport.TransportProtocol or None
         :return:
         """
-        initial_frame_data = [0x20, 0x12, 0x00, 0x03, 0xFF, 0xEC, 0xFE, 0x00]
-        initial_frame_msg = can.Message(arbitration_id=0x18ECFF01, extended_id=True, data=initial_frame_data)
-        msg1_data = [0x01, 53, 71, 90, 67, 90, 52, 51]
-        msg1 = can.Message(arbitration_id=0x18EBFF01, extended_id=True, data=msg1_data)
-        msg2_data = [0x02, 68, 49, 51, 83, 56, 49, 50]
-        msg2 = can.Message(arbitration_id=0x18EBFF01, extended_id=True, data=msg2_data)
-        msg3_data = [0x03, 55, 49, 53, 42, 0xFF, 0xFF, 0xFF]
-        msg3 = can.Message(arbitration_id=0x18EBFF01, extended_id=True, data=msg3_data)
+        msg = self.can_bus.wait_for_one_msg(self.clock.get_real_timeout(timeout_s))
+        if msg is None:
+            return
+
+        if responder.dispatch(msg) is None and tp is not None:
+            tp.on_message(msg)
 
-        return [initial_frame_msg, msg1, msg2, msg3]
+    def __wait_for_VIN_code_request(self, max_wait_time_ms):
+        """
+        Wait max. time for one VIN code request message
+        :param max_wait_time_ms:
+        :return:
+        """
+        max_time_s = self.__ms_to_seconds(max_wait_time_ms)
+        msg = self.can_bus.wait_for_matching_msg(self.is_VIN_code_request_msg, max_time_s)
+        if msg is not None:
+            self.__print_msg(msg)
+        return msg
 
     @staticmethod
     def __get_engine_hours_message():
@@ -736,7 +1363,7 @@ class CanSimulator:
         :return:
         """
         msg_data = [0x64, 0x05, 0x01, 0x00, 0x1B, 0xF2, 0x03, 0x00]
-        engine_hours_msg = can.Message(arbitration_id=0x18FEE501, extended_id=True, data=msg_data)
+        engine_hours_msg = j1939.get_message(0x18FEE501, msg_data)
         return engine_hours_msg
 
     def __wait_for_engine_hours_request(self, max_wait_time_ms):
@@ -746,21 +1373,10 @@ class CanSimulator:
         :return:
         """
         max_time_s = self.__ms_to_seconds(max_wait_time_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
-
-        while actual_waiting_time <= max_time_s:
-            # msg = self.can_bus.get_one_msg()
-            msg = self.can_bus.wait_for_one_msg(0.005)
-
-            if msg is not None:
-                if self.is_engine_hours_request_msg(msg):
-                    self.__print_msg(msg)
-                    return msg
-
-            actual_waiting_time = time.time() - start_time
-
-        return None
+        msg = self.can_bus.wait_for_matching_msg(self.is_engine_hours_request_msg, max_time_s)
+        if msg is not None:
+            self.__print_msg(msg)
+        return msg
 
     def __wait_and_reply_engine_hours(self, max_wait_time_ms):
         """
@@ -775,7 +1391,9 @@ class CanSimulator:
             return
 
         # Build and send engine hours message
-        self.__send_one_msg(self.__get_engine_hours_message(), print_msg_flag=True)
+        hours = self.__get_engine_hours_message()
+        self.__expect_response('Engine hours', hours.arbitration_id)
+        self.__send_one_msg(hours, print_msg_flag=True)
 
     def __simulate_rpm_shift(self, rpm_1_value, rpm_1_time_ms, rpm_2_value, rpm_2_time_ms):
         """
@@ -815,112 +1433,60 @@ class CanSimulator:
         """
         timeout_seconds = self.__ms_to_seconds(timeout_ms)
         delay_seconds = self.__ms_to_seconds(delay_ms)
-        start_time = time.time()
-        actual_waiting_time = 0.0
 
         if msg_to_send is not None:
-            while actual_waiting_time <= timeout_seconds:
-                self.__send_one_msg(msg_to_send, print_msg_flag=False)
-                time.sleep(delay_seconds)
-                actual_waiting_time = time.time() - start_time
+            periodic = scheduler.PeriodicScheduler(delay_seconds, PERIODIC_BUSY_WAIT_S)
+            statistics = periodic.run_for(lambda: self.__send_one_msg(msg_to_send, print_msg_flag=False),
+                                          timeout_seconds)
+            statistics.print('Achieved ')
 
     def __send_eld_broadcast_mesages(self, msg_group, print_out=False):
         """
-        Send broadcast ELD messages
+        Send broadcast ELD messages (preallocated frames are patched only when value changes)
         :param msg_group:
         :return:
         """
-        ccvs = self.get_CCVS1_message(msg_group.vehicle_speed)
-        eec1 = self.get_EEC1_message(msg_group.engine_speed)
-        vdhr = self.get_VDHR_message(msg_group.vehicle_distance)
-        self.__send_one_msg(ccvs, print_out)
-        self.__send_one_msg(eec1, print_out)
-        self.__send_one_msg(vdhr, print_out)
+        self.__send_one_msg(self.ccvs_frame.set_value(msg_group.vehicle_speed), print_out)
+        self.__send_one_msg(self.eec1_frame.set_value(msg_group.engine_speed), print_out)
+        self.__send_one_msg(self.vdhr_frame.set_value(msg_group.vehicle_distance), print_out)
 
     @staticmethod
+    @functools.lru_cache(maxsize=frame_cache.FRAME_CACHE_SIZE)
     def get_EEC1_message(rpm_value):
         """
-        Get J1939 EEC1 message with specific RPM value
+        Get J1939 EEC1 message with specific RPM value (messages are cached by value - do not modify them)
         :return:
         """
-        eec1_id = 0xCF00401
-        rpm_lsb = rpm_msb = 0
-
-        try:
-            raw_rpm_value = int(round(rpm_value / 0.125))  # See J1939 std. EEC1 message: 0.125 rpm per bit gain
-            rpm_lsb = raw_rpm_value & 0x00FF
-            rpm_msb = (raw_rpm_value & 0xFF00) >> 8
-        except ValueError:
-            print('Error: Cannot convert physical RPM value into raw value for EEC1 message')
-            return None
-
-        eec1_data = [0x00, 0x00, 0x00, rpm_lsb, rpm_msb, 0x00, 0x00, 0x00]
-        return can.Message(arbitration_id=eec1_id, extended_id=True, data=eec1_data)
+        return frame_cache.EEC1_ENGINE_SPEED.get_message(rpm_value, SIMULATOR_ADDRESS)
 
     @staticmethod
+    @functools.lru_cache(maxsize=frame_cache.FRAME_CACHE_SIZE)
     def get_CCVS1_message(speed_kmh):
         """
-        Get J1939 CCVS message with specific vehicle speed value
+        Get J1939 CCVS message with specific vehicle speed value (messages are cached by value - do not modify them)
         :return:
         """
-        ccvs_id = 0x18FEF101
-        speed_lsb = speed_msb = 0
-
-        try:
-            raw_speed_value = int(round(speed_kmh * 256))  # See J1939 std. CCVS message: 1/256 km/h per bit gain
-            speed_lsb = raw_speed_value & 0x00FF
-            speed_msb = (raw_speed_value & 0xFF00) >> 8
-        except ValueError:
-            print('Error: Cannot convert physical RPM value into raw value for EEC1 message')
-            return None
-
-        ccvs_data = [0x00, speed_lsb, speed_msb, 0x00, 0x00, 0x00, 0x00, 0x00]
-        return can.Message(arbitration_id=ccvs_id, extended_id=True, data=ccvs_data)
+        return frame_cache.CCVS_VEHICLE_SPEED.get_message(speed_kmh, SIMULATOR_ADDRESS)
 
     @staticmethod
+    @functools.lru_cache(maxsize=frame_cache.FRAME_CACHE_SIZE)
     def get_VDHR_message(vehicle_distance_meters):
         """
         Get J1939 VDHR (Vehicle Distance High Resolution) message with specific distance value (in meters)
+        (messages are cached by value - do not modify them)
         :param vehicle_distance:
         :return:
         """
-        vdhr_id = 0x18FEC101
-        byte1 = byte2 = byte3 = byte4 = 0  # byte1 = lsb; byte4 = msb
-
-        try:
-            raw_distance_value = int(round(vehicle_distance_meters / 5))  # See J1939 std. VDHR message: 5m per bit gain
-            byte1 = raw_distance_value & 0x000000FF
-            byte2 = (raw_distance_value & 0x0000FF00) >> 8
-            byte3 = (raw_distance_value & 0x00FF0000) >> 16
-            byte4 = (raw_distance_value & 0xFF000000) >> 24
-        except ValueError:
-            print('Error: Cannot convert physical RPM value into raw value for EEC1 message')
-            return None
-
-        vdhr_data = [byte1, byte2, byte3, byte4, 0x00, 0x00, 0x00, 0x00]
-        return can.Message(arbitration_id=vdhr_id, extended_id=True, data=vdhr_data)
+        return frame_cache.VDHR_DISTANCE.get_message(vehicle_distance_meters, SIMULATOR_ADDRESS)
 
     @staticmethod
+    @functools.lru_cache(maxsize=frame_cache.FRAME_CACHE_SIZE)
     def get_HOURS_message(engine_hours):
         """
-        Get J1939 Engine Hours message with specific hours value
+        Get J1939 Engine Hours message with specific hours value (messages are cached by value - do not modify them)
         :return:
         """
-        hours_id = 0x18FEE501
-        byte1 = byte2 = byte3 = byte4 = 0  # byte1 = lsb; byte4 = msb
-
-        try:
-            raw_hours_value = int(round(engine_hours / 0.05))  # See J1939 std. HOURS message: 0.05 H per bit gain
-            byte1 = raw_hours_value & 0x000000FF
-            byte2 = (raw_hours_value & 0x0000FF00) >> 8
-            byte3 = (raw_hours_value & 0x00FF0000) >> 16
-            byte4 = (raw_hours_value & 0xFF000000) >> 24
-        except ValueError:
-            print('Error: Cannot convert physical RPM value into raw value for EEC1 message')
-            return None
-
-        hours_data = [byte1, byte2, byte3, byte4, 0x00, 0x00, 0x00, 0x00]
-        return can.Message(arbitration_id=hours_id, extended_id=True, data=hours_data)
+        return frame_cache.ENGINE_HOURS.get_message(engine_hours, SIMULATOR_ADDRESS)
 
     def __print_msg(self, msg, received=True):
         """
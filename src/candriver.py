@@ -1,5 +1,30 @@
 
 import can
+import errno
+import selectors
+import socket
+import struct
+import time
+
+from src import j1939
+from src import loopback
+
+CAN_FRAME_FORMAT = '=IB3x8s'  # struct can_frame: can_id, can_dlc, padding, data
+CAN_EFF_FLAG = 0x80000000  # extended (29-bit) frame
+CAN_RTR_FLAG = 0x40000000  # remote transmission request
+CAN_FRAME_SIZE = struct.calcsize(CAN_FRAME_FORMAT)
+ENOBUFS_BACKOFF_S = 0.0005  # wait for free space in interface tx queue
+SO_TIMESTAMP = getattr(socket, 'SO_TIMESTAMP', 29)  # kernel receive timestamp (struct timeval)
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40)  # number of frames dropped by full socket receive queue
+TIMEVAL_FORMAT = '@ll'
+OVERFLOW_FORMAT = '@I'
+RX_ANCILLARY_SIZE = socket.CMSG_SPACE(struct.calcsize(TIMEVAL_FORMAT)) + socket.CMSG_SPACE(
+    struct.calcsize(OVERFLOW_FORMAT))
+RECEIVE_BATCH_SIZE = 256  # max. frames read from socket at once
+
+# Bus backends (see BACKENDS)
+SOCKETCAN = 'socketcan'
+LOOPBACK = 'loopback'
 
 
 class CanDriver:
@@ -9,43 +34,478 @@ class CanDriver:
     - close Socket can interface
     - wait for one can message (with timeout)
     - wait for multiple can messages (with timeout)
+    - wait for one matching can message (event driven, exact timeout)
     - send one can message
-    - send list of messages (no delays)
+    - send list of messages (no delays, batch with tx queue backpressure handling)
     - send list of messages (with delays)
+    - send periodic messages by kernel (SocketCAN Broadcast Manager)
+    - receive only wanted PGNs (kernel CAN_RAW_FILTER)
+    - receive raw frames by batches with kernel timestamps and socket overrun counter (for recording)
+    - kernel receive timestamps of messages converted to monotonic clock (response latency measurement)
+    - bus is opened by backend (SocketCAN or in-process loopback bus, see BACKENDS), features of can socket are
+      emulated or reported as not available on buses without socket
     """
 
-    def __init__(self, can_channel):
+    def __init__(self, can_channel, backend=None):
+        """
+        :param can_channel: can interface name
+        :param backend: name of backend in BACKENDS (None = selected by channel name, see get_backend())
+        """
         self.channel = can_channel
+        self.backend = backend if backend is not None else get_backend(can_channel)
         self.msg = can.Message()
+        self.periodic_tasks = []
+        self.selector = None
+        self.enobufs_count = 0
+        self.received_count = 0
+        self.filter_pgns = None
+        self.rx_overflow_count = 0
+        self.last_rx_time = None
+        self.last_tx_time = None
+        self.__filter_start_rx_packets = None
+        self.__filter_start_tx_packets = None
+        self.__filter_start_received = 0
 
+        self.bus = None
+        open_bus = BACKENDS.get(self.backend)
+        if open_bus is None:
+            print('Error: Unknown can backend \'{0}\'!\nBus is not initialized!'.format(self.backend))
+            return
         try:
-            self.bus = can.interface.Bus(channel=can_channel, bustype='socketcan_native')
-        except OSError:
-            self.bus = None
-            print('Error: No SocketCan device found!\nBus is not initialized!')
+            self.bus = open_bus(can_channel)
+        except (OSError, can.CanError) as e:
+            print('Error: Cannot open can interface {0} ({1}): {2}\nBus is not initialized!'.format(
+                can_channel, self.backend, e))
+            return
+        if getattr(self.bus, 'socket', None) is not None:
+            self.enable_rx_timestamps()
+
+    def is_open(self):
+        """
+        Check if bus was opened
+        :return: bool
+        """
+        return self.bus is not None
 
     def wait_for_one_msg(self, max_timeout_seconds):
         """
         Wait for one can message
         :return: can message
         """
-        msg = self.bus.recv(max_timeout_seconds)
+        msg = self.__recv(max_timeout_seconds)
         #assert isinstance(msg, can.Message)
         return msg
 
+    def wait_for_matching_msg(self, match_function, max_timeout_seconds):
+        """
+        Wait for one can message accepted by 'match_function'
+        - process sleeps in selector until frame arrives or deadline expires (no polling)
+        - deadline is computed once from monotonic clock, so timeout is exact regardless of traffic
+        :param match_function: function(msg) returning True for wanted message
+        :param max_timeout_seconds: max. waiting time [s]
+        :return: can message or None on timeout
+        """
+        deadline = time.monotonic() + max_timeout_seconds
+        selector = self.__get_selector()
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            if selector is None:
+                msg = self.__recv(remaining)
+            elif selector.select(remaining):
+                msg = self.__recv(0.0)
+            else:
+                return None
+
+            if msg is not None and match_function(msg):
+                return msg
+
+    def __get_selector(self):
+        """
+        Get selector registered on can socket
+        :return: selector or None when bus has no socket to wait on
+        """
+        if self.selector is None:
+            can_socket = getattr(self.bus, 'socket', None)
+            if can_socket is None:
+                return None
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(can_socket, selectors.EVENT_READ)
+        return self.selector
+
+    def __recv(self, timeout_seconds):
+        """
+        Receive one message from bus and count it
+        - kernel receive timestamp of message is kept in 'last_rx_time' (monotonic clock)
+        :param timeout_seconds:
+        :return: can message or None
+        """
+        msg = self.bus.recv(timeout_seconds)
+        if msg is not None:
+            self.received_count += 1
+            self.last_rx_time = get_monotonic_time(msg.timestamp)
+        return msg
+
+    def set_pgn_filters(self, pgns):
+        """
+        Install kernel receive filters (CAN_RAW_FILTER) - only frames with specified PGNs are passed to simulator
+        :param pgns: list of PGNs or None to receive all frames
+        :return:
+        """
+        if pgns is None:
+            filters = None
+        else:
+            filters = [{'can_id': pgn << 8, 'can_mask': get_pgn_mask(pgn), 'extended': True} for pgn in pgns]
+
+        try:
+            self.bus.set_filters(filters)
+        except (NotImplementedError, OSError, can.CanError) as e:
+            print('Error: Cannot set kernel receive filters: {0}'.format(e))
+            return
+
+        self.filter_pgns = pgns
+        self.__filter_start_rx_packets = self.__get_interface_statistic('rx_packets')
+        self.__filter_start_tx_packets = self.__get_interface_statistic('tx_packets')
+        self.__filter_start_received = self.received_count
+
+    def get_filtered_out_count(self):
+        """
+        Number of frames received by interface but dropped by kernel filters (never woke up simulator)
+        - interface rx statistics count also frames sent by simulator (vcan, local loopback of can interface), so
+          frames sent since filters were installed are subtracted
+        :return: int or None when interface statistics are not available
+        """
+        rx_packets = self.__get_interface_statistic('rx_packets')
+        tx_packets = self.__get_interface_statistic('tx_packets')
+        if rx_packets is None or tx_packets is None or self.__filter_start_rx_packets is None \
+                or self.__filter_start_tx_packets is None:
+            return None
+        interface_frames = (rx_packets - self.__filter_start_rx_packets) - (tx_packets - self.__filter_start_tx_packets)
+        return max(interface_frames - (self.received_count - self.__filter_start_received), 0)
+
+    def __get_interface_statistic(self, name):
+        """
+        Read frame counter from interface statistics
+        :param name: 'rx_packets' or 'tx_packets'
+        :return: int or None
+        """
+        try:
+            with open('/sys/class/net/{0}/statistics/{1}'.format(self.channel, name)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def enable_rx_timestamps(self, receive_buffer_size=None):
+        """
+        Request kernel receive timestamps (SO_TIMESTAMP) and socket overrun counter (SO_RXQ_OVFL)
+        :param receive_buffer_size: size of socket receive buffer [bytes] (None = keep system default)
+        :return: True when options are set
+        """
+        can_socket = getattr(self.bus, 'socket', None)
+        if can_socket is None:
+            print('Error: No socket for can device available!')
+            return False
+
+        try:
+            can_socket.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMP, 1)
+            can_socket.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            if receive_buffer_size is not None:
+                can_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_size)
+        except OSError as e:
+            print('Error: Cannot enable receive timestamps: {0}'.format(e))
+            return False
+        return True
+
+    def receive_raw_frames(self, max_timeout_seconds, max_frames=RECEIVE_BATCH_SIZE):
+        """
+        Wait max. time for frames and read all frames waiting in socket (no can.Message objects are created)
+        - see enable_rx_timestamps(), frames dropped by full socket queue are counted in 'rx_overflow_count'
+        :param max_timeout_seconds: max. waiting time [s] for first frame
+        :param max_frames: max. number of frames returned
+        :return: list of (kernel receive timestamp [s], 'struct can_frame' bytes)
+        """
+        selector = self.__get_selector()
+        if selector is None:
+            return self.__receive_bus_frames(max_timeout_seconds, max_frames)
+        if not selector.select(max_timeout_seconds):
+            return []
+
+        can_socket = self.bus.socket
+        frames = []
+        while len(frames) < max_frames:
+            try:
+                raw_frame, ancdata, _, _ = can_socket.recvmsg(CAN_FRAME_SIZE, RX_ANCILLARY_SIZE, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                print('Error: Cannot receive can frame: {0}'.format(e))
+                break
+            frames.append((self.__get_ancillary_timestamp(ancdata), raw_frame))
+
+        self.received_count += len(frames)
+        return frames
+
+    def __receive_bus_frames(self, max_timeout_seconds, max_frames):
+        """
+        Receive frames from bus without socket (e.g. loopback bus) and convert them into raw frames
+        :param max_timeout_seconds: max. waiting time [s] for first frame
+        :param max_frames: max. number of frames returned
+        :return: list of (receive timestamp [s], 'struct can_frame' bytes)
+        """
+        frames = []
+        msg = self.__recv(max_timeout_seconds)
+        while msg is not None:
+            frames.append((msg.timestamp or time.time(), get_raw_frame(msg)))
+            if len(frames) >= max_frames:
+                break
+            msg = self.__recv(0.0)
+        return frames
+
+    def __get_ancillary_timestamp(self, ancdata):
+        """
+        Get kernel receive timestamp from ancillary data and update socket overrun counter
+        :param ancdata: ancillary data returned by recvmsg()
+        :return: timestamp [s] (system time when kernel timestamp is not available)
+        """
+        timestamp = None
+        for level, cmsg_type, cmsg_data in ancdata:
+            if level != socket.SOL_SOCKET:
+                continue
+            if cmsg_type == SO_TIMESTAMP:
+                seconds, microseconds = struct.unpack_from(TIMEVAL_FORMAT, cmsg_data)
+                timestamp = seconds + microseconds / 1000000.0
+            elif cmsg_type == SO_RXQ_OVFL:
+                self.rx_overflow_count = struct.unpack_from(OVERFLOW_FORMAT, cmsg_data)[0]
+        if timestamp is None:
+            timestamp = time.time()
+        return timestamp
+
+    def get_response_time(self, tx_time=None):
+        """
+        Time between sent message and kernel receive timestamp of last received message
+        :param tx_time: monotonic time of sent message ('last_tx_time' read after sending), None = last sent message
+        :return: time [s] or None when nothing was sent or received yet
+        """
+        if tx_time is None:
+            tx_time = self.last_tx_time
+        if self.last_rx_time is None or tx_time is None:
+            return None
+        return self.last_rx_time - tx_time
+
     def get_one_msg(self):
         """
         Get actual message from can-bus
         :return:
         """
-        msg = self.bus.recv(0.0)
+        msg = self.__recv(0.0)
         return msg
 
     def send_one_msg(self, can_msg):
         """
-        Send one can message
+        Send one can message (time when message was queued is kept in 'last_tx_time', monotonic clock)
         :param can_msg: can message to send
         :return: True if msg was sent successfully
         """
         assert isinstance(can_msg, can.Message)
         self.bus.send(can_msg)
+        self.last_tx_time = time.monotonic()
+
+    def send_batch(self, can_msgs, max_block_seconds=1.0):
+        """
+        Send list of messages without delays
+        :param can_msgs: list of can messages
+        :param max_block_seconds: max. time [s] to wait for free space in full tx queue (ENOBUFS)
+        :return: number of queued messages
+        """
+        return self.send_raw_batch(get_raw_frames(can_msgs), max_block_seconds)
+
+    def send_raw_batch(self, raw_frames, max_block_seconds=1.0):
+        """
+        Send list of preconverted frames (see get_raw_frames()) in tight loop directly to can socket
+        - full interface tx queue (ENOBUFS) is handled by short back-off instead of dropping frames
+        :param raw_frames: list of 'struct can_frame' bytes
+        :param max_block_seconds: max. time [s] to wait for free space in full tx queue
+        :return: number of queued frames
+        """
+        can_socket = getattr(self.bus, 'socket', None)
+        if can_socket is not None:
+            send = can_socket.send
+        elif self.bus is not None:
+            def send(raw_frame):
+                self.bus.send(get_msg_from_raw_frame(raw_frame))
+        else:
+            print('Error: No socket for can device available!')
+            return 0
+
+        queued = 0
+        block_deadline = None
+        for raw_frame in raw_frames:
+            while True:
+                try:
+                    send(raw_frame)
+                    break
+                except OSError as e:
+                    if e.errno not in (errno.ENOBUFS, errno.EAGAIN):
+                        print('Error: Cannot send can frame: {0}'.format(e))
+                        return queued
+                    self.enobufs_count += 1
+                    now = time.monotonic()
+                    if block_deadline is None:
+                        block_deadline = now + max_block_seconds
+                    elif now >= block_deadline:
+                        print('Error: Can tx queue is full for {0} seconds, {1} frames queued'.format(
+                            max_block_seconds, queued))
+                        return queued
+                    time.sleep(ENOBUFS_BACKOFF_S)
+            queued += 1
+            block_deadline = None
+        if queued > 0:
+            self.last_tx_time = time.monotonic()
+        return queued
+
+    def start_periodic_msg(self, can_msg, period_s):
+        """
+        Hand periodic message over to kernel (SocketCAN Broadcast Manager) - timing does not depend on Python
+        :param can_msg: can message to send periodically
+        :param period_s: period [s]
+        :return: periodic task or None when kernel cyclic transmission is not supported
+        """
+        assert isinstance(can_msg, can.Message)
+        try:
+            task = self.bus.send_periodic(can_msg, period_s)
+        except (NotImplementedError, OSError, can.CanError) as e:
+            print('Error: Cannot start periodic message {0:X} in kernel: {1}'.format(can_msg.arbitration_id, e))
+            return None
+
+        self.periodic_tasks.append(task)
+        return task
+
+    @staticmethod
+    def modify_periodic_msg(task, can_msg):
+        """
+        Update payload of periodic message already running in kernel
+        :param task: periodic task returned by start_periodic_msg()
+        :param can_msg: can message with new data (the same arbitration ID)
+        :return:
+        """
+        assert isinstance(can_msg, can.Message)
+        task.modify_data(can_msg)
+
+    def stop_periodic_msg(self, task):
+        """
+        Stop one periodic message in kernel
+        :param task: periodic task returned by start_periodic_msg()
+        :return:
+        """
+        task.stop()
+        if task in self.periodic_tasks:
+            self.periodic_tasks.remove(task)
+
+    def stop_all_periodic_msgs(self):
+        """
+        Stop all periodic messages started by this driver
+        :return:
+        """
+        for task in self.periodic_tasks:
+            if task is not None:
+                task.stop()
+        self.periodic_tasks = []
+
+
+def get_monotonic_time(timestamp):
+    """
+    Convert kernel receive timestamp (system clock) into monotonic clock
+    :param timestamp: system time [s] (0 or None when kernel timestamp is not available)
+    :return: monotonic time [s]
+    """
+    monotonic_now = time.monotonic()
+    if not timestamp:
+        return monotonic_now
+    return timestamp - (time.time() - monotonic_now)
+
+
+def get_raw_frame(can_msg):
+    """
+    Convert can message into SocketCAN 'struct can_frame' bytes
+    :param can_msg: can message
+    :return: bytes
+    """
+    can_id = can_msg.arbitration_id
+    if getattr(can_msg, 'is_extended_id', getattr(can_msg, 'id_type', True)):
+        can_id |= CAN_EFF_FLAG
+    if getattr(can_msg, 'is_remote_frame', False):
+        can_id |= CAN_RTR_FLAG
+    data = bytes(can_msg.data)
+    return struct.pack(CAN_FRAME_FORMAT, can_id, len(data), data.ljust(8, b'\x00'))
+
+
+def get_msg_from_raw_frame(raw_frame):
+    """
+    Convert SocketCAN 'struct can_frame' bytes into can message
+    :param raw_frame: bytes
+    :return: can message
+    """
+    can_id, dlc, data = struct.unpack(CAN_FRAME_FORMAT, raw_frame[:CAN_FRAME_SIZE])
+    msg = j1939.get_message(can_id & 0x1FFFFFFF, data[:dlc])
+    if not can_id & CAN_EFF_FLAG:
+        msg.is_extended_id = False
+        msg.arbitration_id = can_id & 0x7FF
+    msg.is_remote_frame = bool(can_id & CAN_RTR_FLAG)
+    return msg
+
+
+def get_raw_frames(can_msgs):
+    """
+    Convert list of can messages into list of SocketCAN frames (see send_raw_batch())
+    :param can_msgs: list of can messages
+    :return: list of bytes
+    """
+    return [get_raw_frame(can_msg) for can_msg in can_msgs]
+
+
+def get_pgn_mask(pgn):
+    """
+    Get arbitration ID mask for kernel filter of PGN (destination address of PDU1 PGN is not filtered)
+    :param pgn:
+    :return: int
+    """
+    if ((pgn >> 8) & 0xFF) < j1939.PDU2_MIN_FORMAT:
+        return 0x03FF0000
+    return 0x03FFFF00
+
+
+def open_socketcan_bus(channel):
+    """
+    Open SocketCAN interface by python-can
+    :param channel: can interface name
+    :return: can bus
+    """
+    return can.interface.Bus(channel=channel, bustype='socketcan_native')
+
+
+# Backend name -> function(channel) returning opened bus (see register_backend())
+BACKENDS = {SOCKETCAN: open_socketcan_bus, LOOPBACK: loopback.open_bus}
+
+
+def register_backend(name, open_function):
+    """
+    Add bus backend (e.g. other python-can interface)
+    :param name: backend name used by CanDriver
+    :param open_function: function(channel) returning bus with python-can interface (send, recv, set_filters, ...)
+    :return:
+    """
+    BACKENDS[name] = open_function
+
+
+def get_backend(channel):
+    """
+    Get default backend of channel ('loop0', 'loop1', ... are in-process loopback buses)
+    :param channel: can interface name
+    :return: backend name
+    """
+    if channel.startswith(loopback.LOOPBACK_PREFIX):
+        return LOOPBACK
+    return SOCKETCAN
@@ -0,0 +1,286 @@
+import time
+
+from src import frame_cache
+from src import j1939
+from src import transport
+
+"""
+Simulation of several J1939 ECUs (virtual nodes) in one process
+- every ECU has its own source address, NAME, broadcast messages and request responders
+- all ECUs share one receive loop and one transmit scheduler (no process or thread per ECU)
+- received frames are routed by destination address (frames for global address are passed to all ECUs)
+- frames sent by one virtual ECU are not delivered to the other virtual ECUs (socket does not receive own frames)
+"""
+
+MSG_PRIORITY = 6
+BROADCAST_STAGGER_S = 0.001  # first cycles of broadcasts are shifted by 1ms per ECU (no burst of all ECUs at once)
+
+# J1939-81 NAME function codes of simulated truck ECUs
+FUNCTION_ENGINE = 0
+FUNCTION_TRANSMISSION = 3
+FUNCTION_BRAKES = 9
+FUNCTION_INSTRUMENT_CLUSTER = 29
+
+
+class VirtualEcu:
+    """
+    One simulated J1939 node
+    - broadcasts: preallocated frames sent with their own cycle times (signal frames are patched in place)
+    - responders: requested PGN -> signal frame or data bytes (payload > 8 bytes is sent by transport protocol)
+    - 'Address Claim' is sent at start and on request; when other node claims the same address with higher priority
+      (lower NAME), ECU sends 'Cannot claim address' and stops all transmissions
+    """
+
+    def __init__(self, name, source_address, name_bytes):
+        """
+        :param name: ECU name used in statistics (e.g. 'Engine')
+        :param source_address: J1939 source address
+        :param name_bytes: 8 bytes of J1939 NAME (see j1939.get_name())
+        """
+        self.name = name
+        self.source_address = source_address
+        self.name_bytes = name_bytes
+        self.broadcasts = []  # (job name, can message, period [s])
+        self.signal_frames = {}  # signal name -> frame_cache.SignalFrame
+        self.responder = j1939.RequestResponder()
+        self.responder.register(j1939.PGN_ADDRESS_CLAIM, lambda request_msg: self.claim_address())
+        self.tp = None
+        self.send_function = None
+        self.address_lost = False
+        self.nmb_sent = 0
+
+    def add_signal_broadcast(self, signal, period_s, value=0):
+        """
+        Broadcast signal periodically
+        :param signal: frame_cache.SignalDefinition
+        :param period_s: cycle time [s]
+        :param value: initial physical value
+        :return: frame_cache.SignalFrame
+        """
+        frame = self.__add_signal_frame(signal, value)
+        self.broadcasts.append((signal.name, frame.msg, period_s))
+        return frame
+
+    def add_broadcast(self, job_name, pgn, data, period_s, priority=MSG_PRIORITY):
+        """
+        Broadcast message with constant payload periodically
+        :param job_name: name used in statistics
+        :param pgn:
+        :param data: list of bytes
+        :param period_s: cycle time [s]
+        :param priority:
+        :return: can message
+        """
+        msg = j1939.get_message(j1939.get_arbitration_id(priority, pgn, self.source_address), data)
+        self.broadcasts.append((job_name, msg, period_s))
+        return msg
+
+    def add_signal_response(self, signal, value=0):
+        """
+        Respond to request of signal PGN by signal frame
+        :param signal: frame_cache.SignalDefinition
+        :param value: initial physical value
+        :return: frame_cache.SignalFrame
+        """
+        frame = self.__add_signal_frame(signal, value)
+        self.responder.register(signal.pgn, lambda request_msg: self.send(frame.msg))
+        return frame
+
+    def add_data_response(self, pgn, data, priority=MSG_PRIORITY):
+        """
+        Respond to request of PGN by constant payload (BAM for global request, RTS/CTS to requester otherwise)
+        :param pgn:
+        :param data: list of bytes
+        :param priority: priority of single frame response
+        :return:
+        """
+        if len(data) <= 8:
+            msg = j1939.get_message(j1939.get_arbitration_id(priority, pgn, self.source_address), data)
+            self.responder.register(pgn, lambda request_msg: self.send(msg))
+            return
+
+        def send_multi_frame(request_msg):
+            destination = j1939.GLOBAL_ADDRESS
+            if j1939.get_destination_address(request_msg.arbitration_id) == self.source_address:
+                destination = j1939.get_source_address(request_msg.arbitration_id)
+            if not self.address_lost:
+                self.tp.send(pgn, data, destination)
+
+        self.responder.register(pgn, send_multi_frame)
+
+    def set_signal(self, signal_name, value):
+        """
+        Set value of broadcast or response signal (nothing happens when ECU has no such signal)
+        :param signal_name: name of frame_cache.SignalDefinition
+        :param value: physical value
+        :return:
+        """
+        frame = self.signal_frames.get(signal_name)
+        if frame is not None:
+            frame.set_value(value)
+
+    def start(self, send_function, schedule_function, packet_gap_s=0.050, clock=time.monotonic):
+        """
+        Connect ECU to can-bus
+        :param send_function: function(can_msg) sending one frame
+        :param schedule_function: function(delay_s, action) used by transport protocol
+        :param packet_gap_s: gap between TP data packets [s]
+        :param clock: clock of scheduler behind 'schedule_function'
+        :return:
+        """
+        self.send_function = send_function
+        self.tp = transport.TransportProtocol(self.send, self.source_address, schedule_function, packet_gap_s,
+                                              clock=clock)
+
+    def send(self, msg):
+        """
+        Send frame (nothing is sent after address was lost)
+        :param msg: can message
+        :return:
+        """
+        if self.address_lost:
+            return
+        self.send_function(msg)
+        self.nmb_sent += 1
+
+    def claim_address(self):
+        """
+        Send 'Address Claim' ('Cannot claim address' when address was lost)
+        :return:
+        """
+        if self.address_lost:
+            self.send_function(j1939.get_addr_claim_message(self.name_bytes, j1939.NULL_ADDRESS))
+        else:
+            self.send(j1939.get_addr_claim_message(self.name_bytes, self.source_address))
+
+    def on_message(self, msg):
+        """
+        Process received frame (address claims, transport protocol, requests)
+        :param msg: can message
+        :return: True if ECU processed the frame
+        """
+        if j1939.is_addr_claim_msg(msg.arbitration_id):
+            return self.__on_addr_claim(msg)
+        if self.tp is not None and self.tp.on_message(msg):
+            return True
+        return self.responder.dispatch(msg) is not None
+
+    def __on_addr_claim(self, msg):
+        if j1939.get_source_address(msg.arbitration_id) != self.source_address or self.address_lost:
+            return False
+
+        if j1939.get_name_value(msg.data) < j1939.get_name_value(self.name_bytes):
+            print('{0}: address {1:02X} lost to node with higher priority NAME'.format(self.name, self.source_address))
+            self.address_lost = True
+        self.claim_address()
+        return True
+
+    def __add_signal_frame(self, signal, value):
+        frame = frame_cache.SignalFrame(signal, self.source_address)
+        frame.set_value(value)
+        self.signal_frames[signal.name] = frame
+        return frame
+
+
+class EcuNetwork:
+    """
+    Set of virtual ECUs served from one receive loop and one CyclicScheduler
+    """
+
+    def __init__(self):
+        self.ecus = []
+        self.ecus_by_address = {}
+
+    def add_ecu(self, ecu):
+        """
+        Add ECU into network
+        :param ecu: VirtualEcu
+        :return: ecu or None when its source address is already used
+        """
+        if ecu.source_address in self.ecus_by_address:
+            print('Error: Address {0:02X} of ECU {1} is already used by ECU {2}!'.format(
+                ecu.source_address, ecu.name, self.ecus_by_address[ecu.source_address].name))
+            return None
+
+        self.ecus.append(ecu)
+        self.ecus_by_address[ecu.source_address] = ecu
+        return ecu
+
+    def set_signal(self, signal_name, value):
+        """
+        Set signal value in all ECUs which send the signal
+        :param signal_name: name of frame_cache.SignalDefinition
+        :param value: physical value
+        :return:
+        """
+        for ecu in self.ecus:
+            ecu.set_signal(signal_name, value)
+
+    def start(self, cyclic, send_function, packet_gap_s=0.050):
+        """
+        Claim addresses of all ECUs and add their broadcasts into scheduler
+        :param cyclic: scheduler.CyclicScheduler
+        :param send_function: function(can_msg) sending one frame
+        :param packet_gap_s: gap between TP data packets [s]
+        :return:
+        """
+        for index, ecu in enumerate(self.ecus):
+            ecu.start(send_function, cyclic.add_one_shot, packet_gap_s, cyclic.clock)
+            ecu.claim_address()
+            for job_name, msg, period_s in ecu.broadcasts:
+                cyclic.add_periodic('{0} {1}'.format(ecu.name, job_name), period_s,
+                                    lambda sender=ecu, frame=msg: sender.send(frame),
+                                    offset_s=(index * BROADCAST_STAGGER_S) % period_s)
+
+    def dispatch(self, msg):
+        """
+        Route received frame to ECUs by its destination address
+        :param msg: can message
+        :return: number of ECUs which processed the frame
+        """
+        destination = j1939.get_destination_address(msg.arbitration_id)
+        if destination == j1939.GLOBAL_ADDRESS:
+            ecus = self.ecus
+        else:
+            ecu = self.ecus_by_address.get(destination)
+            ecus = [ecu] if ecu is not None else []
+        return sum(1 for ecu in ecus if ecu.on_message(msg))
+
+    def print_statistics(self):
+        for ecu in self.ecus:
+            print('{0} ({1:02X}): sent frames: {2}{3}'.format(ecu.name, ecu.source_address, ecu.nmb_sent,
+                                                             '; address lost' if ecu.address_lost else ''))
+
+
+def get_truck_network(vin_code):
+    """
+    Get network of typical truck ECUs
+    - Engine (00): EEC1 20ms, Engine hours and VIN code on request
+    - Transmission (03): ETC1 10ms, ETC2 100ms
+    - Brakes (0B): EBC1 100ms
+    - Instrument cluster (17): CCVS 100ms, VDHR 1s, Dash display 1s
+    :param vin_code: VIN code bytes
+    :return: EcuNetwork
+    """
+    network = EcuNetwork()
+
+    engine = network.add_ecu(VirtualEcu('Engine', 0x00, j1939.get_name(0x1001, FUNCTION_ENGINE, industry_group=1)))
+    engine.add_signal_broadcast(frame_cache.EEC1_ENGINE_SPEED, 0.020)
+    engine.add_signal_response(frame_cache.ENGINE_HOURS)
+    engine.add_data_response(j1939.PGN_VIN, vin_code)
+
+    transmission = network.add_ecu(VirtualEcu('Transmission', 0x03, j1939.get_name(0x1002, FUNCTION_TRANSMISSION,
+                                                                                   industry_group=1)))
+    transmission.add_broadcast('ETC1', j1939.PGN_ETC1, [0xF0, 0x00, 0x00, 0xFF, 0xF0, 0x00, 0x00, 0xFF], 0.010,
+                               priority=3)
+    transmission.add_broadcast('ETC2', j1939.PGN_ETC2, [0x7D, 0x00, 0x01, 0x7D, 0x20, 0x4E, 0xFF, 0xFF], 0.100)
+
+    brakes = network.add_ecu(VirtualEcu('Brakes', 0x0B, j1939.get_name(0x1003, FUNCTION_BRAKES, industry_group=1)))
+    brakes.add_broadcast('EBC1', j1939.PGN_EBC1, [0xC0, 0xFF, 0x00, 0xFF, 0xFF, 0x00, 0xFF, 0xFF], 0.100)
+
+    cluster = network.add_ecu(VirtualEcu('Instrument cluster', 0x17, j1939.get_name(
+        0x1004, FUNCTION_INSTRUMENT_CLUSTER, industry_group=1)))
+    cluster.add_signal_broadcast(frame_cache.CCVS_VEHICLE_SPEED, 0.100)
+    cluster.add_signal_broadcast(frame_cache.VDHR_DISTANCE, 1.000)
+    cluster.add_broadcast('DD', j1939.PGN_DASH_DISPLAY, [0xFF, 0xC8, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF], 1.000)
+    return network
@@ -8,6 +8,7 @@ class ELD_msg_group:
       - engine hours
       - VIN code
       - duration of this stage [s]
+      - signal profiles (value changes during stage, see signal_profile module)
     """
 
     def __init__(self, description="", speed=0, distance=0, engine_speed=0, engine_hours=0, vin=None, duration=0):
@@ -18,8 +19,11 @@ class ELD_msg_group:
         self.engine_hours = engine_hours
         self.vin_code = vin
         self.duration = duration
+        self.profiles = {}  # 'speed' / 'engine_rpm' -> signal_profile.SignalProfile
 
     def print(self):
         print("Simulation step: {0}\nspeed={1};distance={2};engine_rpm={3};engine_hours={4};vin={5}\nduration={6}"
               .format(self.description, self.vehicle_speed, self.vehicle_distance, self.engine_speed, self.engine_hours,
                       self.vin_code, self.duration))
+        for name, profile in self.profiles.items():
+            print("{0} profile: {1}{2}".format(name, profile.kind, profile.parameters))
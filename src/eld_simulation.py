@@ -1,5 +1,6 @@
 
 
+from src import signal_profile
 from src.eld_msg_group import ELD_msg_group
 
 
@@ -13,6 +14,7 @@ class ELD_simulation:
             - vehicle distance:         VHDR (0xFEC1)
             - engine hours response:    HOURS (0xFEE5)
             - VIN code response:        VI (0xFEEC)
+    - speed and engine_rpm can be given as profiles, e.g. 'speed=ramp(0,80)' (see signal_profile module)
     """
 
     def __init__(self, simulation_file):
@@ -33,9 +35,9 @@ class ELD_simulation:
                     eld_msg_group.description = self.__get_description(line)
                 elif line.startswith('speed'):
                     # Normal line: parsing signal values for J1939 messages
-                    eld_msg_group.vehicle_speed = self.__get_int_value_from_line(line, 'speed')
+                    eld_msg_group.vehicle_speed = self.__get_signal_value_from_line(line, 'speed', eld_msg_group)
                     eld_msg_group.vehicle_distance = self.__get_int_value_from_line(line, 'distance')
-                    eld_msg_group.engine_speed = self.__get_int_value_from_line(line, 'engine_rpm')
+                    eld_msg_group.engine_speed = self.__get_signal_value_from_line(line, 'engine_rpm', eld_msg_group)
                     eld_msg_group.engine_hours = self.__get_engine_hours_from_line(line)
                 elif line.startswith('duration'):
                     eld_msg_group.duration = self.__get_duration_from_line(line)
@@ -87,11 +89,32 @@ class ELD_simulation:
         :return:
         """
         # TODO: catch exceptions
+        return int(self.__get_value_str_from_line(line, value))
+
+    def __get_signal_value_from_line(self, line, value, msg_group):
+        """
+        Get speed or engine_rpm value from line - profile is stored into message group and its start value is returned
+        :param line: line to be parsed
+        :param value: value is speed | engine_rpm
+        :param msg_group: ELD_msg_group
+        :return: int
+        """
+        value_str = self.__get_value_str_from_line(line, value)
+        if not signal_profile.is_profile(value_str):
+            return int(value_str)
+
+        profile = signal_profile.parse_profile(value_str)
+        if profile is None:
+            return 0
+        msg_group.profiles[value] = profile
+        return int(round(profile.get_start_value()))
+
+    @staticmethod
+    def __get_value_str_from_line(line, value):
         value_str = line.split(value)[1]
         if value_str.startswith('='):
             value_str = value_str[1:]
-        value_str = value_str.split(';')[0]
-        return int(value_str)
+        return value_str.split(';')[0]
 
     def __get_engine_hours_from_line(self, line):
         """
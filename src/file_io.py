@@ -1,6 +1,9 @@
-import can
+import mmap
+import os
+import struct
 
-from copy import deepcopy
+from src import candriver
+from src import j1939
 
 """
 Helper methods to work with file(s)
@@ -30,24 +33,27 @@ def read_messages_from_file(file_name):
     :param file_name: text file where all messages are specified
     :return: list of MsgGroup
     """
-    file_lines = None
-    with open(file_name) as f:
-        file_lines = f.readlines()
+    return list(iter_messages_from_file(file_name))
+
 
-    msg_group_list = []
+def iter_messages_from_file(file_name):
+    """
+    Read messages specified in text file lazily - MsgGroup is yielded as soon as its delay line is read
+    (memory use does not depend on file size, first group can be sent before the rest of file is read)
+    :param file_name: text file where all messages are specified
+    :return: generator of MsgGroup
+    """
     msg_group = MsgGroup()
 
-    if file_lines is not None:
-        for line in file_lines:
+    with open(file_name) as f:
+        for line in f:
             if is_msg_line(line):
                 msg_group.messages.append(get_msg_from_line(line))
 
             if is_delay_line(line):
                 msg_group.delay = get_delay_from_line(line)
-                msg_group_list.append(deepcopy(msg_group))
-                msg_group.clean()
-
-    return msg_group_list
+                yield msg_group
+                msg_group = MsgGroup()
 
 
 def is_msg_line(line):
@@ -82,7 +88,7 @@ def get_msg_from_line(line):
         print('Line: ', line)
         print('Cannot cast to int!')
 
-    msg = can.Message(extended_id=True, arbitration_id=msgid_int, data=data_list_int)
+    msg = j1939.get_message(msgid_int, data_list_int)
     return msg
 
 
@@ -99,3 +105,64 @@ def get_delay_from_line(line):
     except ValueError:
         print('Error: When parsing *.txt file delay line!')
         return 0
+
+
+# Compiled (binary) messages file: header + fixed size records
+# record = relative timestamp [us] (uint64) + SocketCAN 'struct can_frame' (ID, DLC, 8 data bytes)
+COMPILED_MAGIC = b'CANSIM01'
+COMPILED_HEADER_FORMAT = '<8sI'  # magic, record size
+COMPILED_TIMESTAMP_FORMAT = '<Q'
+COMPILED_HEADER_SIZE = struct.calcsize(COMPILED_HEADER_FORMAT)
+COMPILED_TIMESTAMP_SIZE = struct.calcsize(COMPILED_TIMESTAMP_FORMAT)
+COMPILED_RECORD_SIZE = COMPILED_TIMESTAMP_SIZE + struct.calcsize(candriver.CAN_FRAME_FORMAT)
+
+
+def compile_messages_file(file_name, compiled_file_name):
+    """
+    Compile messages text file into binary file with fixed size records (no text parsing when replaying)
+    - messages of one group have the same timestamp, delay line moves timestamp of next group
+    :param file_name: messages text file
+    :param compiled_file_name: output binary file
+    :return: number of compiled messages
+    """
+    timestamp_us = 0
+    nmb_msgs = 0
+
+    with open(compiled_file_name, 'wb') as f:
+        f.write(struct.pack(COMPILED_HEADER_FORMAT, COMPILED_MAGIC, COMPILED_RECORD_SIZE))
+        for msg_group in iter_messages_from_file(file_name):
+            timestamp = struct.pack(COMPILED_TIMESTAMP_FORMAT, timestamp_us)
+            for msg in msg_group.messages:
+                f.write(timestamp + candriver.get_raw_frame(msg))
+                nmb_msgs += 1
+            timestamp_us += msg_group.delay * 1000
+
+    return nmb_msgs
+
+
+def iter_compiled_frames(compiled_file_name):
+    """
+    Read compiled messages file via mmap
+    :param compiled_file_name: binary file created by compile_messages_file()
+    :return: generator of (relative timestamp [us], SocketCAN frame bytes)
+    """
+    with open(compiled_file_name, 'rb') as f:
+        header = f.read(COMPILED_HEADER_SIZE)
+        if len(header) < COMPILED_HEADER_SIZE:
+            print('Error: \'{0}\' is not compiled messages file!'.format(compiled_file_name))
+            return
+        magic, record_size = struct.unpack(COMPILED_HEADER_FORMAT, header)
+        if magic != COMPILED_MAGIC or record_size != COMPILED_RECORD_SIZE:
+            print('Error: \'{0}\' is not compiled messages file (or has unsupported version)!'.format(
+                compiled_file_name))
+            return
+
+        if os.fstat(f.fileno()).st_size == COMPILED_HEADER_SIZE:
+            return  # empty file cannot be mapped
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            unpack_timestamp = struct.Struct(COMPILED_TIMESTAMP_FORMAT).unpack_from
+            end = len(mm) - COMPILED_RECORD_SIZE
+            for offset in range(COMPILED_HEADER_SIZE, end + 1, COMPILED_RECORD_SIZE):
+                frame_offset = offset + COMPILED_TIMESTAMP_SIZE
+                yield unpack_timestamp(mm, offset)[0], mm[frame_offset:offset + COMPILED_RECORD_SIZE]
@@ -0,0 +1,246 @@
+import multiprocessing
+import os
+import shlex
+import threading
+import time
+import traceback
+
+from src import can_simulator
+from src import latency
+from src import param
+
+"""
+Fleet simulation - one vehicle scenario per can interface
+- every vehicle runs in its own process pinned to one CPU core (vehicles do not share GIL or scheduler jitter)
+- all vehicles wait on one start barrier, so scenarios start synchronised
+- crash of one vehicle process is reported, other vehicles keep running
+- vehicle which does not send its result until end of fleet run (see FLEET_TIMEOUT_S) is terminated and reported
+  with TIMEOUT status, so one hung vehicle does not stall the fleet report
+- timing statistics and latency histograms of all vehicles are aggregated
+"""
+
+FLEET_START_TIMEOUT_S = 10.0  # vehicles start unsynchronised when some vehicle does not reach start barrier in time
+FLEET_TIMEOUT_S = 24 * 3600.0  # max. time [s] of fleet run, vehicles without result are terminated after it
+
+VEHICLE_OK = 'OK'
+VEHICLE_FAILED = 'FAILED'
+VEHICLE_TIMEOUT = 'TIMEOUT'
+
+
+class VehicleResult:
+    """
+    Result of one vehicle simulation sent from vehicle process
+    """
+
+    def __init__(self, interface):
+        self.interface = interface
+        self.status = None  # VEHICLE_OK / VEHICLE_FAILED / VEHICLE_TIMEOUT
+        self.cpu = None
+        self.synchronised = False
+        self.start_time = None  # wall clock time [s] of scenario start (comparable between processes)
+        self.duration_s = None
+        self.error = None
+        self.exit_code = None
+        self.latency_histograms = None
+
+
+def read_fleet_file(file_name):
+    """
+    Read fleet definition - one vehicle per line: [interface] [action] [par1] ... [parN] (see 'canSend.py -h')
+        vcan0 -eld_file eld_test_scenario.txt
+        vcan1 -eld_file eld_scenario_example.txt
+    :param file_name:
+    :return: list of (interface, list of cmd parameters), '#' comments and empty lines are skipped
+    """
+    vehicles = []
+    with open(file_name, 'r') as fleet_file:
+        for line in fleet_file:
+            words = shlex.split(line, comments=True)
+            if not words:
+                continue
+            if len(words) < 2:
+                print('Error: Missing simulator action for interface {0}!'.format(words[0]))
+                continue
+            vehicles.append((words[0], words[1:]))
+    return vehicles
+
+
+def get_cpus():
+    """
+    Get CPU cores available for this process
+    :return: list of CPU numbers
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(multiprocessing.cpu_count()))
+
+
+def pin_to_cpu(cpu):
+    """
+    Pin actual process to one CPU core (nothing happens when OS does not support it)
+    :param cpu: CPU number
+    :return: True if process was pinned
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        print('Warning: Cannot pin process to CPU {0}: {1}'.format(cpu, e))
+        return False
+    return True
+
+
+def simulate_vehicle(interface, parameters):
+    """
+    Run simulator action on can interface (default vehicle function of run_fleet())
+    :param interface: can interface name
+    :param parameters: cmd parameters without script name, e.g. ['-eld_file', 'eld_test_scenario.txt']
+    :return: latency.LatencyHistograms of simulator
+    """
+    simulator_parameters = param.Param().parse_cmd_params(['canSend.py'] + parameters)
+    if simulator_parameters is None or simulator_parameters.action is None:
+        raise ValueError('Wrong simulator parameters: {0}'.format(' '.join(parameters)))
+
+    simulator = can_simulator.CanSimulator(simulator_parameters, interface)
+    if not simulator.can_bus.is_open():
+        raise OSError('Cannot open can interface {0}'.format(interface))
+    simulator.run_action()
+    return simulator.latency_histograms
+
+
+def run_vehicle_process(connection, barrier, cpu, interface, parameters, vehicle_function):
+    """
+    Body of vehicle process - wait on start barrier, run vehicle and send VehicleResult back
+    :param connection: sending end of pipe
+    :param barrier: multiprocessing.Barrier shared by all vehicles
+    :param cpu: CPU number the process is pinned to
+    :param interface: can interface name
+    :param parameters: cmd parameters of simulator action
+    :param vehicle_function: function(interface, parameters) returning latency.LatencyHistograms or None
+    :return:
+    """
+    result = VehicleResult(interface)
+    if pin_to_cpu(cpu):
+        result.cpu = cpu
+
+    try:
+        barrier.wait(FLEET_START_TIMEOUT_S)
+        result.synchronised = True
+    except threading.BrokenBarrierError:
+        print('Warning: {0}: not all vehicles reached start barrier - starting unsynchronised'.format(interface))
+
+    result.start_time = time.time()
+    start = time.monotonic()
+    try:
+        result.latency_histograms = vehicle_function(interface, parameters)
+    except Exception:
+        traceback.print_exc()
+        result.error = traceback.format_exc().strip().splitlines()[-1]
+    result.duration_s = time.monotonic() - start
+
+    connection.send(result)
+    connection.close()
+
+
+def run_fleet(vehicles, vehicle_function=simulate_vehicle, timeout_s=FLEET_TIMEOUT_S):
+    """
+    Run all vehicles in parallel processes (vehicle n is pinned to n-th available CPU core, round robin)
+    :param vehicles: list of (interface, cmd parameters) (see read_fleet_file())
+    :param vehicle_function: function(interface, parameters) run in vehicle process
+    :param timeout_s: max. time [s] of fleet run, vehicle processes without result are terminated after it
+    :return: list of VehicleResult in order of vehicles
+    """
+    cpus = get_cpus()
+    barrier = multiprocessing.Barrier(len(vehicles))
+    processes = []
+    for index, (interface, parameters) in enumerate(vehicles):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=run_vehicle_process, name='vehicle-{0}'.format(interface),
+                                          args=(sender, barrier, cpus[index % len(cpus)], interface, parameters,
+                                                vehicle_function),
+                                          daemon=True)
+        process.start()
+        # Only vehicle process holds sending end, so receiver gets EOF when process dies without result
+        sender.close()
+        processes.append((interface, process, receiver))
+
+    deadline = time.monotonic() + timeout_s
+    results = []
+    for interface, process, receiver in processes:
+        timed_out = False
+        result = None
+        # poll() returns True also for EOF (process died without result)
+        if receiver.poll(max(deadline - time.monotonic(), 0.0)):
+            try:
+                result = receiver.recv()
+            except EOFError:
+                pass
+        else:
+            timed_out = True
+            process.terminate()
+        receiver.close()
+        process.join()
+
+        if timed_out:
+            result = VehicleResult(interface)
+            result.status = VEHICLE_TIMEOUT
+            result.error = 'No result in {0:.1f} s - vehicle process terminated'.format(timeout_s)
+        elif result is None:
+            result = VehicleResult(interface)
+            result.error = 'Vehicle process crashed (exit code {0})'.format(process.exitcode)
+        if result.status is None:
+            result.status = VEHICLE_OK if result.error is None else VEHICLE_FAILED
+        result.exit_code = process.exitcode
+        results.append(result)
+    return results
+
+
+def print_fleet_statistics(results):
+    """
+    Print result of every vehicle, start skew and latency histograms aggregated over all vehicles
+    :param results: list of VehicleResult
+    :return:
+    """
+    print('- Fleet statistics -')
+    start_times = [result.start_time for result in results if result.start_time is not None]
+    first_start = min(start_times) if start_times else 0.0
+
+    for result in results:
+        status = result.status if result.error is None else '{0}: {1}'.format(result.status, result.error)
+        if result.start_time is None:
+            print('{0}: {1}'.format(result.interface, status))
+            continue
+        print('{0}: {1}; CPU {2}; start +{3:.3f} ms{4}; duration {5:.3f} s'.format(
+            result.interface, status, result.cpu, (result.start_time - first_start) * 1000,
+            '' if result.synchronised else ' (unsynchronised)', result.duration_s))
+
+    nmb_failed = sum(1 for result in results if result.status != VEHICLE_OK)
+    print('Vehicles: {0}; OK: {1}; failed: {2}; max. start skew: {3:.3f} ms'.format(
+        len(results), len(results) - nmb_failed, nmb_failed,
+        (max(start_times) - first_start) * 1000 if start_times else 0.0))
+
+    histograms = latency.LatencyHistograms()
+    for result in results:
+        if result.latency_histograms is not None:
+            histograms.merge(result.latency_histograms)
+    if histograms.names:
+        print('- Fleet latency (all vehicles) -')
+        histograms.print()
+
+
+def simulate_fleet(file_name):
+    """
+    Run fleet defined in text file and print aggregated statistics
+    :param file_name: fleet definition (see read_fleet_file())
+    :return: list of VehicleResult
+    """
+    vehicles = read_fleet_file(file_name)
+    if not vehicles:
+        print('Error: No vehicle defined in fleet file {0}!'.format(file_name))
+        return []
+
+    print('Starting fleet of {0} vehicles on {1} CPU cores'.format(len(vehicles), len(get_cpus())))
+    results = run_fleet(vehicles)
+    print_fleet_statistics(results)
+    return results
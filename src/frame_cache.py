@@ -0,0 +1,98 @@
+from src import j1939
+
+"""
+Encoding of J1939 signals into can frames
+- signal definitions (position, length and gain of raw value)
+- preallocated frames patched in place when signal value changes
+"""
+
+FRAME_CACHE_SIZE = 1024  # max. number of cached frames per signal builder
+
+
+class SignalDefinition:
+    """
+    Definition of one J1939 signal encoded as little endian unsigned raw value
+    """
+
+    def __init__(self, name, priority, pgn, first_byte, nmb_bytes, gain):
+        self.name = name
+        self.priority = priority
+        self.pgn = pgn
+        self.first_byte = first_byte
+        self.nmb_bytes = nmb_bytes
+        self.gain = gain
+
+    def get_raw_value(self, value):
+        """
+        Convert physical value into raw value
+        :param value: physical value
+        :return: int or None when value cannot be converted
+        """
+        try:
+            return int(round(value / self.gain))
+        except (ValueError, OverflowError, TypeError):
+            print('Error: Cannot convert physical {0} value into raw value for {1} message'.format(value, self.name))
+            return None
+
+    def write_raw_value(self, data, raw_value):
+        """
+        Write raw value into data bytes
+        :param data: bytearray or list of 8 bytes
+        :param raw_value:
+        :return:
+        """
+        for i in range(self.nmb_bytes):
+            data[self.first_byte + i] = (raw_value >> (8 * i)) & 0xFF
+
+    def get_arbitration_id(self, source_address):
+        return j1939.get_arbitration_id(self.priority, self.pgn, source_address)
+
+    def get_message(self, value, source_address=0x01):
+        """
+        Build new can message with specific signal value
+        :param value: physical value
+        :param source_address: J1939 source address
+        :return: can.Message or None when value cannot be converted
+        """
+        raw_value = self.get_raw_value(value)
+        if raw_value is None:
+            return None
+
+        data = [0x00] * 8
+        self.write_raw_value(data, raw_value)
+        return j1939.get_message(self.get_arbitration_id(source_address), data)
+
+
+# See J1939 std. for signal gains
+EEC1_ENGINE_SPEED = SignalDefinition('EEC1', 3, j1939.PGN_EEC1, 3, 2, 0.125)  # 0.125 rpm per bit
+CCVS_VEHICLE_SPEED = SignalDefinition('CCVS', 6, j1939.PGN_CCVS, 1, 2, 1 / 256)  # 1/256 km/h per bit
+VDHR_DISTANCE = SignalDefinition('VDHR', 6, j1939.PGN_VDHR, 0, 4, 5)  # 5 m per bit
+ENGINE_HOURS = SignalDefinition('HOURS', 6, j1939.PGN_ENGINE_HOURS, 0, 4, 0.05)  # 0.05 h per bit
+
+
+class SignalFrame:
+    """
+    Preallocated can frame of one signal
+    - payload is patched in place only when signal value changes
+    - sending the same value again allocates nothing
+    """
+
+    def __init__(self, signal, source_address=0x01):
+        self.signal = signal
+        self.msg = j1939.get_message(signal.get_arbitration_id(source_address), [0x00] * 8)
+        self.value = None
+
+    def set_value(self, value):
+        """
+        Update signal value of preallocated frame
+        :param value: physical value
+        :return: can message with actual value
+        """
+        if value == self.value:
+            return self.msg
+
+        raw_value = self.signal.get_raw_value(value)
+        if raw_value is not None:
+            self.signal.write_raw_value(self.msg.data, raw_value)
+            self.value = value
+        return self.msg
@@ -0,0 +1,226 @@
+import can
+
+"""
+J1939 constants and helper methods to decode can message IDs
+"""
+
+# Parameter Group Numbers (PGN) used by simulator
+PGN_REQUEST = 0xEA00
+PGN_ACKNOWLEDGEMENT = 0xE800
+PGN_ADDRESS_CLAIM = 0xEE00
+PGN_TP_CM = 0xEC00  # Transport protocol - connection management
+PGN_TP_DT = 0xEB00  # Transport protocol - data transfer
+PGN_EBC1 = 0xF001
+PGN_ETC1 = 0xF002
+PGN_EEC1 = 0xF004
+PGN_ETC2 = 0xF005
+PGN_CCVS = 0xFEF1
+PGN_VDHR = 0xFEC1
+PGN_ENGINE_HOURS = 0xFEE5
+PGN_VIN = 0xFEEC
+PGN_DASH_DISPLAY = 0xFEFC
+
+GLOBAL_ADDRESS = 0xFF
+NULL_ADDRESS = 0xFE  # source address of 'Cannot claim address' message
+ADDR_CLAIM_PRIORITY = 6
+REQUEST_PRIORITY = 6
+ACK_NEGATIVE = 1  # control byte of Acknowledgement message: NACK
+PDU2_MIN_FORMAT = 0xF0  # PDU format >= 240 is broadcast (PDU2), PDU specific byte is part of PGN
+
+
+def get_pdu_format(arbitration_id):
+    """
+    Get PDU format (PF) byte from 29-bit arbitration ID
+    :param arbitration_id:
+    :return: int
+    """
+    return (arbitration_id >> 16) & 0xFF
+
+
+def get_source_address(arbitration_id):
+    """
+    Get source address from 29-bit arbitration ID
+    :param arbitration_id:
+    :return: int
+    """
+    return arbitration_id & 0xFF
+
+
+def get_destination_address(arbitration_id):
+    """
+    Get destination address of PDU1 message (global address for PDU2 message)
+    :param arbitration_id:
+    :return: int
+    """
+    if get_pdu_format(arbitration_id) < PDU2_MIN_FORMAT:
+        return (arbitration_id >> 8) & 0xFF
+    return GLOBAL_ADDRESS
+
+
+def get_pgn(arbitration_id):
+    """
+    Get PGN from 29-bit arbitration ID (PDU specific byte is not part of PGN for PDU1 messages)
+    :param arbitration_id:
+    :return: int
+    """
+    pgn = (arbitration_id >> 8) & 0x3FFFF
+    if get_pdu_format(arbitration_id) < PDU2_MIN_FORMAT:
+        pgn &= 0x3FF00
+    return pgn
+
+
+def get_arbitration_id(priority, pgn, source_address, destination_address=GLOBAL_ADDRESS):
+    """
+    Build 29-bit arbitration ID
+    :param priority: 0 - 7
+    :param pgn: Parameter Group Number
+    :param source_address:
+    :param destination_address: used for PDU1 messages only
+    :return: int
+    """
+    if ((pgn >> 8) & 0xFF) < PDU2_MIN_FORMAT:
+        pgn = (pgn & 0x3FF00) | destination_address
+    return ((priority & 0x7) << 26) | ((pgn & 0x3FFFF) << 8) | (source_address & 0xFF)
+
+
+def is_request_msg(arbitration_id):
+    """Check if arbitration ID is J1939 Request message ID"""
+    return get_pdu_format(arbitration_id) == (PGN_REQUEST >> 8)
+
+
+def is_addr_claim_msg(arbitration_id):
+    """Check if arbitration ID is J1939 'Address Claim' message ID"""
+    return get_pdu_format(arbitration_id) == (PGN_ADDRESS_CLAIM >> 8)
+
+
+def get_requested_pgn(msg):
+    """
+    Get PGN requested by J1939 Request message
+    :param msg: can message
+    :return: requested PGN or None when message is not Request
+    """
+    if not is_request_msg(msg.arbitration_id) or len(msg.data) < 3:
+        return None
+    return msg.data[0] | (msg.data[1] << 8) | (msg.data[2] << 16)
+
+
+def get_request_message(requested_pgn, destination_address, source_address, priority=REQUEST_PRIORITY):
+    """
+    Build J1939 Request message
+    :param requested_pgn:
+    :param destination_address: requested node (GLOBAL_ADDRESS = all nodes)
+    :param source_address: requesting node
+    :param priority:
+    :return: can.Message
+    """
+    data = [requested_pgn & 0xFF, (requested_pgn >> 8) & 0xFF, (requested_pgn >> 16) & 0xFF]
+    return get_message(get_arbitration_id(priority, PGN_REQUEST, source_address, destination_address), data)
+
+
+def get_nack_pgn(msg):
+    """
+    Get PGN refused by negative Acknowledgement (NACK) message
+    :param msg: can message
+    :return: PGN or None when message is not NACK
+    """
+    if get_pgn(msg.arbitration_id) != PGN_ACKNOWLEDGEMENT or len(msg.data) < 8 or msg.data[0] != ACK_NEGATIVE:
+        return None
+    return msg.data[5] | (msg.data[6] << 8) | (msg.data[7] << 16)
+
+
+def get_name(identity_number, function, manufacturer_code=0, ecu_instance=0, vehicle_system=0, industry_group=0,
+             arbitrary_address_capable=False):
+    """
+    Build 64-bit J1939 NAME as 8 data bytes of 'Address Claim' message (lower NAME = higher claim priority)
+    :param identity_number: 21 bits (e.g. serial number)
+    :param function: 8 bits (0 = engine, 3 = transmission, 9 = brakes, 29 = instrument cluster ...)
+    :param manufacturer_code: 11 bits
+    :param ecu_instance: 3 bits
+    :param vehicle_system: 7 bits
+    :param industry_group: 3 bits (0 = global, 1 = on-highway)
+    :param arbitrary_address_capable:
+    :return: list of 8 bytes
+    """
+    name = (identity_number & 0x1FFFFF) | ((manufacturer_code & 0x7FF) << 21) | ((ecu_instance & 0x7) << 32) | \
+           ((function & 0xFF) << 40) | ((vehicle_system & 0x7F) << 49) | ((industry_group & 0x7) << 60) | \
+           (int(bool(arbitrary_address_capable)) << 63)
+    return [(name >> (8 * i)) & 0xFF for i in range(8)]
+
+
+def get_name_value(name_bytes):
+    """
+    Get NAME as integer (for comparison of claim priority)
+    :param name_bytes: 8 data bytes of 'Address Claim' message
+    :return: int
+    """
+    return int.from_bytes(bytes(name_bytes[:8]), 'little')
+
+
+def get_addr_claim_message(name_bytes, source_address):
+    """
+    Build 'Address Claim' message (NULL_ADDRESS source = 'Cannot claim address')
+    :param name_bytes: 8 bytes of NAME
+    :param source_address: claimed address
+    :return: can.Message
+    """
+    return get_message(get_arbitration_id(ADDR_CLAIM_PRIORITY, PGN_ADDRESS_CLAIM, source_address), list(name_bytes))
+
+
+class RequestResponder:
+    """
+    Registry of responders to J1939 Request (0xEA) messages keyed by requested PGN
+    - request is decoded once and dispatched by dictionary lookup
+    - number of registered PGNs does not add per-frame cost
+    """
+
+    def __init__(self):
+        self.responders = {}
+
+    def register(self, pgn, reply_generator):
+        """
+        Register responder for requested PGN
+        :param pgn: requested PGN
+        :param reply_generator: function(request_msg) which sends response
+        :return:
+        """
+        self.responders[pgn] = reply_generator
+
+    def unregister(self, pgn):
+        """
+        Remove responder for requested PGN
+        :param pgn:
+        :return:
+        """
+        self.responders.pop(pgn, None)
+
+    def is_handled_request(self, msg):
+        """
+        Check if message is Request of PGN with registered responder
+        :param msg: can message
+        :return: bool
+        """
+        return get_requested_pgn(msg) in self.responders
+
+    def dispatch(self, msg):
+        """
+        Call responder registered for PGN requested by message
+        :param msg: can message
+        :return: requested PGN when responder was called, None otherwise
+        """
+        pgn = get_requested_pgn(msg)
+        reply_generator = self.responders.get(pgn)
+        if reply_generator is None:
+            return None
+
+        reply_generator(msg)
+        return pgn
+
+
+def get_message(arbitration_id, data):
+    """
+    Build can message with 29-bit arbitration ID (extended ID is python-can default)
+    :param arbitration_id:
+    :param data: list of bytes
+    :return: can.Message
+    """
+    return can.Message(arbitration_id=arbitration_id, data=data)
@@ -0,0 +1,236 @@
+import time
+
+"""
+Latency measurement helpers
+- HDR-style histogram (log-linear buckets with fixed relative precision, constant memory for any number of samples)
+- tracking of J1939 requests and matching of their responses
+- named set of histograms (simulator self-latency instrumentation)
+"""
+
+HISTOGRAM_SUB_BUCKET_BITS = 7  # 128 sub-buckets per power of 2 -> max. relative error < 1 %
+HISTOGRAM_BAR_WIDTH = 40
+RESPONSE_TIMEOUT_S = 1.25  # J1939 requester waits max. T3 (1250 ms) for response
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with microsecond resolution
+    - values below 2^HISTOGRAM_SUB_BUCKET_BITS us are stored exactly
+    - bigger values are rounded down to HISTOGRAM_SUB_BUCKET_BITS significant bits
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = {}
+        self.nmb_samples = 0
+        self.min_us = None
+        self.max_us = None
+        self.sum_us = 0
+
+    @staticmethod
+    def get_bucket(value_us):
+        """
+        Get lower bound of bucket for value
+        :param value_us: int
+        :return: int
+        """
+        shift = value_us.bit_length() - HISTOGRAM_SUB_BUCKET_BITS
+        if shift <= 0:
+            return value_us
+        return (value_us >> shift) << shift
+
+    def add(self, latency_s):
+        """
+        Record one latency
+        :param latency_s: latency [s] (negative values are recorded as 0)
+        :return:
+        """
+        value_us = max(int(round(latency_s * 1000000)), 0)
+        bucket = self.get_bucket(value_us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.nmb_samples += 1
+        self.sum_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def merge(self, histogram):
+        """
+        Add all samples of other histogram (e.g. the same latency measured by several processes)
+        :param histogram: LatencyHistogram
+        :return:
+        """
+        if histogram.nmb_samples == 0:
+            return
+        for bucket, count in histogram.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.nmb_samples += histogram.nmb_samples
+        self.sum_us += histogram.sum_us
+        self.min_us = histogram.min_us if self.min_us is None else min(self.min_us, histogram.min_us)
+        self.max_us = histogram.max_us if self.max_us is None else max(self.max_us, histogram.max_us)
+
+    def get_percentile(self, percentile):
+        """
+        Get latency [us] which is not exceeded by 'percentile' % of samples
+        :param percentile: 0 - 100
+        :return: int or None when histogram is empty
+        """
+        if self.nmb_samples == 0:
+            return None
+        if percentile >= 100:
+            return self.max_us
+
+        rank = max(int(self.nmb_samples * percentile / 100.0 + 0.5), 1)
+        total = 0
+        for bucket in sorted(self.counts):
+            total += self.counts[bucket]
+            if total >= rank:
+                return min(max(bucket, self.min_us), self.max_us)
+        return self.max_us
+
+    def get_mean(self):
+        if self.nmb_samples == 0:
+            return None
+        return self.sum_us / self.nmb_samples
+
+    def print(self, print_buckets=True):
+        """
+        Print summary (min / median / p99 / max) and histogram of power of 2 buckets
+        :param print_buckets: print histogram bars
+        :return:
+        """
+        if self.nmb_samples == 0:
+            print('{0}: no samples'.format(self.name))
+            return
+
+        print('{0}: n={1}; min={2} us; median={3} us; p99={4} us; max={5} us; mean={6:.0f} us'.format(
+            self.name, self.nmb_samples, self.min_us, self.get_percentile(50), self.get_percentile(99), self.max_us,
+            self.get_mean()))
+        if not print_buckets:
+            return
+
+        power_counts = {}
+        for bucket, count in self.counts.items():
+            power = bucket.bit_length()
+            power_counts[power] = power_counts.get(power, 0) + count
+        max_count = max(power_counts.values())
+        for power in sorted(power_counts):
+            low = 0 if power == 0 else 1 << (power - 1)
+            count = power_counts[power]
+            bar = '#' * max(int(round(count * HISTOGRAM_BAR_WIDTH / max_count)), 1)
+            print('  {0:>9} - {1:>9} us: {2:>8} {3}'.format(low, (1 << power) - 1, count, bar))
+
+
+class RequestTracker:
+    """
+    Match J1939 requests with responses
+    - one outstanding request per PGN
+    - latency = response receive time - request send time (both monotonic clock)
+    - requests without response in RESPONSE_TIMEOUT_S are counted as timeouts
+    """
+
+    def __init__(self, pgns, timeout_s=RESPONSE_TIMEOUT_S):
+        self.pgns = pgns
+        self.timeout_s = timeout_s
+        self.outstanding = {}  # PGN -> request send time
+        self.histograms = dict((pgn, LatencyHistogram('PGN {0:04X}'.format(pgn))) for pgn in pgns)
+        self.nmb_requests = dict((pgn, 0) for pgn in pgns)
+        self.nmb_timeouts = dict((pgn, 0) for pgn in pgns)
+        self.nmb_nacks = dict((pgn, 0) for pgn in pgns)
+
+    def is_outstanding(self, pgn):
+        return pgn in self.outstanding
+
+    def on_request_sent(self, pgn, tx_time):
+        """
+        Register sent request
+        :param pgn: requested PGN
+        :param tx_time: monotonic send time [s]
+        :return:
+        """
+        self.outstanding[pgn] = tx_time
+        self.nmb_requests[pgn] += 1
+
+    def on_response(self, pgn, rx_time):
+        """
+        Match received response
+        :param pgn: PGN of received (or reassembled) message
+        :param rx_time: monotonic receive time [s]
+        :return: latency [s] or None when no request of PGN is outstanding
+        """
+        tx_time = self.outstanding.pop(pgn, None)
+        if tx_time is None:
+            return None
+        latency_s = rx_time - tx_time
+        self.histograms[pgn].add(latency_s)
+        return latency_s
+
+    def on_nack(self, pgn):
+        """
+        Negative acknowledgement of outstanding request
+        :param pgn: requested PGN
+        :return:
+        """
+        if self.outstanding.pop(pgn, None) is not None:
+            self.nmb_nacks[pgn] += 1
+
+    def check_timeouts(self, now=None):
+        """
+        Count and drop outstanding requests older than timeout
+        :param now: monotonic time [s]
+        :return:
+        """
+        if now is None:
+            now = time.monotonic()
+        for pgn, tx_time in list(self.outstanding.items()):
+            if now - tx_time >= self.timeout_s:
+                del self.outstanding[pgn]
+                self.nmb_timeouts[pgn] += 1
+
+    def print(self):
+        for pgn in self.pgns:
+            print('Requests of PGN {0:04X}: {1}; responses: {2}; timeouts: {3}; NACK: {4}'.format(
+                pgn, self.nmb_requests[pgn], self.histograms[pgn].nmb_samples, self.nmb_timeouts[pgn],
+                self.nmb_nacks[pgn]))
+            self.histograms[pgn].print()
+
+
+class LatencyHistograms:
+    """
+    Named latency histograms created on first use (e.g. 'Response VIN', 'Lateness EEC1')
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.names = []
+
+    def add(self, name, latency_s):
+        """
+        Record latency into histogram 'name'
+        :param name:
+        :param latency_s: latency [s]
+        :return:
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = LatencyHistogram(name)
+            self.histograms[name] = histogram
+            self.names.append(name)
+        histogram.add(latency_s)
+
+    def merge(self, histograms):
+        """
+        Merge all histograms of other set into histograms of the same name
+        :param histograms: LatencyHistograms
+        :return:
+        """
+        for name in histograms.names:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = LatencyHistogram(name)
+                self.histograms[name] = histogram
+                self.names.append(name)
+            histogram.merge(histograms.histograms[name])
+
+    def print(self, print_buckets=True):
+        for name in self.names:
+            self.histograms[name].print(print_buckets)
@@ -0,0 +1,230 @@
+import collections
+import copy
+import threading
+import time
+
+from src import bus_load
+from src import scheduler
+
+"""
+In-process loopback can-bus (backend of CanDriver for channels 'loop0', 'loop1', ... see candriver.BACKENDS)
+- every bus connected to the same channel receives frames sent by the other buses (own frames are not received,
+  the same as SocketCAN socket)
+- sending takes network lock (bus reservation, counters and delivery), so all buses receive frames in the order of
+  their simulated transmission; receiving takes no lock (receive queue of every bus is deque)
+- receive filters (can_id / can_mask) are applied by sender, filtered out frames never wake up receiver
+- optional simulated bitrate and arbitration delay: frames occupy the bus for their exact number of bits
+  (see bus_load.get_frame_bits()) and are received only after end of their simulated transmission, sender blocks
+  while the bus is more than LOOPBACK_TX_QUEUE_S behind, so achieved frames/s depend on simulated bitrate, not on
+  speed of machine
+- no kernel, no can device and no root rights are needed (tests and benchmarks in containers without vcan)
+"""
+
+LOOPBACK_PREFIX = 'loop'  # channels with this prefix are loopback buses
+LOOPBACK_TX_QUEUE_S = 0.010  # bus time of frames which can be queued before sender blocks
+
+networks = {}  # channel -> LoopbackNetwork
+
+
+class LoopbackNetwork:
+    """
+    Medium shared by all loopback buses of one channel
+    """
+
+    def __init__(self, channel, bitrate=0, arbitration_delay_s=0.0):
+        """
+        :param channel: channel name
+        :param bitrate: simulated bitrate [bit/s] (0 = frames are delivered immediately, no bus timing)
+        :param arbitration_delay_s: simulated delay [s] before every frame wins the bus
+        """
+        self.channel = channel
+        self.bitrate = bitrate
+        self.arbitration_delay_s = arbitration_delay_s
+        self.buses = ()  # replaced (not modified) on connect / disconnect, sending iterates without lock
+        self.busy_until = 0.0  # monotonic time when simulated bus becomes idle
+        self.sent_count = 0
+        self.sent_bits = 0
+        self.lock = threading.Lock()
+
+    def configure(self, bitrate=0, arbitration_delay_s=0.0):
+        """
+        Set simulated bus timing
+        :param bitrate: simulated bitrate [bit/s] (0 = no bus timing)
+        :param arbitration_delay_s: simulated delay [s] before every frame wins the bus
+        :return:
+        """
+        self.bitrate = bitrate
+        self.arbitration_delay_s = arbitration_delay_s
+        self.busy_until = 0.0
+
+    def connect(self):
+        """
+        Connect new bus to network
+        :return: LoopbackBus
+        """
+        bus = LoopbackBus(self)
+        with self.lock:
+            self.buses = self.buses + (bus,)
+        return bus
+
+    def disconnect(self, bus):
+        with self.lock:
+            self.buses = tuple(connected_bus for connected_bus in self.buses if connected_bus is not bus)
+
+    def transmit(self, sender, msg):
+        """
+        Deliver copy of frame to all other buses (after its simulated transmission when bitrate is set)
+        :param sender: LoopbackBus which sends frame
+        :param msg: can message
+        :return:
+        """
+        bits = bus_load.get_msg_bits(msg)
+        received_msg = copy.copy(msg)
+        received_msg.data = bytearray(msg.data)
+
+        with self.lock:
+            now = time.monotonic()
+            end = self.__occupy_bus(now, bits)
+            received_msg.timestamp = time.time() + end - now
+            self.sent_count += 1
+            self.sent_bits += bits
+            for bus in self.buses:
+                if bus is not sender:
+                    bus.deliver(received_msg, end)
+
+        if end - now > LOOPBACK_TX_QUEUE_S:
+            scheduler.sleep_until(end - LOOPBACK_TX_QUEUE_S)
+
+    def __occupy_bus(self, now, bits):
+        """
+        Reserve simulated bus time for frame (called with network lock taken)
+        :param now: monotonic time [s] when frame is sent
+        :param bits: frame length [bits]
+        :return: monotonic time [s] of end of frame transmission
+        """
+        if self.bitrate <= 0 and self.arbitration_delay_s <= 0:
+            return now
+
+        start = max(now, self.busy_until) + self.arbitration_delay_s
+        self.busy_until = start + (bits / self.bitrate if self.bitrate > 0 else 0.0)
+        return self.busy_until
+
+    def get_bus_time_s(self):
+        """
+        Bus time of all sent frames at simulated bitrate
+        :return: time [s] (0 when bitrate is not set)
+        """
+        if self.bitrate <= 0:
+            return 0.0
+        return self.sent_bits / self.bitrate
+
+
+class LoopbackBus:
+    """
+    One node of loopback network with the same interface as python-can bus used by CanDriver (send, recv,
+    set_filters, shutdown)
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.channel_info = 'loopback {0}'.format(network.channel)
+        self.queue = collections.deque()  # (monotonic time when frame can be received, can message)
+        self.event = threading.Event()
+        self.filters = None
+
+    @property
+    def bitrate(self):
+        return self.network.bitrate
+
+    def send(self, msg, timeout=None):
+        """
+        Send can message to other buses of network
+        :param msg: can message
+        :param timeout: not used (sender blocks only by simulated bus timing)
+        :return:
+        """
+        self.network.transmit(self, msg)
+
+    def deliver(self, msg, visible_time=0.0):
+        """
+        Put received frame into receive queue (called by sender)
+        :param msg: can message
+        :param visible_time: monotonic time [s] of end of simulated transmission, frame is not received before it
+        :return:
+        """
+        if self.filters is not None and not self.__matches_filters(msg):
+            return
+        self.queue.append((visible_time, msg))
+        self.event.set()
+
+    def recv(self, timeout=None):
+        """
+        Receive one can message
+        :param timeout: max. waiting time [s] (None = wait forever)
+        :return: can message or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            try:
+                visible_time, msg = self.queue[0]
+            except IndexError:
+                visible_time = None
+            else:
+                if visible_time <= now:
+                    self.queue.popleft()
+                    return msg
+
+            remaining = None if deadline is None else deadline - now
+            if remaining is not None and remaining <= 0:
+                return None
+            if visible_time is not None:
+                # frames are queued in order of their transmission, so the first one is received first
+                scheduler.sleep_until(visible_time if remaining is None else min(visible_time, deadline))
+                continue
+            # Event is cleared before queue is checked again, so frame delivered in between is not missed
+            self.event.clear()
+            if not self.queue:
+                self.event.wait(remaining)
+
+    def set_filters(self, filters=None):
+        """
+        Set receive filters
+        :param filters: list of {'can_id', 'can_mask', 'extended'} dictionaries or None to receive all frames
+        :return:
+        """
+        self.filters = filters
+
+    def __matches_filters(self, msg):
+        for msg_filter in self.filters:
+            if (msg.arbitration_id ^ msg_filter['can_id']) & msg_filter['can_mask'] == 0:
+                return True
+        return False
+
+    @staticmethod
+    def send_periodic(msg, period_s):
+        raise NotImplementedError('Periodic messages are not supported by loopback bus')
+
+    def shutdown(self):
+        self.network.disconnect(self)
+
+
+def get_network(channel):
+    """
+    Get network of loopback channel (network is created by first use)
+    :param channel: e.g. 'loop0'
+    :return: LoopbackNetwork
+    """
+    network = networks.get(channel)
+    if network is None:
+        network = networks.setdefault(channel, LoopbackNetwork(channel))
+    return network
+
+
+def open_bus(channel):
+    """
+    Connect new bus to loopback channel (see candriver.BACKENDS)
+    :param channel:
+    :return: LoopbackBus
+    """
+    return get_network(channel).connect()
@@ -1,4 +1,4 @@
-import can
+from src import j1939
 
 help_str = """
 'canSend.py' - cmd tool to simulate J1939 can-bus processes
@@ -16,9 +16,18 @@ Actions:
                                                                       delay 700
                                                                       18fef100 31 31 31 31 31 31 31 31
                                                                       delay 800
+  -F --flood_file_messages [filename] [nmb_repeats]                 Send messages from text file [nmb_repeats] times as fast as interface accepts
+                                                                      (delays are ignored). Achieved frames/s, bits/s and bus load are reported.
+  -c --compile_messages [filename] [compiled_filename]             Compile messages text file (see '-f') into binary file.
+  -fc --send_compiled_messages [compiled_filename]                  Send messages from compiled binary file (no text parsing).
+  -t --replay_trace [filename] [speed]                              Replay candump log or Vector ASC (*.asc) trace with original timing.
+                                                                      Speed multiplier: 1 = real time, 2 = 2x faster, 0 = as fast as possible (flood, bus load is reported).
   -d --send_default_messages                                        Send default messages.
   -r --receive_one_message    [max_timeout]                         Wait [ms] for one message for specific number of milliseconds.
   -R --receive_messages       [max_timeout]                         Wait [ms] for all messages for specific number of milliseconds.
+  -rec --record_messages [max_timeout] [filename] [max_file_mb] [max_file_s]  Record all received messages with kernel timestamps
+                                                                      for [ms] into binary file (or candump log for '*.log' file). New file is started
+                                                                      after [max_file_mb] MB / [max_file_s] seconds (0 = no rotation).
   -an --addr_claim_no_response [max_timeout]                        Wait [ms] for 'Address claim message' send no response (address can be used).
   -aU --addr_claim_addr_used_multi [max_timeout] [max_responses]    Wait max [ms] for 'Address claim' and response by [max_responses] nmb. of Addr. Claimed msgs.
   -nU --new_device_addr_used_multi [max_timeout] [max_responses]    Initiate new 'Address claim' with the default (FB) addr. as Ehubo2.
@@ -30,7 +39,27 @@ Actions:
   -sp --speed_kph_shift [speed_value1] [value_ms] [speed_value2] [value2_ms] Simulate Vehicle Speed shift from one value to another value.
   -iV --install_wizard_vin [max_timeout]                            Broadcast R.P.M. message and response on VIN code request for Install Wizard test.
   -eld --eld_messages_simulation [max_timeout]                      Simulate truck for ELD (Vehicle Speed, Engine speed, Vehicle distance, VIN code, Engine hours).
-  -eld_file --eld_msgs_file_simulation [filename]                   Simulate truck behavior for ELD with values specified in text file.
+  -eld_file --eld_msgs_file_simulation [filename] [speed]           Simulate truck behavior for ELD with values specified in text file.
+                                                                      Optional speed multiplier: 1 = real time (default), N = N-times faster,
+                                                                      0 = virtual time (no waiting, as fast as possible).
+  -eld_bcm --eld_msgs_file_simulation_bcm [filename]               The same as '-eld_file' but broadcast messages are sent
+                                                                      periodically by kernel (SocketCAN Broadcast Manager).
+  -lat --request_latency [max_timeout] [address] [rate] [pgn1] ... [pgnN]  Send J1939 requests of PGNs (hex) to ECU [address] (hex)
+                                                                      [rate] times per second for [ms] and report response latency histograms.
+                                                                      Example: canSend.py -lat 60000 00 10 FEEC FEE5
+  -L --bus_load [max_timeout] [load_percent] [filename]            Simulate default ELD truck and fill can-bus up to [load_percent] bus load
+                                                                      with messages from text file (mix of IDs and DLCs, delays are ignored).
+  -eld_aU --eld_file_addr_claim_multi [filename] [max_responses]   Simulate ELD truck from text file and at the same time respond to
+                                                                      'Address claim' messages by [max_responses] address collisions.
+  -ecu --multi_ecu_file_simulation [filename] [speed]               Simulate whole truck network (Engine, Transmission, Brakes, Instrument
+                                                                      cluster ECUs with own addresses and NAMEs) with ELD values from text file.
+  -fleet --fleet_simulation [fleet_filename]                        Run one simulator action per can interface in parallel processes (one
+                                                                      vehicle per line: [interface] [action] [par1] ... [parN], e.g.
+                                                                      'vcan1 -eld_file eld_test_scenario.txt'), report aggregated statistics.
+  -render --render_scenario [output_file] [action] [par1] ... [parN]  Run action in virtual time without can interface and write all
+                                                                      sent frames with simulation timestamps into candump log ('*.log') or
+                                                                      binary file. Actions: -eld, -eld_file, -ecu, -f, -fc
+                                                                      Example: canSend.py -render eld.log -eld_file eld_test_scenario.txt
   -h --help                                                         Print this help
 Examples:
     canSend.py -s 18FEF100 01 02 03 04 05 06 07 08
@@ -44,8 +73,13 @@ SEND_ONE_MSG = ("-s", "--send_one_message")
 SEND_MSG_MULTI = ("-S", "--send_message_multi")
 SEND_FILE_MSG = ("-f", "--send_file_messages")
 SEND_DEFAULT = ("-d", "--send_default_messages")
+FLOOD_FILE_MSG = ("-F", "--flood_file_messages")
+COMPILE_MSG_FILE = ("-c", "--compile_messages")
+SEND_COMPILED_MSG = ("-fc", "--send_compiled_messages")
+REPLAY_TRACE = ("-t", "--replay_trace")
 RECEIVE_ONE_MSG = ("-r", "--receive_one_message")
 RECEIVE_MULTI_MSG = ("-R", "--receive_messages")
+RECORD_MSGS = ("-rec", "--record_messages")
 ADDR_CLAIM_NO_RESPONSE = ("-an", "--addr_claim_no_response")
 ADDR_CLAIM_ADDR_USED_MULTI = ("-aU", "--addr_claim_addr_used_multi")
 NEW_DEV_ADDR_USED_MULTI = ("-nU", "--new_device_addr_used_multi")
@@ -57,8 +91,22 @@ SPEED_SHIFT = ("-sp", "--speed_kph_shift")
 INSTALL_WIZARD_VIN = ("-iV", "--install_wizard_vin")
 ELD_MSGS_SIMULATION = ("-eld", "--eld_messages_simulation")
 ELD_MSGS_FILE_SIMULATION = ("-eld_file", "--eld_msgs_file_simulation")
+ELD_MSGS_FILE_SIMULATION_BCM = ("-eld_bcm", "--eld_msgs_file_simulation_bcm")
+ELD_FILE_ADDR_CLAIM_MULTI = ("-eld_aU", "--eld_file_addr_claim_multi")
+MULTI_ECU_FILE_SIMULATION = ("-ecu", "--multi_ecu_file_simulation")
+FLEET_SIMULATION = ("-fleet", "--fleet_simulation")
+RENDER_SCENARIO = ("-render", "--render_scenario")
+BUS_LOAD = ("-L", "--bus_load")
+REQUEST_LATENCY = ("-lat", "--request_latency")
 HELP = ("-h", "--help")
 
+# Actions which do not send or receive frames (can be run when can interface cannot be opened)
+OFFLINE_ACTIONS = LIST + BAUDRATE + COMPILE_MSG_FILE
+
+# Actions which can run without can interface (see RENDER_SCENARIO)
+RENDER_ACTIONS = ELD_MSGS_SIMULATION + ELD_MSGS_FILE_SIMULATION + MULTI_ECU_FILE_SIMULATION + SEND_FILE_MSG + \
+    SEND_COMPILED_MSG
+
 
 class Param:
     """
@@ -73,6 +121,7 @@ class Param:
         self.max_wait_time_ms = None
         self.msg = None
         self.file_name = None
+        self.output_file_name = None
         self.rpm_value_1 = None
         self.rpm_value_2 = None
         self.speed_value1 = None
@@ -80,6 +129,16 @@ class Param:
         self.value_1_ms = None
         self.value_2_ms = None
         self.baudrate = None
+        self.speed = None
+        self.nmb_repeats = None
+        self.load_percent = None
+        self.max_file_mb = None
+        self.max_file_s = None
+        self.target_address = None
+        self.rate_hz = None
+        self.request_pgns = None
+        self.clock_speed = None
+        self.render_file_name = None
 
     def parse_cmd_params(self, parameters):
         """
@@ -105,11 +164,21 @@ class Param:
             self.parse_file_messages(parameters[1:])
         elif parameters[1] in SEND_DEFAULT:
             self.parse_send_default_param(parameters[1:])
+        elif parameters[1] in FLOOD_FILE_MSG:
+            self.parse_flood_file_messages(parameters[1:])
+        elif parameters[1] in REPLAY_TRACE:
+            self.parse_replay_trace(parameters[1:])
+        elif parameters[1] in COMPILE_MSG_FILE:
+            self.parse_compile_messages(parameters[1:])
+        elif parameters[1] in SEND_COMPILED_MSG:
+            self.parse_file_messages(parameters[1:])
         # TODO: unit tests ...
         elif parameters[1] in RECEIVE_ONE_MSG:
             self.parse_receive_one_msg(parameters[1:])
         elif parameters[1] in RECEIVE_MULTI_MSG:
             self.parse_receive_multi_msg(parameters[1:])
+        elif parameters[1] in RECORD_MSGS:
+            self.parse_record_msgs(parameters[1:])
         elif parameters[1] in ADDR_CLAIM_NO_RESPONSE:
             self.parse_addr_claim_no_response(parameters[1:])
         elif parameters[1] in ADDR_CLAIM_ADDR_USED_MULTI:
@@ -129,7 +198,21 @@ class Param:
         elif parameters[1] in ELD_MSGS_SIMULATION:
             self.parse_eld_msgs_simulation(parameters[1:])
         elif parameters[1] in ELD_MSGS_FILE_SIMULATION:
+            self.parse_eld_msgs_file_simulation_clock(parameters[1:])
+        elif parameters[1] in ELD_MSGS_FILE_SIMULATION_BCM:
             self.parse_eld_msgs_file_simulation(parameters[1:])
+        elif parameters[1] in MULTI_ECU_FILE_SIMULATION:
+            self.parse_eld_msgs_file_simulation_clock(parameters[1:])
+        elif parameters[1] in FLEET_SIMULATION:
+            self.parse_fleet_simulation(parameters[1:])
+        elif parameters[1] in RENDER_SCENARIO:
+            self.parse_render_scenario(parameters[1:])
+        elif parameters[1] in BUS_LOAD:
+            self.parse_bus_load(parameters[1:])
+        elif parameters[1] in ELD_FILE_ADDR_CLAIM_MULTI:
+            self.parse_eld_file_addr_claim_multi(parameters[1:])
+        elif parameters[1] in REQUEST_LATENCY:
+            self.parse_request_latency(parameters[1:])
         elif parameters[1] in SPEED_SHIFT:
             self.parse_speed_shift(parameters[1:])
         else:
@@ -160,7 +243,7 @@ class Param:
         msgid_int = int(argv_list[0], 16)
         data_list_int = [int(x, 16) for x in argv_list[1:]]
 
-        msg = can.Message(extended_id=True, arbitration_id=msgid_int, data=data_list_int)
+        msg = j1939.get_message(msgid_int, data_list_int)
         # print(msg)
         return msg
 
@@ -191,7 +274,7 @@ class Param:
 
         msgid_int = int(argvs[0], 0)
         data_list_int = bytearray(argvs[1].decode('hex'))
-        msg = can.Message(extended_id=True, arbitration_id=msgid_int, data=data_list_int)
+        msg = j1939.get_message(msgid_int, data_list_int)
         return msg
 
     def parse_one_msg_param(self, parameters):
@@ -243,6 +326,53 @@ class Param:
 
         self.file_name = parameters[1]
 
+    def parse_flood_file_messages(self, parameters):
+        """
+        Parse parameters for flooding can-bus with messages from text file
+        :param parameters: [action filename nmb_repeats]
+        :return: Param() object
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 3,
+                                                 'Wrong number of parameters for flooding messages from text file!'):
+            self.action = None
+            return
+
+        self.file_name = parameters[1]
+        self.nmb_repeats = self.__str_to_digit(parameters[2])
+        if not self.nmb_repeats:
+            print('Error: Number of repeats must be positive integer!')
+            self.action = None
+
+    def parse_compile_messages(self, parameters):
+        """
+        Parse parameters for compiling messages text file into binary file
+        :param parameters:
+        :return: Param() object
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 3,
+                                                 'Wrong number of parameters for compiling messages file!'):
+            self.action = None
+            return
+
+        self.file_name = parameters[1]
+        self.output_file_name = parameters[2]
+
+    def parse_replay_trace(self, parameters):
+        """
+        Parse parameters for replaying candump / ASC trace
+        :param parameters: [action filename speed]
+        :return: Param() object
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 3, 'Wrong number of parameters for replaying trace!'):
+            self.action = None
+            return
+
+        self.file_name = parameters[1]
+        self.speed = self.__str_to_float(parameters[2])
+        if self.speed is None or self.speed < 0:
+            print('Error: Replay speed must be positive number (0 = as fast as possible)!')
+            self.action = None
+
     def parse_send_default_param(self, parameters):
         """
         Parse parameters for sending default messages
@@ -277,6 +407,24 @@ class Param:
 
         self.__set_param_max_time(parameters)
 
+    def parse_record_msgs(self, parameters):
+        """
+        Parse parameters for recording received messages into file(s)
+        :param parameters: [action max_timeout filename max_file_mb max_file_s]
+        :return:
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 5, 'Wrong number of parameters to record messages!'):
+            self.action = None
+            return
+
+        self.__set_param_max_time(parameters)
+        self.file_name = parameters[2]
+        self.max_file_mb = self.__str_to_digit(parameters[3])
+        self.max_file_s = self.__str_to_digit(parameters[4])
+        if self.max_file_mb is None or self.max_file_s is None:
+            print('Error: Max. file size and max. file time must be positive integers (0 = no rotation)!')
+            self.action = None
+
     def parse_addr_claim_no_response(self, parameters):
         """
         Wait for J1939 'Address claim' request and send no response (no address collision)
@@ -413,6 +561,112 @@ class Param:
 
         self.file_name = parameters[1]
 
+    def parse_eld_msgs_file_simulation_clock(self, parameters):
+        """
+        Parse parameters for ELD simulation from text file with optional speed of simulation clock
+        :param parameters: [action filename] or [action filename speed]
+        :return:
+        """
+        if len(parameters) != 3:
+            self.parse_eld_msgs_file_simulation(parameters)
+            return
+
+        self.file_name = parameters[1]
+        self.clock_speed = self.__str_to_float(parameters[2])
+        if self.clock_speed is None or self.clock_speed < 0:
+            print('Error: Simulation speed must be positive number (0 = virtual time)!')
+            self.action = None
+
+    def parse_fleet_simulation(self, parameters):
+        """
+        Parse parameters for fleet simulation
+        :param parameters: [action fleet_filename]
+        :return:
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 2, 'Wrong number of parameters to simulate fleet'):
+            self.action = None
+            return
+
+        self.file_name = parameters[1]
+
+    def parse_render_scenario(self, parameters):
+        """
+        Parse parameters for rendering action into trace file - parameters of rendered action are parsed as usual
+        :param parameters: [action output_file rendered_action par1 ... parN]
+        :return:
+        """
+        if len(parameters) < 3:
+            print('Wrong number of parameters to render scenario!')
+            self.print_help()
+            self.action = None
+            return
+
+        self.render_file_name = parameters[1]
+        if self.parse_cmd_params(['canSend.py'] + parameters[2:]) is None:
+            self.action = None
+        elif self.action is not None and self.action not in RENDER_ACTIONS:
+            print('Error: Action {0} cannot be rendered into trace!'.format(self.action))
+            self.action = None
+
+    def parse_eld_file_addr_claim_multi(self, parameters):
+        """
+        Parse parameters for ELD simulation from text file with concurrent address collisions
+        :param parameters: [action filename max_responses]
+        :return:
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 3,
+                                                 'Wrong number of parameters to simulate ELD with address claims'):
+            self.action = None
+            return
+
+        self.file_name = parameters[1]
+        self.nmb_msgs = self.__str_to_digit(parameters[2])
+        if self.nmb_msgs is None:
+            self.action = None
+
+    def parse_bus_load(self, parameters):
+        """
+        Parse parameters for bus load generator
+        :param parameters: [action max_timeout load_percent filename]
+        :return:
+        """
+        if not self.__is_right_nmb_of_parameters(parameters, 4, 'Wrong number of parameters to generate bus load'):
+            self.action = None
+            return
+
+        self.__set_param_max_time(parameters)
+        self.load_percent = self.__str_to_float(parameters[2])
+        self.file_name = parameters[3]
+        if self.load_percent is None or not 0 < self.load_percent <= 100:
+            print('Error: Bus load must be number in range (0, 100] %!')
+            self.action = None
+
+    def parse_request_latency(self, parameters):
+        """
+        Parse parameters for request / response latency measurement
+        :param parameters: [action max_timeout address rate pgn1 ... pgnN]
+        :return:
+        """
+        if len(parameters) < 5:
+            print('Wrong number of parameters to measure request latency!')
+            self.print_help()
+            self.action = None
+            return
+
+        self.__set_param_max_time(parameters)
+        self.rate_hz = self.__str_to_float(parameters[3])
+        try:
+            self.target_address = int(parameters[2], 16)
+            self.request_pgns = [int(pgn, 16) for pgn in parameters[4:]]
+        except ValueError:
+            print('Error: Address and PGNs must be hex numbers!')
+            self.action = None
+            return
+
+        if self.rate_hz is None or self.rate_hz <= 0 or not 0 <= self.target_address < j1939.GLOBAL_ADDRESS:
+            print('Error: Rate must be positive number and address must be in range 00 - FE!')
+            self.action = None
+
     def __is_right_nmb_of_parameters(self, parameters, parameters_number, message):
         """
         Check number of parameters
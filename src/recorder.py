@@ -0,0 +1,223 @@
+import os
+import queue
+import struct
+import threading
+
+from src import candriver
+from src import file_io
+
+"""
+Recording of received can frames into file(s)
+- binary format: the same as compiled messages file (absolute kernel timestamp [us] + 'struct can_frame')
+- candump log format: (1436509052.249713) can0 18FEF101#000A000000000000
+- frames are written by background thread with buffered file, receiving never waits for disk
+- size and time based rotation of files
+"""
+
+BINARY = 'binary'
+CANDUMP = 'candump'
+RECORDER_QUEUE_SIZE = 4096  # max. number of received batches waiting for writer
+WRITE_BUFFER_SIZE = 1024 * 1024
+RECORDER_PUT_TIMEOUT_S = 0.5  # how often waiting for free place in full queue checks that writer thread is alive
+
+
+def get_record_format(file_name):
+    """
+    Get record format from file name ('*.log' and '*.txt' files are candump logs, others are binary)
+    :param file_name:
+    :return: BINARY or CANDUMP
+    """
+    if os.path.splitext(file_name)[1].lower() in ('.log', '.txt'):
+        return CANDUMP
+    return BINARY
+
+
+def get_rotated_file_name(file_name, index):
+    """
+    Get name of n-th file of rotated recording: 'record.log' -> 'record.0003.log'
+    :param file_name:
+    :param index:
+    :return: str
+    """
+    root, ext = os.path.splitext(file_name)
+    return '{0}.{1:04d}{2}'.format(root, index, ext)
+
+
+def get_binary_record(timestamp, raw_frame):
+    """
+    Get binary record of received frame
+    :param timestamp: receive timestamp [s]
+    :param raw_frame: 'struct can_frame' bytes
+    :return: bytes
+    """
+    return struct.pack(file_io.COMPILED_TIMESTAMP_FORMAT, int(round(timestamp * 1000000))) + raw_frame
+
+
+def get_candump_line(timestamp, channel, raw_frame):
+    """
+    Get candump log line of received frame
+    :param timestamp: receive timestamp [s]
+    :param channel: can interface name
+    :param raw_frame: 'struct can_frame' bytes
+    :return: str
+    """
+    can_id, dlc, data = struct.unpack(candriver.CAN_FRAME_FORMAT, raw_frame[:candriver.CAN_FRAME_SIZE])
+    if can_id & candriver.CAN_EFF_FLAG:
+        id_str = '{0:08X}'.format(can_id & 0x1FFFFFFF)
+    else:
+        id_str = '{0:03X}'.format(can_id & 0x7FF)
+
+    if can_id & candriver.CAN_RTR_FLAG:
+        data_str = 'R'
+    else:
+        data_str = ''.join('{0:02X}'.format(byte) for byte in data[:dlc])
+    return '({0:.6f}) {1} {2}#{3}\n'.format(timestamp, channel, id_str, data_str)
+
+
+class BusRecorder:
+    """
+    Write received frames into binary or candump file(s) by background thread
+    - receiving thread only puts batches of frames into queue (see add_frames())
+    - new file is started when file exceeds 'max_file_bytes' or when frames are 'max_file_s' newer than first one
+    - when writing fails, writer thread keeps the error in 'error' and further frames are refused
+    """
+
+    def __init__(self, file_name, channel, max_file_bytes=0, max_file_s=0):
+        self.file_name = file_name
+        self.channel = channel
+        self.record_format = get_record_format(file_name)
+        self.max_file_bytes = max_file_bytes
+        self.max_file_s = max_file_s
+        self.queue = queue.Queue(RECORDER_QUEUE_SIZE)
+        self.thread = None
+        self.file = None
+        self.file_names = []
+        self.file_bytes = 0
+        self.file_start_timestamp = None
+        self.nmb_frames = 0
+        self.max_queue_size = 0
+        self.error = None
+
+    def is_rotating(self):
+        return self.max_file_bytes > 0 or self.max_file_s > 0
+
+    def start(self):
+        """
+        Open first file and start writer thread
+        :return:
+        """
+        self.__open_next_file()
+        self.thread = threading.Thread(target=self.__write_frames, name='BusRecorder', daemon=True)
+        self.thread.start()
+
+    def is_writing(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def add_frames(self, frames):
+        """
+        Hand received frames over to writer thread (blocks only when writer is far behind)
+        :param frames: list of (timestamp [s], 'struct can_frame' bytes)
+        :return: False when writer thread does not run (see 'error'), otherwise True
+        """
+        if not frames:
+            return self.is_writing()
+        if not self.__put(frames):
+            return False
+        self.max_queue_size = max(self.max_queue_size, self.queue.qsize())
+        return True
+
+    def stop(self):
+        """
+        Write all queued frames, stop writer thread and close file
+        :return: False when writing failed (see 'error'), otherwise True
+        """
+        if self.thread is not None:
+            self.__put(None)
+            self.thread.join()
+            self.thread = None
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError as error:
+                if self.error is None:
+                    self.error = error
+                    print('Error: Recording into {0} failed: {1}'.format(self.file_names[-1], error))
+            self.file = None
+        return self.error is None
+
+    def __put(self, item):
+        """
+        Put item into queue, waiting for free place ends when writer thread does not run
+        :param item: batch of frames or None (end of writing)
+        :return: True when item was put into queue
+        """
+        while self.is_writing():
+            try:
+                self.queue.put(item, timeout=RECORDER_PUT_TIMEOUT_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def print_statistics(self):
+        print('Recorded frames: {0} into {1} file(s): {2}'.format(self.nmb_frames, len(self.file_names),
+                                                               ', '.join(self.file_names)))
+        print('Max. writer queue: {0} / {1} batches'.format(self.max_queue_size, RECORDER_QUEUE_SIZE))
+
+    def __write_frames(self):
+        """
+        Writer thread - write batches of frames until stop() is called
+        :return:
+        """
+        while True:
+            frames = self.queue.get()
+            if frames is None:
+                return
+
+            try:
+                for timestamp, raw_frame in frames:
+                    if self.file_start_timestamp is None:
+                        self.file_start_timestamp = timestamp
+                    elif self.__is_rotation_due(timestamp):
+                        self.__open_next_file()
+                        self.file_start_timestamp = timestamp
+                    self.__write_record(timestamp, raw_frame)
+            except (OSError, ValueError, struct.error) as error:
+                self.error = error
+                print('Error: Recording into {0} failed: {1}'.format(self.file_names[-1], error))
+                return
+            self.nmb_frames += len(frames)
+
+    def __is_rotation_due(self, timestamp):
+        if self.max_file_bytes > 0 and self.file_bytes >= self.max_file_bytes:
+            return True
+        return self.max_file_s > 0 and timestamp - self.file_start_timestamp >= self.max_file_s
+
+    def __write_record(self, timestamp, raw_frame):
+        if self.record_format == BINARY:
+            record = get_binary_record(timestamp, raw_frame)
+        else:
+            record = get_candump_line(timestamp, self.channel, raw_frame).encode('ascii')
+        self.file.write(record)
+        self.file_bytes += len(record)
+
+    def __open_next_file(self):
+        """
+        Close actual file and open next one (with index in name when recording is rotated)
+        :return:
+        """
+        if self.file is not None:
+            self.file.close()
+
+        if self.is_rotating():
+            file_name = get_rotated_file_name(self.file_name, len(self.file_names))
+        else:
+            file_name = self.file_name
+        self.file = open(file_name, 'wb', buffering=WRITE_BUFFER_SIZE)
+        self.file_names.append(file_name)
+        self.file_bytes = 0
+
+        if self.record_format == BINARY:
+            header = struct.pack(file_io.COMPILED_HEADER_FORMAT, file_io.COMPILED_MAGIC, file_io.COMPILED_RECORD_SIZE)
+            self.file.write(header)
+            self.file_bytes += len(header)
@@ -0,0 +1,157 @@
+import time
+
+from src import can_simulator
+from src import candriver
+from src import param
+from src import recorder
+from src import sim_clock
+
+"""
+Offline rendering of simulation scenarios into trace file (no can interface needed)
+- scenario runs in virtual time (see sim_clock.VirtualClock), hours of simulation are rendered in seconds
+- every sent frame is written with its simulation timestamp into candump log ('*.log', '*.txt') or binary file
+  (the same format as compiled messages and recordings, see recorder module)
+- frames are handed over to recorder writer thread by batches, file is written by stream (scenario is not kept in
+  memory)
+- nothing is received, so request responses are not part of rendered trace
+"""
+
+RENDER_BATCH_SIZE = 1024  # frames handed over to writer thread at once
+
+
+class TraceRenderDriver:
+    """
+    CanDriver replacement writing sent frames into trace file instead of can socket
+    - frame timestamp is time of simulation clock when frame was sent (+ 'start_timestamp')
+    - receiving always times out immediately, kernel features (filters, BCM) are not available
+    """
+
+    def __init__(self, file_name, clock, channel='vcan0', start_timestamp=0.0):
+        """
+        :param file_name: output trace file (candump log for '*.log' / '*.txt', binary otherwise)
+        :param clock: simulation clock of simulator (see sim_clock module)
+        :param channel: interface name written into candump log
+        :param start_timestamp: timestamp [s] of simulation time 0
+        """
+        self.channel = channel
+        self.clock = clock
+        self.start_timestamp = start_timestamp
+        self.bus = None
+        self.enobufs_count = 0
+        self.received_count = 0
+        self.sent_count = 0
+        self.last_rx_time = None
+        self.last_tx_time = None
+        self.frames = []
+        self.bus_recorder = recorder.BusRecorder(file_name, channel)
+        self.bus_recorder.start()
+
+    def send_one_msg(self, can_msg):
+        """
+        Write one can message into trace
+        :param can_msg:
+        :return:
+        """
+        self.send_raw_batch([candriver.get_raw_frame(can_msg)])
+
+    def send_batch(self, can_msgs, max_block_seconds=1.0):
+        """
+        Write list of messages into trace (all with the same timestamp)
+        :param can_msgs: list of can messages
+        :param max_block_seconds: not used (writer never refuses frames)
+        :return: number of written messages
+        """
+        return self.send_raw_batch(candriver.get_raw_frames(can_msgs))
+
+    def send_raw_batch(self, raw_frames, max_block_seconds=1.0):
+        """
+        Write list of 'struct can_frame' bytes into trace (all with the same timestamp)
+        :param raw_frames:
+        :param max_block_seconds: not used (writer never refuses frames)
+        :return: number of written frames
+        """
+        self.last_tx_time = self.clock.now()
+        timestamp = self.start_timestamp + self.last_tx_time
+        self.frames.extend((timestamp, raw_frame) for raw_frame in raw_frames)
+        if len(self.frames) >= RENDER_BATCH_SIZE:
+            self.flush()
+        self.sent_count += len(raw_frames)
+        return len(raw_frames)
+
+    @staticmethod
+    def is_open():
+        return True
+
+    def flush(self):
+        """
+        Hand buffered frames over to writer thread
+        :return:
+        """
+        self.bus_recorder.add_frames(self.frames)
+        self.frames = []
+
+    def close(self):
+        """
+        Write all frames and close trace file
+        :return:
+        """
+        self.flush()
+        self.bus_recorder.stop()
+
+    @staticmethod
+    def wait_for_one_msg(max_timeout_seconds):
+        return None
+
+    @staticmethod
+    def wait_for_matching_msg(match_function, max_timeout_seconds):
+        return None
+
+    @staticmethod
+    def get_one_msg():
+        return None
+
+    @staticmethod
+    def get_response_time(tx_time=None):
+        return None
+
+    def set_pgn_filters(self, pgns):
+        pass
+
+    @staticmethod
+    def get_filtered_out_count():
+        return 0
+
+    @staticmethod
+    def start_periodic_msg(can_msg, period_s):
+        print('Error: Periodic messages of kernel cannot be rendered into trace!')
+        return None
+
+    def stop_all_periodic_msgs(self):
+        pass
+
+
+def render_scenario(cmd_parameters, channel='vcan0'):
+    """
+    Run simulator action in virtual time and write all sent frames into 'cmd_parameters.render_file_name'
+    :param cmd_parameters: param.Param with render_file_name and one of param.RENDER_ACTIONS
+    :param channel: interface name written into candump log
+    :return: number of rendered frames
+    """
+    if cmd_parameters.action is None:
+        return 0
+    if cmd_parameters.action not in param.RENDER_ACTIONS:
+        print('Error: Action {0} cannot be rendered into trace!'.format(cmd_parameters.action))
+        return 0
+
+    clock = sim_clock.VirtualClock()
+    driver = TraceRenderDriver(cmd_parameters.render_file_name, clock, channel)
+    start = time.monotonic()
+    try:
+        can_simulator.CanSimulator(cmd_parameters, channel, clock, driver).run_action()
+    finally:
+        driver.close()
+
+    duration = time.monotonic() - start
+    print('Rendered frames: {0} ({1:.3f} s of simulation) into {2} in {3:.3f} s'.format(
+        driver.sent_count, clock.now(), cmd_parameters.render_file_name, duration))
+    return driver.sent_count
@@ -0,0 +1,372 @@
+import heapq
+import math
+import time
+
+"""
+Helper classes to schedule periodic (cyclic) work with stable timing
+"""
+
+
+class PeriodStatistics:
+    """
+    Class to collect achieved period statistics of periodic action
+    - number of cycles
+    - min / max / mean achieved period
+    - jitter (standard deviation of achieved period)
+    - worst deviation from requested period
+    - number of missed (skipped) cycles
+    """
+
+    def __init__(self, period_s):
+        self.period_s = period_s
+        self.cycles = 0
+        self.missed_cycles = 0
+        self.min_period_s = None
+        self.max_period_s = None
+        self.max_deviation_s = 0.0
+        self.__sum = 0.0
+        self.__sum_sq = 0.0
+        self.__last_time = None
+
+    def add_cycle(self, actual_time):
+        """
+        Add time of one performed cycle
+        :param actual_time: monotonic time [s] when cycle was performed
+        :return:
+        """
+        if self.__last_time is not None:
+            achieved = actual_time - self.__last_time
+            self.cycles += 1
+            self.__sum += achieved
+            self.__sum_sq += achieved * achieved
+            if self.min_period_s is None or achieved < self.min_period_s:
+                self.min_period_s = achieved
+            if self.max_period_s is None or achieved > self.max_period_s:
+                self.max_period_s = achieved
+            self.max_deviation_s = max(self.max_deviation_s, abs(achieved - self.period_s))
+        self.__last_time = actual_time
+
+    def mean_period(self):
+        """
+        Mean achieved period [s]
+        :return: float or None when there is no complete cycle yet
+        """
+        if self.cycles == 0:
+            return None
+        return self.__sum / self.cycles
+
+    def jitter(self):
+        """
+        Jitter as standard deviation of achieved period [s]
+        :return: float or None when there is no complete cycle yet
+        """
+        if self.cycles == 0:
+            return None
+        mean = self.__sum / self.cycles
+        variance = max(self.__sum_sq / self.cycles - mean * mean, 0.0)
+        return math.sqrt(variance)
+
+    def print(self, name=''):
+        """
+        Print statistics in cmd shell
+        :param name: prefix of printed line
+        :return:
+        """
+        if self.cycles == 0:
+            print('{0}period {1:.3f} ms: not enough cycles for statistics'.format(name, self.period_s * 1000))
+            return
+        print('{0}period {1:.3f} ms: cycles={2}; mean={3:.3f} ms; min={4:.3f} ms; max={5:.3f} ms; '
+              'jitter={6:.3f} ms; max deviation={7:.3f} ms; missed={8}'
+              .format(name, self.period_s * 1000, self.cycles, self.mean_period() * 1000, self.min_period_s * 1000,
+                      self.max_period_s * 1000, self.jitter() * 1000, self.max_deviation_s * 1000,
+                      self.missed_cycles))
+
+
+def sleep_until(deadline, busy_wait_s=0.0, clock=time.monotonic):
+    """
+    Sleep until absolute deadline
+    :param deadline: absolute time [s] of 'clock'
+    :param busy_wait_s: last part of waiting [s] which is done by busy-wait (more precise than sleep)
+    :param clock: monotonic clock function
+    :return: actual time after waiting
+    """
+    remaining = deadline - clock()
+    if remaining > busy_wait_s:
+        time.sleep(remaining - busy_wait_s)
+
+    now = clock()
+    while now < deadline:
+        now = clock()
+    return now
+
+
+def wait_until(deadline, busy_wait_s=0.0, clock=time.monotonic, sim_clock=None):
+    """
+    Wait until absolute deadline of real or simulation clock
+    :param deadline: absolute time [s] of 'clock' (of 'sim_clock' when specified)
+    :param busy_wait_s: busy-wait part of waiting (used with real time clock only)
+    :param clock: monotonic clock function
+    :param sim_clock: sim_clock.RealClock / ScaledClock / VirtualClock or None
+    :return: actual time after waiting
+    """
+    if sim_clock is None or sim_clock.is_real:
+        return sleep_until(deadline, busy_wait_s, clock)
+    sim_clock.wait_until(deadline)
+    return sim_clock.now()
+
+
+class PeriodicScheduler:
+    """
+    Scheduler for one periodic action working from absolute monotonic deadlines
+    - n-th cycle is due at 'start + n * period' so sending time and sleep overshoot do not accumulate (no drift)
+    - optional busy-wait for the last part of each period
+    - cycles which are already overdue by whole period are skipped (no burst after long stall)
+    - achieved period and jitter statistics
+    - optional simulation clock (see sim_clock module) replaces 'clock' and waiting
+    """
+
+    def __init__(self, period_s, busy_wait_s=0.0, clock=time.monotonic, sim_clock=None):
+        self.period_s = period_s
+        self.busy_wait_s = busy_wait_s
+        self.clock = clock if sim_clock is None else sim_clock.now
+        self.sim_clock = sim_clock
+        self.statistics = PeriodStatistics(period_s)
+        self.start_time = None
+        self.next_deadline = None
+        self.__cycle_index = 0
+
+    def start(self, start_time=None):
+        """
+        Start scheduler - first cycle is due immediately
+        :param start_time: optional absolute start time
+        :return:
+        """
+        self.start_time = self.clock() if start_time is None else start_time
+        self.next_deadline = self.start_time
+        self.__cycle_index = 0
+
+    def wait_next(self):
+        """
+        Wait for next cycle deadline
+        :return: actual time of this cycle
+        """
+        if self.start_time is None:
+            self.start()
+
+        now = wait_until(self.next_deadline, self.busy_wait_s, self.clock, self.sim_clock)
+        self.statistics.add_cycle(now)
+
+        self.__cycle_index += 1
+        self.next_deadline = self.start_time + self.__cycle_index * self.period_s
+        if now >= self.next_deadline and self.period_s > 0:
+            # Stalled for whole period(s) - skip missed cycles instead of sending them in burst
+            missed = int((now - self.next_deadline) // self.period_s) + 1
+            self.statistics.missed_cycles += missed
+            self.__cycle_index += missed
+            self.next_deadline = self.start_time + self.__cycle_index * self.period_s
+        return now
+
+    def run_for(self, action, duration_s):
+        """
+        Call action periodically for specific time
+        :param action: function without parameters called once per cycle
+        :param duration_s: duration [s]
+        :return: statistics of achieved period
+        """
+        if self.period_s <= 0:
+            raise ValueError('Period must be positive, not {0}'.format(self.period_s))
+
+        self.start()
+        # Cycle count is derived from integer cycle index (float sum of periods would drift over the end time)
+        nmb_cycles = int(round(duration_s / self.period_s, 6)) + 1
+        while self.__cycle_index < nmb_cycles:
+            self.wait_next()
+            action()
+        return self.statistics
+
+    def run_count(self, action, count):
+        """
+        Call action periodically specific number of times
+        :param action: function without parameters called once per cycle
+        :param count: number of cycles
+        :return: statistics of achieved period
+        """
+        self.start()
+        for i in range(count):
+            self.wait_next()
+            action()
+        return self.statistics
+
+
+class CyclicJob:
+    """
+    One job of CyclicScheduler
+    - periodic job (period > 0) is performed at 'start + n * period'
+    - one-shot job (period = None) is performed once at its deadline
+    """
+
+    def __init__(self, name, action, period_s=None, start_time=0.0):
+        self.name = name
+        self.action = action
+        self.period_s = period_s
+        self.start_time = start_time
+        self.deadline = start_time
+        self.cycle_index = 0
+        self.active = True
+        self.statistics = PeriodStatistics(period_s) if period_s is not None else None
+
+    def reschedule(self, now):
+        """
+        Move deadline to next cycle, skip cycles which are already overdue by whole period
+        :param now: actual time
+        :return:
+        """
+        self.cycle_index += 1
+        self.deadline = self.start_time + self.cycle_index * self.period_s
+        if now >= self.deadline and self.period_s > 0:
+            missed = int((now - self.deadline) // self.period_s) + 1
+            self.statistics.missed_cycles += missed
+            self.cycle_index += missed
+            self.deadline = self.start_time + self.cycle_index * self.period_s
+
+
+class CyclicScheduler:
+    """
+    Multi-rate scheduler: many periodic and one-shot jobs served from one heap of absolute deadlines
+    - every periodic job keeps its own rate (e.g. EEC1 20ms, CCVS 100ms, VDHR 1s) without thread per message
+    - time between deadlines is given to 'idle handler' (e.g. waiting for request messages with timeout),
+      so request handling does not stall transmit timing
+    - achieved period statistics per periodic job
+    - optional 'lateness_handler(job, lateness_s)' is told how late each periodic job was started
+    - optional simulation clock (see sim_clock module) replaces 'clock' and waiting, with virtual clock the time
+      jumps from deadline to deadline and idle handler is not called
+    """
+
+    def __init__(self, busy_wait_s=0.0, clock=time.monotonic, lateness_handler=None, sim_clock=None):
+        self.busy_wait_s = busy_wait_s
+        self.clock = clock if sim_clock is None else sim_clock.now
+        self.sim_clock = sim_clock
+        self.lateness_handler = lateness_handler
+        self.jobs = []
+        self.__heap = []
+        self.__sequence = 0
+        self.__stopped = False
+
+    def __push(self, job):
+        heapq.heappush(self.__heap, (job.deadline, self.__sequence, job))
+        self.__sequence += 1
+
+    def add_periodic(self, name, period_s, action, offset_s=0.0):
+        """
+        Add periodic job
+        :param name: job name (used in statistics)
+        :param period_s: period [s]
+        :param action: function without parameters called once per period
+        :param offset_s: delay [s] of the first cycle
+        :return: CyclicJob
+        """
+        if period_s <= 0:
+            raise ValueError('Period of cyclic job {0} must be positive, not {1}'.format(name, period_s))
+
+        job = CyclicJob(name, action, period_s, self.clock() + offset_s)
+        self.jobs.append(job)
+        self.__push(job)
+        return job
+
+    def add_one_shot(self, delay_s, action, name='one-shot'):
+        """
+        Add job which is performed once after specific delay
+        :param delay_s: delay [s] from now
+        :param action: function without parameters
+        :param name: job name
+        :return: CyclicJob
+        """
+        job = CyclicJob(name, action, None, self.clock() + delay_s)
+        self.__push(job)
+        return job
+
+    @staticmethod
+    def remove(job):
+        """
+        Remove job - it is dropped lazily when its deadline is reached
+        :param job: CyclicJob
+        :return:
+        """
+        job.active = False
+
+    def stop(self):
+        """
+        Stop running scheduler (can be called from job action or idle handler)
+        :return:
+        """
+        self.__stopped = True
+
+    def time_to_next_deadline(self):
+        """
+        Time [s] remaining to the earliest deadline (None when there is no job)
+        :return:
+        """
+        if not self.__heap:
+            return None
+        return self.__heap[0][0] - self.clock()
+
+    def run_due_jobs(self):
+        """
+        Perform all jobs with deadline in the past
+        :return: number of performed jobs
+        """
+        performed = 0
+        now = self.clock()
+        while self.__heap and self.__heap[0][0] <= now:
+            deadline, sequence, job = heapq.heappop(self.__heap)
+            if not job.active:
+                continue
+
+            if self.lateness_handler is not None and job.period_s is not None:
+                self.lateness_handler(job, now - deadline)
+            job.action()
+            performed += 1
+
+            if job.period_s is not None:
+                job.statistics.add_cycle(now)
+                job.reschedule(now)
+                self.__push(job)
+            now = self.clock()
+        return performed
+
+    def run_for(self, duration_s, idle_handler=None):
+        """
+        Run scheduler for specific time
+        :param duration_s: duration [s]
+        :param idle_handler: function(timeout_s) called while waiting for next deadline, it must return in timeout
+        :return:
+        """
+        end_time = self.clock() + duration_s
+        self.__stopped = False
+
+        while not self.__stopped:
+            self.run_due_jobs()
+
+            now = self.clock()
+            if now >= end_time:
+                break
+
+            next_deadline = end_time if not self.__heap else min(self.__heap[0][0], end_time)
+            remaining = next_deadline - now
+            if remaining <= self.busy_wait_s:
+                wait_until(next_deadline, remaining, self.clock, self.sim_clock)
+            elif idle_handler is not None and not self.is_virtual():
+                idle_handler(remaining - self.busy_wait_s)
+            else:
+                wait_until(next_deadline, self.busy_wait_s, self.clock, self.sim_clock)
+
+    def is_virtual(self):
+        return self.sim_clock is not None and self.sim_clock.is_virtual
+
+    def print_statistics(self):
+        """
+        Print achieved period statistics of all periodic jobs
+        :return:
+        """
+        for job in self.jobs:
+            job.statistics.print('{0}: '.format(job.name))
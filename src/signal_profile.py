@@ -0,0 +1,255 @@
+import re
+
+from src import frame_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Signal profiles of ELD simulation stages (value changes during stage instead of step at its start)
+- constant:          speed=20
+- ramp:              speed=ramp(0,80)                 linear change from first to second value over stage duration
+- sine:              engine_rpm=sine(1200,300,10)     mean, amplitude, period [s]
+- noise:             speed=noise(80,2)                mean, standard deviation (gaussian, reproducible seed)
+- piecewise-linear:  speed=pwl(0:0,30:80,60:80)       time [s]:value points, last value is held
+- values of every broadcast cycle are computed by NumPy before stage is run and converted into payload bytes,
+  sending a frame only copies precomputed bytes into preallocated frame
+- vehicle distance is integrated from vehicle speed, engine hours advance while engine speed is not zero, both
+  continue from end of previous stage
+- noise of every signal in every stage has its own reproducible seed (see get_noise_seed())
+- NumPy is optional dependency - it is needed only for stages with profiles
+"""
+
+PROFILE_PATTERN = re.compile(r'^\s*(\w+)\s*\((.*)\)\s*$')
+PROFILE_NMB_PARAMETERS = {'ramp': 2, 'sine': 3, 'noise': 2}
+NOISE_SEED = 1939
+
+
+def is_available():
+    """
+    Check if NumPy is installed
+    :return: bool
+    """
+    return numpy is not None
+
+
+def is_profile(value_str):
+    """
+    Check if value from simulation file is profile (e.g. 'ramp(0,80)'), not constant
+    :param value_str:
+    :return: bool
+    """
+    return PROFILE_PATTERN.match(value_str) is not None
+
+
+def parse_profile(value_str):
+    """
+    Parse profile from simulation file
+    :param value_str: e.g. 'ramp(0,80)', 'sine(1200,300,10)', 'noise(80,2)', 'pwl(0:0,30:80)'
+    :return: SignalProfile or None when profile cannot be parsed
+    """
+    match = PROFILE_PATTERN.match(value_str)
+    if match is None:
+        print('Error: Value \'{0}\' is not signal profile!'.format(value_str))
+        return None
+
+    kind = match.group(1)
+    arguments = [argument.strip() for argument in match.group(2).split(',')]
+    try:
+        if kind == 'pwl':
+            points = [tuple(float(x) for x in argument.split(':')) for argument in arguments]
+            if not points or any(len(point) != 2 for point in points) or \
+                    any(points[i][0] >= points[i + 1][0] for i in range(len(points) - 1)):
+                raise ValueError(value_str)
+            return SignalProfile(kind, points)
+
+        parameters = [float(argument) for argument in arguments]
+    except ValueError:
+        print('Error: Cannot parse parameters of signal profile \'{0}\'!'.format(value_str))
+        return None
+
+    if PROFILE_NMB_PARAMETERS.get(kind) != len(parameters):
+        print('Error: Unknown signal profile or wrong number of its parameters: \'{0}\'!'.format(value_str))
+        return None
+    if kind == 'sine' and parameters[2] <= 0:
+        print('Error: Period of sine profile must be positive number: \'{0}\'!'.format(value_str))
+        return None
+    return SignalProfile(kind, parameters)
+
+
+class SignalProfile:
+    """
+    Physical value of signal as function of time from stage start
+    """
+
+    def __init__(self, kind, parameters):
+        """
+        :param kind: 'const', 'ramp', 'sine', 'noise' or 'pwl'
+        :param parameters: list of parameters (list of (time, value) points for 'pwl')
+        """
+        self.kind = kind
+        self.parameters = parameters
+
+    def get_start_value(self):
+        if self.kind == 'pwl':
+            return self.parameters[0][1]
+        return self.parameters[0]
+
+    def get_values(self, times, duration_s, seed=NOISE_SEED):
+        """
+        Compute values for all times at once (negative values are clipped to 0)
+        :param times: numpy array of times [s] from stage start
+        :param duration_s: stage duration [s] (end of ramp)
+        :param seed: seed of noise generator (int or list of ints, see get_noise_seed())
+        :return: numpy array of physical values
+        """
+        if self.kind == 'ramp':
+            start, end = self.parameters
+            fraction = times / duration_s if duration_s > 0 else numpy.ones(len(times))
+            values = start + (end - start) * fraction
+        elif self.kind == 'sine':
+            mean, amplitude, period_s = self.parameters
+            values = mean + amplitude * numpy.sin(2 * numpy.pi * times / period_s)
+        elif self.kind == 'noise':
+            mean, deviation = self.parameters
+            values = numpy.random.default_rng(seed).normal(mean, deviation, len(times))
+        elif self.kind == 'pwl':
+            values = numpy.interp(times, [point[0] for point in self.parameters],
+                                  [point[1] for point in self.parameters])
+        else:
+            values = numpy.full(len(times), float(self.parameters[0]))
+        return numpy.maximum(values, 0.0)
+
+
+def get_noise_seed(stage_index, signal):
+    """
+    Seed of noise generator unique for signal and stage (the same scenario always gives the same noise)
+    :param stage_index: index of stage in simulation file
+    :param signal: frame_cache.SignalDefinition
+    :return: list of ints
+    """
+    return [NOISE_SEED, stage_index, signal.pgn, signal.first_byte]
+
+
+def get_constant_stage_end(msg_group, start_distance_m, start_hours):
+    """
+    Distance and engine hours at end of stage with constant values (does not need NumPy)
+    :param msg_group: ELD_msg_group
+    :param start_distance_m: distance [m] at stage start
+    :param start_hours: engine hours [h] at stage start
+    :return: (distance [m], engine hours [h])
+    """
+    end_distance_m = start_distance_m + max(msg_group.vehicle_speed, 0) / 3.6 * msg_group.duration
+    end_hours = start_hours + (msg_group.duration / 3600.0 if msg_group.engine_speed > 0 else 0.0)
+    return end_distance_m, end_hours
+
+
+def get_times(duration_s, cycle_s):
+    """
+    Times of all cycles of periodic message in stage (cycle n is sent at n * cycle_s, both ends included)
+    :param duration_s:
+    :param cycle_s:
+    :return: numpy array
+    """
+    return numpy.arange(int(round(duration_s / cycle_s, 6)) + 1) * cycle_s
+
+
+def get_cumulative_integral(values, step_s):
+    """
+    Cumulative trapezoidal integral of equidistant samples
+    :param values: numpy array
+    :param step_s: time between samples [s]
+    :return: numpy array (the same length as values, starts with 0)
+    """
+    return numpy.concatenate(([0.0], numpy.cumsum((values[1:] + values[:-1]) * (step_s / 2.0))))
+
+
+def get_payloads(signal, values):
+    """
+    Convert physical values into little endian raw value bytes of signal
+    - raw values are clipped to J1939 valid range (0xFAFF for 2 bytes, 0xFAFFFFFF for 4 bytes)
+    :param signal: frame_cache.SignalDefinition
+    :param values: numpy array of physical values
+    :return: bytes (signal.nmb_bytes per value)
+    """
+    max_raw = (0xFB << (8 * (signal.nmb_bytes - 1))) - 1
+    raw_values = numpy.clip(numpy.rint(values / signal.gain), 0, max_raw).astype('<u4')
+    return raw_values.view(numpy.uint8).reshape(-1, 4)[:, :signal.nmb_bytes].tobytes()
+
+
+class ProfileFrame:
+    """
+    Preallocated signal frame with precomputed payloads of all cycles
+    """
+
+    def __init__(self, signal, values, source_address=0x01):
+        self.signal = signal
+        self.msg = frame_cache.SignalFrame(signal, source_address).msg
+        self.payloads = get_payloads(signal, values)
+        self.nmb_cycles = len(values)
+
+    def get_msg(self, cycle_index):
+        """
+        Patch frame by payload of cycle (last value is held after end of profile)
+        :param cycle_index:
+        :return: can message
+        """
+        offset = min(cycle_index, self.nmb_cycles - 1) * self.signal.nmb_bytes
+        first_byte = self.signal.first_byte
+        self.msg.data[first_byte:first_byte + self.signal.nmb_bytes] = \
+            self.payloads[offset:offset + self.signal.nmb_bytes]
+        return self.msg
+
+
+class StageProfile:
+    """
+    Precomputed frames of one ELD stage
+    - EEC1 (engine speed) and CCVS (vehicle speed) follow their profiles
+    - VDHR (distance) starts at 'start_distance_m' and is integrated from vehicle speed
+    - engine hours start at 'start_hours' and advance while engine speed is not zero
+    - stage without profiles is simulated as constant profiles
+    """
+
+    def __init__(self, msg_group, eec1_cycle_s, ccvs_cycle_s, vdhr_cycle_s, hours_cycle_s, source_address=0x01,
+                 stage_index=0, start_distance_m=None, start_hours=None):
+        """
+        :param msg_group: ELD_msg_group with 'profiles' ('speed' / 'engine_rpm' -> SignalProfile)
+        :param eec1_cycle_s: cycle times [s] of messages
+        :param ccvs_cycle_s:
+        :param vdhr_cycle_s:
+        :param hours_cycle_s: update cycle of Engine hours response
+        :param source_address: J1939 source address of frames
+        :param stage_index: index of stage in simulation file (selects noise seeds)
+        :param start_distance_m: distance at stage start (end of previous stage), None = stage value
+        :param start_hours: engine hours at stage start (end of previous stage), None = stage value
+        """
+        if start_distance_m is None:
+            start_distance_m = msg_group.vehicle_distance
+        if start_hours is None:
+            start_hours = msg_group.engine_hours
+        duration_s = msg_group.duration
+        speed_profile = msg_group.profiles.get('speed', SignalProfile('const', [msg_group.vehicle_speed]))
+        rpm_profile = msg_group.profiles.get('engine_rpm', SignalProfile('const', [msg_group.engine_speed]))
+
+        ccvs_times = get_times(duration_s, ccvs_cycle_s)
+        speed_kmh = speed_profile.get_values(ccvs_times, duration_s,
+                                             get_noise_seed(stage_index, frame_cache.CCVS_VEHICLE_SPEED))
+        distance_m = start_distance_m + get_cumulative_integral(speed_kmh / 3.6, ccvs_cycle_s)
+
+        eec1_times = get_times(duration_s, eec1_cycle_s)
+        rpm = rpm_profile.get_values(eec1_times, duration_s, get_noise_seed(stage_index, frame_cache.EEC1_ENGINE_SPEED))
+        running = (rpm > 0).astype(numpy.float64)
+        hours = start_hours + get_cumulative_integral(running, eec1_cycle_s) / 3600.0
+
+        vdhr_times = get_times(duration_s, vdhr_cycle_s)
+        hours_times = get_times(duration_s, hours_cycle_s)
+        self.eec1 = ProfileFrame(frame_cache.EEC1_ENGINE_SPEED, rpm, source_address)
+        self.ccvs = ProfileFrame(frame_cache.CCVS_VEHICLE_SPEED, speed_kmh, source_address)
+        self.vdhr = ProfileFrame(frame_cache.VDHR_DISTANCE, numpy.interp(vdhr_times, ccvs_times, distance_m),
+                                 source_address)
+        self.hours = ProfileFrame(frame_cache.ENGINE_HOURS, numpy.interp(hours_times, eec1_times, hours),
+                                  source_address)
+        self.end_distance_m = float(distance_m[-1])
+        self.end_hours = float(hours[-1])
@@ -0,0 +1,105 @@
+import time
+
+"""
+Simulation clocks used by schedulers
+- RealClock:    monotonic time, simulation runs in real time
+- ScaledClock:  simulation time runs N-times faster (or slower) than real time
+- VirtualClock: simulation time jumps to next deadline immediately (offline runs as fast as CPU allows)
+All clocks have the same interface: now(), wait_until(deadline), get_real_timeout(timeout_s)
+"""
+
+
+class RealClock:
+    """
+    Monotonic real time clock
+    """
+
+    is_real = True
+    is_virtual = False
+    speed = 1.0
+
+    @staticmethod
+    def now():
+        return time.monotonic()
+
+    def wait_until(self, deadline):
+        """
+        Sleep until simulation time reaches deadline
+        :param deadline: simulation time [s]
+        :return:
+        """
+        remaining = deadline - self.now()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    @staticmethod
+    def get_real_timeout(timeout_s):
+        """
+        Convert simulation duration into real time (e.g. timeout of waiting for can message)
+        :param timeout_s: simulation duration [s]
+        :return: real duration [s]
+        """
+        return timeout_s
+
+
+class ScaledClock(RealClock):
+    """
+    Clock running 'speed'-times faster than real time (simulation starts at 0)
+    """
+
+    is_real = False
+
+    def __init__(self, speed):
+        """
+        :param speed: 2 = simulation time runs twice as fast as real time
+        """
+        self.speed = speed
+        self.real_start_time = time.monotonic()
+
+    def now(self):
+        return (time.monotonic() - self.real_start_time) * self.speed
+
+    def wait_until(self, deadline):
+        remaining = deadline - self.now()
+        if remaining > 0:
+            time.sleep(remaining / self.speed)
+
+    def get_real_timeout(self, timeout_s):
+        return timeout_s / self.speed
+
+
+class VirtualClock(RealClock):
+    """
+    Clock driven only by waiting - waiting for deadline moves clock to the deadline without delay
+    """
+
+    is_real = False
+    is_virtual = True
+    speed = 0.0
+
+    def __init__(self, start_time=0.0):
+        self.time = start_time
+
+    def now(self):
+        return self.time
+
+    def wait_until(self, deadline):
+        if deadline > self.time:
+            self.time = deadline
+
+    @staticmethod
+    def get_real_timeout(timeout_s):
+        return 0.0
+
+
+def get_clock(speed=None):
+    """
+    Get simulation clock for speed multiplier
+    :param speed: None or 1 = real time, 0 = virtual time (as fast as possible), N = N-times faster than real time
+    :return: RealClock, ScaledClock or VirtualClock
+    """
+    if speed is None or speed == 1:
+        return RealClock()
+    if speed == 0:
+        return VirtualClock()
+    return ScaledClock(speed)
@@ -0,0 +1,135 @@
+from src import j1939
+
+"""
+Helper methods to read can-bus traces (logs) as stream
+- candump log:  (1436509052.249713) can0 18FEF101#000A000000000000
+- Vector ASC:   0.004400 1  18FEF101x       Rx   d 8 00 0A 00 00 00 00 00 00
+"""
+
+CANDUMP = 'candump'
+ASC = 'asc'
+
+
+def get_trace_format(file_name):
+    """
+    Get trace format from file name
+    :param file_name:
+    :return: ASC or CANDUMP
+    """
+    if file_name.lower().endswith('.asc'):
+        return ASC
+    return CANDUMP
+
+
+def iter_trace(file_name):
+    """
+    Read trace file lazily (format is detected from file name)
+    :param file_name: candump log or Vector ASC file
+    :return: generator of (timestamp [s], can message)
+    """
+    if get_trace_format(file_name) == ASC:
+        return iter_asc(file_name)
+    return iter_candump(file_name)
+
+
+def get_trace_message(arbitration_id, data, extended, remote_dlc=None):
+    """
+    Build can message from trace (trace can contain 11-bit and 29-bit IDs and remote frames)
+    :param arbitration_id:
+    :param data: list of bytes
+    :param extended: 29-bit ID
+    :param remote_dlc: DLC of remote frame (None = data frame)
+    :return: can.Message
+    """
+    msg = j1939.get_message(arbitration_id, data)
+    if not extended:
+        msg.is_extended_id = False
+    if remote_dlc is not None:
+        msg.is_remote_frame = True
+        msg.dlc = remote_dlc
+    return msg
+
+
+def parse_candump_line(line):
+    """
+    Parse one line of candump log ('candump -l' / 'candump -L' format)
+    :param line:
+    :return: (timestamp [s], can message) or None when line is not can frame
+    """
+    items = line.split()
+    if len(items) < 3 or not items[0].startswith('(') or '#' not in items[2]:
+        return None
+
+    try:
+        timestamp = float(items[0].strip('()'))
+        id_str, data_str = items[2].split('#', 1)
+        arbitration_id = int(id_str, 16)
+        remote_dlc = None
+        if data_str.startswith('R'):
+            # remote frame, optionally with requested DLC ('R' or 'R8')
+            data = []
+            remote_dlc = int(data_str[1:]) if len(data_str) > 1 else 0
+        else:
+            data = [int(data_str[i:i + 2], 16) for i in range(0, len(data_str), 2)]
+    except ValueError:
+        print('Error: Cannot parse candump line: {0}'.format(line.strip()))
+        return None
+
+    return timestamp, get_trace_message(arbitration_id, data, len(id_str) > 3, remote_dlc)
+
+
+def iter_candump(file_name):
+    """
+    Read candump log lazily
+    :param file_name:
+    :return: generator of (timestamp [s], can message)
+    """
+    with open(file_name) as f:
+        for line in f:
+            frame = parse_candump_line(line)
+            if frame is not None:
+                yield frame
+
+
+def parse_asc_line(line, base=16):
+    """
+    Parse one can frame line of Vector ASC file
+    :param line:
+    :param base: 16 ('base hex') or 10 ('base dec')
+    :return: (timestamp [s], can message) or None when line is not can frame
+    """
+    items = line.split()
+    # <time> <channel> <id>[x] <Rx|Tx> d <dlc> <data bytes> ...
+    if len(items) < 6 or not items[1].isdigit() or items[4] != 'd':
+        return None
+
+    try:
+        timestamp = float(items[0])
+        id_str = items[2]
+        extended = id_str.endswith('x')
+        arbitration_id = int(id_str.rstrip('x'), base)
+        dlc = int(items[5])
+        data = [int(x, base) for x in items[6:6 + dlc]]
+    except ValueError:
+        print('Error: Cannot parse ASC line: {0}'.format(line.strip()))
+        return None
+
+    return timestamp, get_trace_message(arbitration_id, data, extended)
+
+
+def iter_asc(file_name):
+    """
+    Read Vector ASC file lazily
+    :param file_name:
+    :return: generator of (timestamp [s], can message)
+    """
+    base = 16
+    with open(file_name) as f:
+        for line in f:
+            if line.startswith('base'):
+                base = 10 if line.split()[1] == 'dec' else 16
+                continue
+
+            frame = parse_asc_line(line, base)
+            if frame is not None:
+                yield frame
@@ -0,0 +1,357 @@
+import time
+
+from src import j1939
+
+"""
+J1939 transport protocol (multi-packet messages)
+- BAM (Broadcast Announce Message) for global destination
+- CMDT (RTS/CTS Connection Mode Data Transfer) for specific destination
+- reassembly of incoming multi-packet messages
+"""
+
+# TP.CM control bytes
+TP_CM_RTS = 16
+TP_CM_CTS = 17
+TP_CM_END_OF_MSG_ACK = 19
+TP_CM_BAM = 32
+TP_CM_ABORT = 255
+
+TP_PRIORITY = 6
+TP_MAX_SIZE = 1785  # 255 packets * 7 bytes
+TP_PACKET_SIZE = 7
+
+# J1939-21 timeouts [s]
+T1_S = 0.750  # receiver: time between data packets
+T2_S = 1.250  # receiver: time after CTS for data packet
+T3_S = 1.250  # sender: time after last data packet for CTS or End of msg ACK
+
+MIN_PACKET_GAP_S = 0.010
+MAX_PACKET_GAP_S = 0.200
+
+ABORT_TIMEOUT = 3
+ABORT_BAD_SEQUENCE = 7
+
+
+def get_packets(data):
+    """
+    Split payload into TP.DT data packets (sequence number + 7 bytes, last packet padded by 0xFF)
+    :param data: payload bytes
+    :return: list of 8 byte lists
+    """
+    packets = []
+    for i in range(0, len(data), TP_PACKET_SIZE):
+        chunk = list(data[i:i + TP_PACKET_SIZE])
+        chunk += [0xFF] * (TP_PACKET_SIZE - len(chunk))
+        packets.append([len(packets) + 1] + chunk)
+    return packets
+
+
+def get_cm_data(control_byte, byte1, byte2, byte3, byte4, pgn):
+    """
+    Build TP.CM data bytes
+    :return: list of 8 bytes
+    """
+    return [control_byte, byte1, byte2, byte3, byte4, pgn & 0xFF, (pgn >> 8) & 0xFF, (pgn >> 16) & 0xFF]
+
+
+class TransmitSession:
+    """
+    Outgoing multi-packet message
+    """
+
+    def __init__(self, pgn, data, destination):
+        self.pgn = pgn
+        self.data = data
+        self.destination = destination
+        self.packets = get_packets(data)
+        self.next_packet = 0  # index of next packet to send
+        self.last_packet = len(self.packets)  # packets are sent up to this index (CTS window for CMDT)
+        self.next_time = 0.0
+        self.waiting_for_cts = False
+        self.timeout_time = None
+        self.completed = False
+
+    def is_broadcast(self):
+        return self.destination == j1939.GLOBAL_ADDRESS
+
+
+class ReceiveSession:
+    """
+    Incoming multi-packet message
+    """
+
+    def __init__(self, pgn, size, nmb_packets, source, broadcast, max_packets_per_cts=0xFF):
+        self.pgn = pgn
+        self.size = size
+        self.nmb_packets = nmb_packets
+        self.source = source
+        self.broadcast = broadcast
+        self.max_packets_per_cts = max_packets_per_cts or 0xFF  # limit of sender from RTS (0xFF = no limit)
+        self.data = []
+        self.next_sequence = 1
+        self.window_end = nmb_packets  # last sequence number granted by CTS
+        self.timeout_time = None
+
+
+class TransportProtocol:
+    """
+    Non-blocking J1939 transport protocol engine
+    - segments any payload into BAM or RTS/CTS session
+    - several sessions run at once (one BAM and one CMDT session per destination, others are queued)
+    - configurable gap between data packets
+    - frames are sent from 'poll' which is re-scheduled by 'schedule_function' (e.g. CyclicScheduler.add_one_shot),
+      so request handling and periodic broadcasts keep running while transfer is in progress
+    - incoming BAM / CMDT messages are reassembled and passed to 'receive_function'
+    """
+
+    def __init__(self, send_function, source_address, schedule_function=None, packet_gap_s=0.050,
+                 receive_function=None, clock=time.monotonic):
+        """
+        :param send_function: function(can_msg) sending one frame
+        :param source_address: J1939 address of this node
+        :param schedule_function: function(delay_s, action) calling action after delay or None (call poll yourself)
+        :param packet_gap_s: gap between data packets [s]
+        :param receive_function: function(pgn, data, source_address) called for every reassembled message
+        :param clock: monotonic clock function
+        """
+        if not MIN_PACKET_GAP_S <= packet_gap_s <= MAX_PACKET_GAP_S:
+            print('Warning: TP packet gap {0} ms is out of J1939 range ({1} - {2} ms)'.format(
+                packet_gap_s * 1000, MIN_PACKET_GAP_S * 1000, MAX_PACKET_GAP_S * 1000))
+
+        self.send_function = send_function
+        self.source_address = source_address
+        self.schedule_function = schedule_function
+        self.packet_gap_s = packet_gap_s
+        self.receive_function = receive_function
+        self.clock = clock
+        self.tx_sessions = {}  # destination address -> TransmitSession
+        self.tx_queue = []
+        self.rx_sessions = {}  # (source address, broadcast flag) -> ReceiveSession
+        self.aborted_sessions = 0
+        self.__scheduled_time = None
+
+    def send(self, pgn, data, destination=j1939.GLOBAL_ADDRESS):
+        """
+        Start sending multi-packet message (BAM for global destination, RTS/CTS otherwise)
+        :param pgn: PGN of message
+        :param data: payload bytes (9 - 1785 bytes)
+        :param destination: destination address
+        :return: True if session was started or queued
+        """
+        if len(data) > TP_MAX_SIZE:
+            print('Error: TP message {0:X} is too long ({1} bytes)'.format(pgn, len(data)))
+            return False
+
+        session = TransmitSession(pgn, list(data), destination)
+        if destination in self.tx_sessions:
+            self.tx_queue.append(session)
+        else:
+            self.__start_session(session)
+        return True
+
+    def is_idle(self):
+        """
+        Check if there is no transfer in progress
+        :return: bool
+        """
+        return not self.tx_sessions and not self.tx_queue and not self.rx_sessions
+
+    def poll(self):
+        """
+        Send frames which are due, check timeouts and schedule next poll
+        :return: time [s] to next event or None when there is nothing to do
+        """
+        self.__scheduled_time = None
+        now = self.clock()
+
+        for session in list(self.tx_sessions.values()):
+            if session.timeout_time is not None and now >= session.timeout_time:
+                self.__abort_tx_session(session, ABORT_TIMEOUT)
+            elif not session.waiting_for_cts and now >= session.next_time:
+                self.__send_next_packet(session, now)
+
+        for key, session in list(self.rx_sessions.items()):
+            if session.timeout_time is not None and now >= session.timeout_time:
+                del self.rx_sessions[key]
+                self.aborted_sessions += 1
+                if not session.broadcast:
+                    self.__send_cm(session.source, get_cm_data(TP_CM_ABORT, ABORT_TIMEOUT, 0xFF, 0xFF, 0xFF,
+                                                                session.pgn))
+
+        return self.__schedule_next_poll()
+
+    def on_message(self, msg):
+        """
+        Process received frame (TP.CM or TP.DT), other frames are ignored
+        :param msg: can message
+        :return: True if frame belongs to transport protocol
+        """
+        pgn = j1939.get_pgn(msg.arbitration_id)
+        if pgn != j1939.PGN_TP_CM and pgn != j1939.PGN_TP_DT:
+            return False
+
+        destination = j1939.get_destination_address(msg.arbitration_id)
+        if destination != self.source_address and destination != j1939.GLOBAL_ADDRESS:
+            return True
+
+        source = j1939.get_source_address(msg.arbitration_id)
+        if pgn == j1939.PGN_TP_CM:
+            self.__on_cm(msg.data, source, destination == j1939.GLOBAL_ADDRESS)
+        else:
+            self.__on_dt(msg.data, source, destination == j1939.GLOBAL_ADDRESS)
+
+        self.__schedule_next_poll()
+        return True
+
+    def __start_session(self, session):
+        self.tx_sessions[session.destination] = session
+        size = len(session.data)
+        nmb_packets = len(session.packets)
+        now = self.clock()
+
+        # Session state is updated before frame is sent (response can be processed before send returns)
+        if session.is_broadcast():
+            session.next_time = now + self.packet_gap_s
+            self.__send_cm(session.destination, get_cm_data(TP_CM_BAM, size & 0xFF, size >> 8, nmb_packets, 0xFF,
+                                                            session.pgn))
+        else:
+            session.waiting_for_cts = True
+            session.timeout_time = now + T3_S
+            self.__send_cm(session.destination, get_cm_data(TP_CM_RTS, size & 0xFF, size >> 8, nmb_packets, 0xFF,
+                                                            session.pgn))
+        self.__schedule_next_poll()
+
+    def __send_next_packet(self, session, now):
+        packet = session.packets[session.next_packet]
+        session.next_packet += 1
+
+        if session.next_packet >= session.last_packet:
+            if session.is_broadcast():
+                self.__finish_tx_session(session)
+            else:
+                # Wait for next CTS or End of message ACK
+                session.waiting_for_cts = True
+                session.timeout_time = now + T3_S
+        else:
+            session.next_time = now + self.packet_gap_s
+
+        self.send_function(j1939.get_message(self.__get_id(j1939.PGN_TP_DT, session.destination), packet))
+
+    def __on_cm(self, data, source, broadcast):
+        control_byte = data[0]
+        pgn = data[5] | (data[6] << 8) | (data[7] << 16)
+
+        if control_byte in (TP_CM_BAM, TP_CM_RTS):
+            size = data[1] | (data[2] << 8)
+            session = ReceiveSession(pgn, size, data[3], source, control_byte == TP_CM_BAM, data[4])
+            session.timeout_time = self.clock() + (T1_S if session.broadcast else T2_S)
+            self.rx_sessions[(source, session.broadcast)] = session
+            if not session.broadcast:
+                self.__send_cts(session)
+            return
+
+        session = self.tx_sessions.get(source)
+        if session is None or session.pgn != pgn:
+            if control_byte == TP_CM_ABORT:
+                self.rx_sessions.pop((source, False), None)
+            return
+
+        if control_byte == TP_CM_CTS:
+            nmb_packets = data[1]
+            if nmb_packets == 0:
+                # Receiver asks to hold the connection
+                session.timeout_time = self.clock() + T3_S
+                return
+            if not 1 <= data[2] <= len(session.packets):
+                # Requested packet does not exist
+                self.__abort_tx_session(session, ABORT_BAD_SEQUENCE)
+                return
+            session.next_packet = data[2] - 1
+            session.last_packet = min(session.next_packet + nmb_packets, len(session.packets))
+            session.waiting_for_cts = False
+            session.timeout_time = None
+            session.next_time = self.clock()
+        elif control_byte == TP_CM_END_OF_MSG_ACK:
+            self.__finish_tx_session(session)
+        elif control_byte == TP_CM_ABORT:
+            self.aborted_sessions += 1
+            self.__finish_tx_session(session)
+
+    def __on_dt(self, data, source, broadcast):
+        session = self.rx_sessions.get((source, broadcast))
+        if session is None or data[0] != session.next_sequence:
+            return
+
+        session.data.extend(data[1:])
+        session.next_sequence += 1
+        session.timeout_time = self.clock() + T1_S
+
+        if session.next_sequence <= session.nmb_packets:
+            if not broadcast and session.next_sequence > session.window_end:
+                self.__send_cts(session)
+            return
+
+        del self.rx_sessions[(source, broadcast)]
+        if not broadcast:
+            size = session.size
+            self.__send_cm(source, get_cm_data(TP_CM_END_OF_MSG_ACK, size & 0xFF, size >> 8, session.nmb_packets,
+                                               0xFF, session.pgn))
+        if self.receive_function is not None:
+            self.receive_function(session.pgn, session.data[:session.size], source)
+
+    def __send_cts(self, session):
+        """
+        Grant next window of packets (not more than sender allows per CTS)
+        :param session: ReceiveSession
+        :return:
+        """
+        nmb_packets = min(session.nmb_packets - session.next_sequence + 1, session.max_packets_per_cts)
+        session.window_end = session.next_sequence + nmb_packets - 1
+        session.timeout_time = self.clock() + T2_S
+        self.__send_cm(session.source, get_cm_data(TP_CM_CTS, nmb_packets, session.next_sequence, 0xFF, 0xFF,
+                                                   session.pgn))
+
+    def __finish_tx_session(self, session):
+        del self.tx_sessions[session.destination]
+        session.completed = True
+        for queued in self.tx_queue:
+            if queued.destination == session.destination:
+                self.tx_queue.remove(queued)
+                self.__start_session(queued)
+                break
+
+    def __abort_tx_session(self, session, reason):
+        self.aborted_sessions += 1
+        if not session.is_broadcast():
+            self.__send_cm(session.destination, get_cm_data(TP_CM_ABORT, reason, 0xFF, 0xFF, 0xFF, session.pgn))
+        self.__finish_tx_session(session)
+
+    def __send_cm(self, destination, data):
+        self.send_function(j1939.get_message(self.__get_id(j1939.PGN_TP_CM, destination), data))
+
+    def __get_id(self, pgn, destination):
+        return j1939.get_arbitration_id(TP_PRIORITY, pgn, self.source_address, destination)
+
+    def __get_next_event_time(self):
+        times = []
+        for session in self.tx_sessions.values():
+            if session.timeout_time is not None:
+                times.append(session.timeout_time)
+            if not session.waiting_for_cts:
+                times.append(session.next_time)
+        for session in self.rx_sessions.values():
+            if session.timeout_time is not None:
+                times.append(session.timeout_time)
+        return min(times) if times else None
+
+    def __schedule_next_poll(self):
+        next_time = self.__get_next_event_time()
+        if next_time is None:
+            return None
+
+        delay_s = max(next_time - self.clock(), 0.0)
+        if self.schedule_function is not None:
+            if self.__scheduled_time is None or next_time < self.__scheduled_time:
+                self.__scheduled_time = next_time
+                self.schedule_function(delay_s, self.poll)
+        return delay_s
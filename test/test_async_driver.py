@@ -0,0 +1,59 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from src import async_driver
+from src import j1939
+
+__author__ = 'brouk'
+
+
+class TestAsyncCanDriver(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.loop = asyncio.new_event_loop()
+        self.can_driver = MagicMock()
+        self.driver = async_driver.AsyncCanDriver(self.can_driver, self.loop)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.driver.stop()
+        self.loop.close()
+
+    def test_wait_for_matching_msg(self):
+        addr_claim = j1939.get_message(0x18EEFFFB, [0] * 8)
+        other = j1939.get_message(0x0CF00401, [0] * 8)
+        self.loop.call_later(0.01, self.driver.dispatch, other)
+        self.loop.call_later(0.02, self.driver.dispatch, addr_claim)
+
+        msg = self.loop.run_until_complete(
+            self.driver.wait_for_matching_msg(lambda m: j1939.is_addr_claim_msg(m.arbitration_id), 1.0))
+        self.assertIs(msg, addr_claim)
+        self.assertEqual(self.driver.waiters, [])
+
+    def test_wait_timeout(self):
+        msg = self.loop.run_until_complete(self.driver.wait_for_matching_msg(lambda m: True, 0.01))
+        self.assertIsNone(msg)
+        self.assertEqual(self.driver.waiters, [])
+
+    def test_subscribers(self):
+        received = []
+        callback = self.driver.subscribe(received.append)
+        self.driver.dispatch('msg1')
+        self.driver.unsubscribe(callback)
+        self.driver.dispatch('msg2')
+        self.assertEqual(received, ['msg1'])
+
+    def test_concurrent_periodic_send(self):
+        async def run():
+            return await asyncio.gather(self.driver.send_periodic(lambda: 'fast', 0.01, 0.1),
+                                        self.driver.send_periodic(lambda: 'slow', 0.05, 0.1))
+
+        self.assertEqual(self.loop.run_until_complete(run()), [10, 2])
+        self.assertEqual(self.can_driver.send_one_msg.call_count, 12)
+
+    def test_start_without_socket(self):
+        self.can_driver.bus = None
+        self.assertFalse(self.driver.start())
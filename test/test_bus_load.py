@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from src import bus_load
+from src import j1939
+
+__author__ = 'brouk'
+
+
+class TestFrameBits(TestCase):
+    def test_stuff_bits(self):
+        self.assertEqual(bus_load.get_stuff_bits_count([0, 0, 0, 0, 1, 1, 1, 1]), 0)
+        self.assertEqual(bus_load.get_stuff_bits_count([0] * 5), 1)
+        self.assertEqual(bus_load.get_stuff_bits_count([0] * 10), 2)
+        # stuff bit (1) starts new run of ones
+        self.assertEqual(bus_load.get_stuff_bits_count([0, 0, 0, 0, 0, 1, 1, 1, 1]), 2)
+
+    def test_crc15(self):
+        self.assertEqual(bus_load.get_crc15([]), 0)
+        self.assertEqual(bus_load.get_crc15([1]), bus_load.CRC15_POLYNOMIAL)
+
+    def test_extended_frame_bits(self):
+        # 131 bits without stuffing, max. 29 stuff bits
+        bits = bus_load.get_frame_bits(0x18FEF101, bytes([0x00, 0x0A, 0, 0, 0, 0, 0, 0]))
+        self.assertGreaterEqual(bits, 131)
+        self.assertLessEqual(bits, 160)
+
+    def test_standard_frame_bits(self):
+        # 47 bits without stuffing, max. 8 stuff bits
+        bits = bus_load.get_frame_bits(0x7FF, bytes(), extended=False)
+        self.assertGreaterEqual(bits, 47)
+        self.assertLessEqual(bits, 55)
+
+
+class TestBusLoadMeter(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.now = 0.0
+        self.meter = bus_load.BusLoadMeter(250000, clock=lambda: self.now)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.meter = None
+
+    def test_bus_load(self):
+        msg = j1939.get_message(0x18FEF101, [0xFF] * 8)
+        bits = bus_load.get_msg_bits(msg)
+
+        self.meter.start()
+        self.meter.add_msgs([msg] * 1000)
+        self.now = 1.0
+        self.meter.stop()
+
+        self.assertEqual(self.meter.frames, 1000)
+        self.assertEqual(self.meter.bits, bits * 1000)
+        self.assertAlmostEqual(self.meter.get_bus_load(), bits * 1000 / 250000 * 100)
+
+
+class TestLoadGenerator(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.now = 0.0
+        self.msgs = [j1939.get_message(0x18FEF101, [0xFF] * 8), j1939.get_message(0x0CF00401, [0x00] * 2)]
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.msgs = None
+
+    def test_target_load(self):
+        generator = bus_load.LoadGenerator(self.msgs, 50, 250000, clock=lambda: self.now)
+        sent_bits = 0
+        for tick in range(0, 1001):
+            self.now = tick * 0.002
+            sent_bits += sum(bus_load.get_msg_bits(msg) for msg in generator.get_due_msgs())
+        # 2 seconds of 50% load at 250 kbit/s
+        self.assertAlmostEqual(sent_bits, 250000, delta=max(generator.msg_bits))
+
+    def test_background_traffic(self):
+        generator = bus_load.LoadGenerator(self.msgs, 30, 250000, background_bits_per_s=75000)
+        self.assertEqual(generator.bits_per_s, 0)
+
+    def test_round_robin(self):
+        generator = bus_load.LoadGenerator(self.msgs, 100, 250000, clock=lambda: self.now)
+        generator.get_due_msgs()
+        self.now = 0.010
+        due_msgs = generator.get_due_msgs()
+        self.assertIs(due_msgs[0], self.msgs[0])
+        self.assertIs(due_msgs[1], self.msgs[1])
@@ -0,0 +1,133 @@
+import socket
+import struct
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import can
+
+from src import candriver
+
+__author__ = 'brouk'
+
+
+class TestRawFrames(TestCase):
+    def test_extended_frame(self):
+        msg = can.Message(arbitration_id=0x18FEF101, data=[1, 2, 3])
+        raw_frame = candriver.get_raw_frame(msg)
+        can_id, dlc, data = struct.unpack(candriver.CAN_FRAME_FORMAT, raw_frame)
+
+        self.assertEqual(len(raw_frame), 16)
+        self.assertEqual(can_id, 0x18FEF101 | candriver.CAN_EFF_FLAG)
+        self.assertEqual(dlc, 3)
+        self.assertEqual(data, bytes([1, 2, 3, 0, 0, 0, 0, 0]))
+
+    def test_raw_frames(self):
+        msgs = [can.Message(arbitration_id=0x0CF00401, data=[0] * 8) for i in range(5)]
+        self.assertEqual(len(candriver.get_raw_frames(msgs)), 5)
+
+
+class TestPgnFilters(TestCase):
+    def test_pdu1_mask_ignores_destination(self):
+        mask = candriver.get_pgn_mask(0xEA00)
+        self.assertEqual(0x18EAFFFB & mask, (0xEA00 << 8) & mask)
+        self.assertEqual(0x18EA01FB & mask, (0xEA00 << 8) & mask)
+
+    def test_pdu2_mask(self):
+        mask = candriver.get_pgn_mask(0xFEEC)
+        self.assertEqual(0x18FEEC01 & mask, 0xFEEC << 8)
+        self.assertNotEqual(0x18FEE501 & mask, 0xFEEC << 8)
+
+    def test_sent_frames_are_not_counted_as_filtered_out(self):
+        with patch('can.interface.Bus', side_effect=OSError):
+            driver = candriver.CanDriver('no_such_can')
+        driver.bus = MagicMock()
+        statistics = {'rx_packets': 100, 'tx_packets': 40}
+        with patch.object(candriver.CanDriver, '_CanDriver__get_interface_statistic', side_effect=statistics.get):
+            driver.set_pgn_filters([0xEA00])
+            statistics['rx_packets'] += 50  # 30 sent by simulator, 5 received, 15 dropped by filters
+            statistics['tx_packets'] += 30
+            driver.received_count += 5
+            self.assertEqual(driver.get_filtered_out_count(), 15)
+
+
+class TestReceiveRawFrames(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        with patch('can.interface.Bus', side_effect=OSError):
+            self.driver = candriver.CanDriver('no_such_can')
+        self.rx_socket, self.tx_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.driver.bus = MagicMock()
+        self.driver.bus.socket = self.rx_socket
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.rx_socket.close()
+        self.tx_socket.close()
+
+    def test_receive_batch_with_timestamps(self):
+        raw_frames = candriver.get_raw_frames([can.Message(arbitration_id=0x18FEF101, data=[i]) for i in range(3)])
+        for raw_frame in raw_frames:
+            self.tx_socket.send(raw_frame)
+
+        self.assertTrue(self.driver.enable_rx_timestamps())
+        frames = self.driver.receive_raw_frames(1.0)
+        self.assertEqual([raw_frame for _, raw_frame in frames], raw_frames)
+        self.assertAlmostEqual(frames[0][0], time.time(), delta=5)
+        self.assertEqual(self.driver.received_count, 3)
+
+    def test_receive_timeout(self):
+        self.assertEqual(self.driver.receive_raw_frames(0.01), [])
+
+
+class TestReceiveTimestamps(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        with patch('can.interface.Bus', side_effect=OSError):
+            self.driver = candriver.CanDriver('no_such_can')
+        self.driver.bus = MagicMock()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.driver = None
+
+    def test_monotonic_time(self):
+        self.assertAlmostEqual(candriver.get_monotonic_time(time.time() - 0.5), time.monotonic() - 0.5, delta=0.01)
+        self.assertAlmostEqual(candriver.get_monotonic_time(0.0), time.monotonic(), delta=0.01)
+
+    def test_response_time(self):
+        self.driver.send_one_msg(can.Message(arbitration_id=0x18EEFFFB, data=[0] * 8))
+        tx_time = self.driver.last_tx_time
+        self.driver.bus.recv.return_value = can.Message(timestamp=time.time() + 0.002, arbitration_id=0x18EEFFFB)
+
+        self.assertIsNotNone(self.driver.wait_for_one_msg(0.1))
+        self.assertAlmostEqual(self.driver.get_response_time(tx_time), 0.002, delta=0.001)
+
+
+class TestStopPeriodicMsgs(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        with patch('can.interface.Bus', side_effect=OSError):
+            self.driver = candriver.CanDriver('no_such_can')
+        self.driver.bus = MagicMock()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.driver = None
+
+    def test_receive_filters_are_kept(self):
+        self.driver.set_pgn_filters([0xEA00])
+        self.driver.bus.recv.return_value = can.Message(arbitration_id=0x18EA00F9, data=[0xE5, 0xFE, 0x00])
+        self.driver.wait_for_one_msg(0.1)
+        self.driver.start_periodic_msg(can.Message(arbitration_id=0x18FEF101, data=[0] * 8), 0.1)
+        self.driver.stop_all_periodic_msgs()
+
+        self.assertEqual(self.driver.periodic_tasks, [])
+        self.assertEqual(self.driver.filter_pgns, [0xEA00])
+        self.assertEqual(self.driver.received_count, 1)
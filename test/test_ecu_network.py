@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from src import ecu_network
+from src import frame_cache
+from src import j1939
+from src import scheduler
+
+__author__ = 'brouk'
+
+VIN_CODE = [ord(c) for c in '5GZCZ43D13S812715*']
+
+
+class TestEcuNetwork(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.sent = []
+        self.network = ecu_network.get_truck_network(VIN_CODE)
+        self.cyclic = scheduler.CyclicScheduler()
+        self.network.start(self.cyclic, self.sent.append)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.network = None
+
+    def test_address_claims_at_start(self):
+        claims = [msg.arbitration_id for msg in self.sent if j1939.is_addr_claim_msg(msg.arbitration_id)]
+        self.assertEqual(claims, [0x18EEFF00, 0x18EEFF03, 0x18EEFF0B, 0x18EEFF17])
+
+    def test_name_function_codes(self):
+        functions = {ecu.source_address: (j1939.get_name_value(ecu.name_bytes) >> 40) & 0xFF
+                     for ecu in self.network.ecus}
+        # J1939-81: 0 = engine, 3 = transmission, 9 = brakes, 29 = instrument cluster
+        self.assertEqual(functions, {0x00: 0, 0x03: 3, 0x0B: 9, 0x17: 29})
+
+    def test_duplicate_address(self):
+        ecu = ecu_network.VirtualEcu('Engine 2', 0x00, j1939.get_name(0x2001, ecu_network.FUNCTION_ENGINE))
+        self.assertIsNone(self.network.add_ecu(ecu))
+
+    def test_request_is_routed_by_destination(self):
+        del self.sent[:]
+        request = j1939.get_request_message(j1939.PGN_ENGINE_HOURS, 0x00, 0xFB)
+        self.assertEqual(self.network.dispatch(request), 1)
+        self.assertEqual(self.sent[0].arbitration_id, 0x18FEE500)
+
+        request = j1939.get_request_message(j1939.PGN_ENGINE_HOURS, 0x03, 0xFB)
+        self.assertEqual(self.network.dispatch(request), 0)
+        self.assertEqual(len(self.sent), 1)
+
+    def test_global_addr_claim_request(self):
+        del self.sent[:]
+        request = j1939.get_request_message(j1939.PGN_ADDRESS_CLAIM, j1939.GLOBAL_ADDRESS, 0xFB)
+        self.assertEqual(self.network.dispatch(request), 4)
+        self.assertEqual(len(self.sent), 4)
+
+    def test_vin_code_by_bam(self):
+        del self.sent[:]
+        self.network.dispatch(j1939.get_request_message(j1939.PGN_VIN, j1939.GLOBAL_ADDRESS, 0xFB))
+        self.assertEqual(self.sent[0].arbitration_id, 0x18ECFF00)
+        self.assertEqual(self.sent[0].data[0], 32)  # BAM
+
+    def test_set_signal(self):
+        self.network.set_signal(frame_cache.CCVS_VEHICLE_SPEED.name, 80)
+        cluster = self.network.ecus_by_address[0x17]
+        self.assertEqual(cluster.signal_frames['CCVS'].msg.data[1:3], bytearray([0x00, 0x50]))
+
+    def test_address_lost(self):
+        del self.sent[:]
+        engine = self.network.ecus_by_address[0x00]
+        self.network.dispatch(j1939.get_addr_claim_message([0x00] * 8, 0x00))
+        self.assertTrue(engine.address_lost)
+        self.assertEqual(self.sent[0].arbitration_id, 0x18EEFFFE)
+
+        self.network.dispatch(j1939.get_request_message(j1939.PGN_ENGINE_HOURS, 0x00, 0xFB))
+        self.assertEqual(len(self.sent), 1)
+
+    def test_higher_priority_claim_is_defended(self):
+        del self.sent[:]
+        engine = self.network.ecus_by_address[0x00]
+        self.network.dispatch(j1939.get_addr_claim_message([0xFF] * 8, 0x00))
+        self.assertFalse(engine.address_lost)
+        self.assertEqual(self.sent[0].arbitration_id, 0x18EEFF00)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from src import candriver
+from src import file_io
+
+__author__ = 'brouk'
+
+MESSAGES = """18fef100 01 01 01 01 01 01 01 01
+cf00400 02 02 02 02 02 02 02 02
+delay 700
+18fef100 31 31 31 31 31 31 31 31
+delay 800
+"""
+
+
+class TestFileIo(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        fd, self.file_name = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w') as f:
+            f.write(MESSAGES)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        os.remove(self.file_name)
+
+    def test_read_messages_from_file(self):
+        msg_groups = file_io.read_messages_from_file(self.file_name)
+        self.assertEqual(len(msg_groups), 2)
+        self.assertEqual(msg_groups[0].delay, 700)
+        self.assertEqual([msg.arbitration_id for msg in msg_groups[0].messages], [0x18FEF100, 0xCF00400])
+        self.assertEqual(list(msg_groups[1].messages[0].data), [0x31] * 8)
+
+    def test_iter_messages_is_lazy(self):
+        msg_groups = file_io.iter_messages_from_file(self.file_name)
+        first_group = next(msg_groups)
+        self.assertEqual(first_group.delay, 700)
+        self.assertEqual(len(first_group.messages), 2)
+        self.assertEqual(next(msg_groups).delay, 800)
+        self.assertRaises(StopIteration, next, msg_groups)
+
+    def test_compile_messages_file(self):
+        fd, compiled_file_name = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+        try:
+            self.assertEqual(file_io.compile_messages_file(self.file_name, compiled_file_name), 3)
+            frames = list(file_io.iter_compiled_frames(compiled_file_name))
+        finally:
+            os.remove(compiled_file_name)
+
+        self.assertEqual([timestamp_us for timestamp_us, raw_frame in frames], [0, 0, 700000])
+        self.assertEqual(frames[0][1], candriver.get_raw_frame(file_io.get_msg_from_line(MESSAGES.split('\n')[0])))
+        self.assertEqual(len(frames[2][1]), 16)
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from src import fleet
+from src import latency
+
+__author__ = 'brouk'
+
+
+def finish_vehicle(interface, parameters):
+    histograms = latency.LatencyHistograms()
+    histograms.add('Lateness EEC1', 0.001 if interface == 'vcan0' else 0.002)
+    return histograms
+
+
+def crash_vehicle(interface, parameters):
+    if interface == 'vcan1':
+        os._exit(3)
+    if interface == 'vcan2':
+        raise ValueError('Wrong scenario')
+    return finish_vehicle(interface, parameters)
+
+
+def hang_vehicle(interface, parameters):
+    if interface == 'vcan1':
+        time.sleep(60)
+    return finish_vehicle(interface, parameters)
+
+
+class TestFleetFile(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    def test_read_fleet_file(self):
+        file_name = os.path.join(self.directory, 'fleet.txt')
+        with open(file_name, 'w') as fleet_file:
+            fleet_file.write('# fleet\nvcan0 -eld_file eld_test_scenario.txt\n\nvcan1\nvcan2 -R 1000  # receive\n')
+
+        self.assertEqual(fleet.read_fleet_file(file_name), [('vcan0', ['-eld_file', 'eld_test_scenario.txt']),
+                                                            ('vcan2', ['-R', '1000'])])
+
+
+class TestRunFleet(TestCase):
+    def test_aggregated_histograms(self):
+        results = fleet.run_fleet([('vcan0', []), ('vcan1', [])], finish_vehicle)
+        self.assertEqual([result.interface for result in results], ['vcan0', 'vcan1'])
+        self.assertTrue(all(result.synchronised and result.error is None for result in results))
+
+        histograms = latency.LatencyHistograms()
+        for result in results:
+            histograms.merge(result.latency_histograms)
+        self.assertEqual(histograms.histograms['Lateness EEC1'].nmb_samples, 2)
+        self.assertEqual(histograms.histograms['Lateness EEC1'].max_us, 2000)
+
+    def test_crash_isolation(self):
+        results = fleet.run_fleet([('vcan0', []), ('vcan1', []), ('vcan2', [])], crash_vehicle)
+        self.assertIsNone(results[0].error)
+        self.assertEqual(results[1].exit_code, 3)
+        self.assertIn('crashed', results[1].error)
+        self.assertIn('Wrong scenario', results[2].error)
+        self.assertEqual(results[2].exit_code, 0)
+        self.assertEqual([result.status for result in results], [fleet.VEHICLE_OK, fleet.VEHICLE_FAILED,
+                                                                 fleet.VEHICLE_FAILED])
+
+    def test_hung_vehicle_times_out(self):
+        start = time.monotonic()
+        results = fleet.run_fleet([('vcan0', []), ('vcan1', []), ('vcan2', [])], hang_vehicle, timeout_s=1.0)
+
+        self.assertLess(time.monotonic() - start, 10.0)
+        self.assertEqual([result.status for result in results], [fleet.VEHICLE_OK, fleet.VEHICLE_TIMEOUT,
+                                                                 fleet.VEHICLE_OK])
+        self.assertIsNotNone(results[2].latency_histograms)
+
+    def test_vehicle_without_can_interface_fails(self):
+        results = fleet.run_fleet([('no_such_can', ['-eld_file', 'eld_test_scenario.txt'])])
+        self.assertEqual(results[0].status, fleet.VEHICLE_FAILED)
+        self.assertIn('Cannot open can interface', results[0].error)
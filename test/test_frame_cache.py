@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from src import frame_cache
+
+__author__ = 'brouk'
+
+
+class TestSignalDefinition(TestCase):
+    def test_eec1_message(self):
+        msg = frame_cache.EEC1_ENGINE_SPEED.get_message(600)
+        self.assertEqual(msg.arbitration_id, 0x0CF00401)
+        self.assertEqual(list(msg.data), [0x00, 0x00, 0x00, 0xC0, 0x12, 0x00, 0x00, 0x00])
+
+    def test_vdhr_message(self):
+        msg = frame_cache.VDHR_DISTANCE.get_message(10500, source_address=0x02)
+        self.assertEqual(msg.arbitration_id, 0x18FEC102)
+        self.assertEqual(list(msg.data), [0x34, 0x08, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
+
+    def test_invalid_value(self):
+        self.assertIsNone(frame_cache.CCVS_VEHICLE_SPEED.get_message(float('nan')))
+
+
+class TestSignalFrame(TestCase):
+    def test_patch_in_place(self):
+        frame = frame_cache.SignalFrame(frame_cache.CCVS_VEHICLE_SPEED)
+        msg = frame.set_value(10)
+        self.assertEqual(list(msg.data), [0x00, 0x00, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00])
+
+        patched = frame.set_value(20)
+        self.assertIs(patched, msg)
+        self.assertEqual(list(msg.data), [0x00, 0x00, 0x14, 0x00, 0x00, 0x00, 0x00, 0x00])
@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+import can
+
+from src import j1939
+
+__author__ = 'brouk'
+
+
+class TestJ1939Ids(TestCase):
+    def test_get_pgn_pdu2(self):
+        self.assertEqual(j1939.get_pgn(0x18FEEC01), j1939.PGN_VIN)
+        self.assertEqual(j1939.get_pgn(0x0CF00401), j1939.PGN_EEC1)
+
+    def test_get_pgn_pdu1(self):
+        self.assertEqual(j1939.get_pgn(0x18EAFFFB), j1939.PGN_REQUEST)
+        self.assertEqual(j1939.get_pgn(0x18EE00FB), j1939.PGN_ADDRESS_CLAIM)
+        self.assertEqual(j1939.get_destination_address(0x18EA01FB), 0x01)
+
+    def test_get_arbitration_id(self):
+        self.assertEqual(j1939.get_arbitration_id(6, j1939.PGN_VIN, 0x01), 0x18FEEC01)
+        self.assertEqual(j1939.get_arbitration_id(3, j1939.PGN_EEC1, 0x01), 0x0CF00401)
+        self.assertEqual(j1939.get_arbitration_id(6, j1939.PGN_REQUEST, 0xFB, 0x01), 0x18EA01FB)
+
+    def test_get_requested_pgn(self):
+        request = can.Message(arbitration_id=0x18EAFFFB, data=[0xEC, 0xFE, 0x00])
+        self.assertEqual(j1939.get_requested_pgn(request), j1939.PGN_VIN)
+        not_request = can.Message(arbitration_id=0x18FEEC01, data=[0xEC, 0xFE, 0x00])
+        self.assertIsNone(j1939.get_requested_pgn(not_request))
+
+    def test_get_request_message(self):
+        request = j1939.get_request_message(j1939.PGN_ENGINE_HOURS, 0x00, 0x01)
+        self.assertEqual(request.arbitration_id, 0x18EA0001)
+        self.assertEqual(j1939.get_requested_pgn(request), j1939.PGN_ENGINE_HOURS)
+
+    def test_get_nack_pgn(self):
+        nack = can.Message(arbitration_id=0x18E8FF00, data=[0x01, 0xFF, 0xFF, 0xFF, 0x01, 0xEC, 0xFE, 0x00])
+        self.assertEqual(j1939.get_nack_pgn(nack), j1939.PGN_VIN)
+        ack = can.Message(arbitration_id=0x18E8FF00, data=[0x00, 0xFF, 0xFF, 0xFF, 0x01, 0xEC, 0xFE, 0x00])
+        self.assertIsNone(j1939.get_nack_pgn(ack))
+
+    def test_get_name(self):
+        name = j1939.get_name(0x1001, 0x10, industry_group=1)
+        self.assertEqual(name, [0x01, 0x10, 0x00, 0x00, 0x00, 0x10, 0x00, 0x10])
+        self.assertEqual(j1939.get_name_value(name), 0x1000100000001001)
+        claim = j1939.get_addr_claim_message(name, 0x00)
+        self.assertEqual(claim.arbitration_id, 0x18EEFF00)
+
+
+class TestRequestResponder(TestCase):
+    def setUp(self):
+        """ Setting up for the test """
+        self.replies = []
+        self.responder = j1939.RequestResponder()
+        self.responder.register(j1939.PGN_VIN, lambda msg: self.replies.append('vin'))
+        self.responder.register(j1939.PGN_ENGINE_HOURS, lambda msg: self.replies.append('hours'))
+
+    def test_dispatch_by_requested_pgn(self):
+        hours_request = can.Message(arbitration_id=0x18EAFFFB, data=[0xE5, 0xFE, 0x00])
+        self.assertEqual(self.responder.dispatch(hours_request), j1939.PGN_ENGINE_HOURS)
+        self.assertEqual(self.replies, ['hours'])
+
+    def test_dispatch_unknown_pgn(self):
+        unknown_request = can.Message(arbitration_id=0x18EAFFFB, data=[0xC1, 0xFE, 0x00])
+        self.assertIsNone(self.responder.dispatch(unknown_request))
+        self.assertFalse(self.responder.is_handled_request(unknown_request))
+        self.assertEqual(self.replies, [])
+
+    def test_unregister(self):
+        self.responder.unregister(j1939.PGN_VIN)
+        vin_request = can.Message(arbitration_id=0x18EAFFFB, data=[0xEC, 0xFE, 0x00])
+        self.assertIsNone(self.responder.dispatch(vin_request))
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from src import latency
+
+__author__ = 'brouk'
+
+
+class TestLatencyHistogram(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.histogram = latency.LatencyHistogram('test')
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.histogram = None
+
+    def test_empty(self):
+        self.assertIsNone(self.histogram.get_percentile(50))
+        self.assertIsNone(self.histogram.get_mean())
+
+    def test_small_values_are_exact(self):
+        for value_us in range(1, 101):
+            self.histogram.add(value_us / 1000000.0)
+        self.assertEqual(self.histogram.min_us, 1)
+        self.assertEqual(self.histogram.get_percentile(50), 50)
+        self.assertEqual(self.histogram.get_percentile(99), 99)
+        self.assertEqual(self.histogram.get_percentile(100), 100)
+
+    def test_relative_precision(self):
+        for value_us in (12345, 250000, 1000000):
+            bucket = latency.LatencyHistogram.get_bucket(value_us)
+            self.assertLessEqual(bucket, value_us)
+            self.assertLess((value_us - bucket) / value_us, 0.01)
+
+    def test_constant_memory(self):
+        for i in range(100000):
+            self.histogram.add(0.010 + i * 1e-7)
+        self.assertEqual(self.histogram.nmb_samples, 100000)
+        self.assertLess(len(self.histogram.counts), 200)
+
+
+class TestRequestTracker(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.tracker = latency.RequestTracker([0xFEEC, 0xFEE5])
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        self.tracker = None
+
+    def test_response_matching(self):
+        self.tracker.on_request_sent(0xFEE5, 10.0)
+        self.assertTrue(self.tracker.is_outstanding(0xFEE5))
+        self.assertAlmostEqual(self.tracker.on_response(0xFEE5, 10.002), 0.002)
+        self.assertIsNone(self.tracker.on_response(0xFEE5, 10.003))
+        self.assertEqual(self.tracker.histograms[0xFEE5].max_us, 2000)
+
+    def test_timeout_and_nack(self):
+        self.tracker.on_request_sent(0xFEEC, 10.0)
+        self.tracker.on_request_sent(0xFEE5, 10.0)
+        self.tracker.on_nack(0xFEE5)
+        self.tracker.check_timeouts(10.0 + latency.RESPONSE_TIMEOUT_S)
+        self.assertEqual(self.tracker.nmb_timeouts[0xFEEC], 1)
+        self.assertEqual(self.tracker.nmb_nacks[0xFEE5], 1)
+        self.assertFalse(self.tracker.is_outstanding(0xFEEC))
+
+
+class TestLatencyHistograms(TestCase):
+    def test_named_histograms(self):
+        histograms = latency.LatencyHistograms()
+        histograms.add('Response VIN', 0.001)
+        histograms.add('Lateness EEC1', 0.0001)
+        histograms.add('Response VIN', 0.002)
+        self.assertEqual(histograms.names, ['Response VIN', 'Lateness EEC1'])
+        self.assertEqual(histograms.histograms['Response VIN'].nmb_samples, 2)
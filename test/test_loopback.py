@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from src import bus_load
+from src import can_simulator
+from src import candriver
+from src import j1939
+from src import loopback
+from src import param
+from src import sim_clock
+from src import transport
+
+__author__ = 'brouk'
+
+CHANNEL = 'loop_test'
+
+
+def get_msg(index=0):
+    return j1939.get_message(0x18FEF101, [index, 0x0A, 0, 0, 0, 0, 0, 0])
+
+
+class TestLoopbackBus(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.sender = loopback.open_bus(CHANNEL)
+        self.receiver = loopback.open_bus(CHANNEL)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        loopback.networks.pop(CHANNEL)
+
+    def test_frames_are_delivered_to_other_buses(self):
+        msg = get_msg(1)
+        self.sender.send(msg)
+        msg.data[0] = 2
+
+        received_msg = self.receiver.recv(0.1)
+        self.assertEqual(received_msg.arbitration_id, 0x18FEF101)
+        self.assertEqual(received_msg.data[0], 1)
+        self.assertIsNone(self.sender.recv(0.0))
+        self.assertIsNone(self.receiver.recv(0.01))
+
+    def test_receive_filters(self):
+        self.receiver.set_filters([{'can_id': j1939.PGN_REQUEST << 8, 'can_mask': candriver.get_pgn_mask(
+            j1939.PGN_REQUEST), 'extended': True}])
+        self.sender.send(get_msg())
+        self.sender.send(j1939.get_message(0x18EA00F9, [0xE5, 0xFE, 0x00]))
+
+        self.assertEqual(self.receiver.recv(0.1).arbitration_id, 0x18EA00F9)
+        self.assertIsNone(self.receiver.recv(0.0))
+
+    def test_simulated_bitrate_limits_throughput(self):
+        network = loopback.get_network(CHANNEL)
+        network.configure(bitrate=1000000)
+        nmb_frames = 200
+
+        start = time.monotonic()
+        for i in range(nmb_frames):
+            self.sender.send(get_msg(i))
+        duration = time.monotonic() - start
+
+        bus_time = sum(bus_load.get_msg_bits(get_msg(i)) for i in range(nmb_frames)) / 1000000.0
+        self.assertAlmostEqual(network.get_bus_time_s(), bus_time)
+        self.assertGreaterEqual(duration, bus_time - loopback.LOOPBACK_TX_QUEUE_S)
+        self.assertEqual(len(self.receiver.queue), nmb_frames)
+
+    def test_frame_is_received_after_its_transmission(self):
+        loopback.get_network(CHANNEL).configure(bitrate=1000)
+        msg = get_msg()
+
+        start = time.monotonic()
+        self.sender.send(msg)
+        self.assertIsNone(self.receiver.recv(0.0))
+        self.assertIsNotNone(self.receiver.recv(1.0))
+        self.assertGreaterEqual(time.monotonic() - start, bus_load.get_msg_bits(msg) / 1000.0)
+
+    def test_sent_count_of_concurrent_senders(self):
+        network = loopback.get_network(CHANNEL)
+        senders = [threading.Thread(target=lambda: [self.sender.send(get_msg(i)) for i in range(200)])
+                   for _ in range(4)]
+        for sender in senders:
+            sender.start()
+        for sender in senders:
+            sender.join()
+
+        self.assertEqual(network.sent_count, 800)
+        self.assertEqual(len(self.receiver.queue), 800)
+
+
+class TestLoopbackDriver(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.tester = candriver.CanDriver(CHANNEL)
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        loopback.networks.pop(CHANNEL)
+
+    def test_backend_is_selected_by_channel(self):
+        self.assertEqual(self.tester.backend, candriver.LOOPBACK)
+        self.assertTrue(self.tester.is_open())
+        self.assertEqual(candriver.get_backend('vcan0'), candriver.SOCKETCAN)
+
+    def test_raw_batch(self):
+        driver = candriver.CanDriver(CHANNEL)
+        raw_frames = candriver.get_raw_frames([get_msg(i) for i in range(5)])
+        self.assertEqual(driver.send_raw_batch(raw_frames), 5)
+
+        frames = self.tester.receive_raw_frames(0.1)
+        self.assertEqual([raw_frame for _, raw_frame in frames], raw_frames)
+        self.assertEqual(self.tester.received_count, 5)
+
+    def test_simulator_runs_on_loopback(self):
+        parameters = param.Param().parse_cmd_params(['canSend.py', '-f', 'messages_example.txt'])
+        simulator = can_simulator.CanSimulator(parameters, CHANNEL, sim_clock.VirtualClock())
+        simulator.run_action()
+
+        frames = self.tester.receive_raw_frames(0.1)
+        self.assertEqual(len(frames), 20)
+
+    def test_flood_file_messages_on_loopback(self):
+        parameters = param.Param().parse_cmd_params(['canSend.py', '-F', 'messages_example.txt', '3'])
+        can_simulator.CanSimulator(parameters, CHANNEL).run_action()
+
+        frames = self.tester.receive_raw_frames(0.1)
+        self.assertEqual(len(frames), 60)
+
+    def test_filtered_action_reassembles_multi_packet_message(self):
+        directory = tempfile.mkdtemp()
+        file_name = os.path.join(directory, 'scenario.txt')
+        with open(file_name, 'w') as scenario_file:
+            scenario_file.write('speed=0;distance=0;engine_rpm=600;engine_hours=1.0;vin=default\nduration=2\n')
+        parameters = param.Param().parse_cmd_params(['canSend.py', '-eld_file', file_name])
+        responses = []
+
+        def get_tp_msg(pgn, data):
+            return j1939.get_message(j1939.get_arbitration_id(transport.TP_PRIORITY, pgn,
+                                                              0xF9, can_simulator.SIMULATOR_ADDRESS), data)
+
+        def is_tp_cm(control_byte):
+            return lambda msg: msg.arbitration_id & 0x03FFFF00 == (j1939.PGN_TP_CM | 0xF9) << 8 \
+                and msg.data[0] == control_byte
+
+        def send_multi_packet_msg():
+            time.sleep(0.2)
+            self.tester.send_one_msg(get_tp_msg(j1939.PGN_TP_CM, transport.get_cm_data(
+                transport.TP_CM_RTS, 17, 0, 3, 0xFF, j1939.PGN_VIN)))
+            responses.append(self.tester.wait_for_matching_msg(is_tp_cm(transport.TP_CM_CTS), 1.0))
+            for sequence in range(1, 4):
+                self.tester.send_one_msg(get_tp_msg(j1939.PGN_TP_DT, [sequence] + [0x41] * 7))
+            responses.append(self.tester.wait_for_matching_msg(is_tp_cm(transport.TP_CM_END_OF_MSG_ACK), 1.0))
+
+        tester = threading.Thread(target=send_multi_packet_msg)
+        tester.start()
+        try:
+            can_simulator.CanSimulator(parameters, CHANNEL).run_action()
+        finally:
+            tester.join()
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(responses), 2)
+        self.assertIsNotNone(responses[0])
+        self.assertIsNotNone(responses[1])
+
+    def test_unknown_backend_does_not_crash_actions(self):
+        parameters = param.Param().parse_cmd_params(['canSend.py', '-r', '10'])
+        driver = candriver.CanDriver(CHANNEL, backend='no_such_backend')
+        self.assertFalse(driver.is_open())
+        can_simulator.CanSimulator(parameters, CHANNEL, can_driver=driver).run_action()
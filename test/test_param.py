@@ -61,6 +61,12 @@ class TestParam(TestCase):
         self.param.parse_one_msg_param.assert_called_once_with(
             ["--send_one_message", "1", "2", "3", "4", "5", "6", "7", "8", "9", ])
 
+    def test_msg_from_argv_list(self):
+        msg = self.param.get_msg_from_argv_list(["18FEF101", "1", "2", "3", "4", "5", "6", "7", "8"])
+        self.assertEqual(msg.arbitration_id, 0x18FEF101)
+        self.assertTrue(msg.is_extended_id)
+        self.assertEqual(msg.data, bytearray([1, 2, 3, 4, 5, 6, 7, 8]))
+
     def test_parse_cmd_param_msg_multi_short(self):
         self.param.print_help = MagicMock()
         self.param.parse_multi_msg_param = MagicMock()
@@ -107,6 +113,105 @@ class TestParam(TestCase):
         self.param.print_help.assert_not_called()
         self.param.parse_send_default_param.assert_called_once_with(["--send_default_messages", ])
 
+    def test_parse_cmd_param_compile_messages(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-c", "file_name", "compiled_file_name", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.file_name, "file_name")
+        self.assertEqual(self.param.output_file_name, "compiled_file_name")
+
+    def test_parse_cmd_param_compile_messages_wrong_nmb(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "--compile_messages", "file_name", ])
+        self.param.print_help.assert_any_call()
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_flood_file_messages(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-F", "file_name", "100", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.file_name, "file_name")
+        self.assertEqual(self.param.nmb_repeats, 100)
+
+    def test_parse_cmd_param_flood_file_messages_zero_repeats(self):
+        self.param.parse_cmd_params(["script_name", "--flood_file_messages", "file_name", "0", ])
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_bus_load(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-L", "5000", "60", "file_name", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.max_wait_time_ms, 5000)
+        self.assertEqual(self.param.load_percent, 60)
+        self.assertEqual(self.param.file_name, "file_name")
+
+    def test_parse_cmd_param_bus_load_out_of_range(self):
+        self.param.parse_cmd_params(["script_name", "--bus_load", "5000", "120", "file_name", ])
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_record_msgs(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-rec", "60000", "record.log", "100", "0", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.max_wait_time_ms, 60000)
+        self.assertEqual(self.param.file_name, "record.log")
+        self.assertEqual(self.param.max_file_mb, 100)
+        self.assertEqual(self.param.max_file_s, 0)
+
+    def test_parse_cmd_param_request_latency(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-lat", "60000", "00", "10", "FEEC", "FEE5", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.target_address, 0x00)
+        self.assertEqual(self.param.rate_hz, 10)
+        self.assertEqual(self.param.request_pgns, [0xFEEC, 0xFEE5])
+
+    def test_parse_cmd_param_request_latency_no_pgn(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "--request_latency", "60000", "00", "10", ])
+        self.param.print_help.assert_any_call()
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_eld_file_clock_speed(self):
+        self.param.parse_cmd_params(["script_name", "-eld_file", "file_name", "10", ])
+        self.assertEqual(self.param.file_name, "file_name")
+        self.assertEqual(self.param.clock_speed, 10.0)
+        self.param.parse_cmd_params(["script_name", "-eld_file", "file_name", "-1", ])
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_fleet_simulation(self):
+        self.param.parse_cmd_params(["script_name", "-fleet", "fleet_example.txt", ])
+        self.assertEqual(self.param.file_name, "fleet_example.txt")
+        self.param.parse_cmd_params(["script_name", "--fleet_simulation", ])
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_render_scenario(self):
+        self.param.parse_cmd_params(["script_name", "-render", "eld.log", "-eld_file", "file_name", ])
+        self.assertEqual(self.param.render_file_name, "eld.log")
+        self.assertEqual(self.param.action, "-eld_file")
+        self.assertEqual(self.param.file_name, "file_name")
+        self.param.parse_cmd_params(["script_name", "-render", "eld.log", "-l", ])
+        self.assertIsNone(self.param.action)
+
+    def test_parse_cmd_param_eld_file_addr_claim_multi(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-eld_aU", "file_name", "3", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.file_name, "file_name")
+        self.assertEqual(self.param.nmb_msgs, 3)
+
+    def test_parse_cmd_param_eld_bcm_short(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "-eld_bcm", "file_name", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.file_name, "file_name")
+
+    def test_parse_cmd_param_eld_bcm_long(self):
+        self.param.print_help = MagicMock()
+        self.param.parse_cmd_params(["script_name", "--eld_msgs_file_simulation_bcm", "file_name", ])
+        self.param.print_help.assert_not_called()
+        self.assertEqual(self.param.file_name, "file_name")
+
     def test_parse_cmd_unknown_param(self):
         self.param.print_help = MagicMock()
         self.param.parse_cmd_params(["script_name", "-Z"])
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from src import candriver
+from src import file_io
+from src import j1939
+from src import recorder
+from src import trace_io
+
+__author__ = 'brouk'
+
+
+def get_frames(nmb_frames, period_s=0.001, first_timestamp=1436509052.0):
+    raw_frame = candriver.get_raw_frame(j1939.get_message(0x18FEF101, [0x00, 0x0A, 0, 0, 0, 0, 0, 0]))
+    return [(first_timestamp + i * period_s, raw_frame) for i in range(nmb_frames)]
+
+
+class TestRecordFormat(TestCase):
+    def test_candump_line(self):
+        timestamp, raw_frame = get_frames(1)[0]
+        self.assertEqual(recorder.get_candump_line(timestamp, 'can0', raw_frame),
+                         '(1436509052.000000) can0 18FEF101#000A000000000000\n')
+
+    def test_rotated_file_name(self):
+        self.assertEqual(recorder.get_rotated_file_name('record.log', 3), 'record.0003.log')
+        self.assertEqual(recorder.get_record_format('record.log'), recorder.CANDUMP)
+        self.assertEqual(recorder.get_record_format('record.bin'), recorder.BINARY)
+
+
+class TestBusRecorder(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    def test_binary_record(self):
+        file_name = os.path.join(self.directory, 'record.bin')
+        bus_recorder = recorder.BusRecorder(file_name, 'can0')
+        bus_recorder.start()
+        bus_recorder.add_frames(get_frames(10))
+        bus_recorder.stop()
+
+        frames = list(file_io.iter_compiled_frames(file_name))
+        self.assertEqual(len(frames), 10)
+        self.assertEqual(frames[1][0] - frames[0][0], 1000)
+        self.assertEqual(frames[0][1], get_frames(1)[0][1])
+
+    def test_write_error_stops_recording(self):
+        directory = os.path.join(self.directory, 'removed')
+        os.mkdir(directory)
+        bus_recorder = recorder.BusRecorder(os.path.join(directory, 'record.bin'), 'can0', max_file_bytes=1)
+        bus_recorder.start()
+        shutil.rmtree(directory)
+
+        self.assertTrue(bus_recorder.add_frames(get_frames(10)))
+        bus_recorder.thread.join(1.0)
+        self.assertIsInstance(bus_recorder.error, OSError)
+        self.assertFalse(bus_recorder.add_frames(get_frames(10)))
+        self.assertFalse(bus_recorder.stop())
+
+    def test_candump_record_can_be_replayed(self):
+        file_name = os.path.join(self.directory, 'record.log')
+        bus_recorder = recorder.BusRecorder(file_name, 'can0')
+        bus_recorder.start()
+        bus_recorder.add_frames(get_frames(3))
+        bus_recorder.stop()
+
+        frames = list(trace_io.iter_candump(file_name))
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[2][1].arbitration_id, 0x18FEF101)
+
+    def test_time_rotation(self):
+        file_name = os.path.join(self.directory, 'record.log')
+        bus_recorder = recorder.BusRecorder(file_name, 'can0', max_file_s=1)
+        bus_recorder.start()
+        bus_recorder.add_frames(get_frames(25, period_s=0.1))
+        bus_recorder.stop()
+
+        self.assertEqual(len(bus_recorder.file_names), 3)
+        self.assertEqual(len(list(trace_io.iter_candump(bus_recorder.file_names[0]))), 10)
+
+    def test_size_rotation(self):
+        file_name = os.path.join(self.directory, 'record.bin')
+        max_file_bytes = file_io.COMPILED_HEADER_SIZE + 4 * file_io.COMPILED_RECORD_SIZE
+        bus_recorder = recorder.BusRecorder(file_name, 'can0', max_file_bytes=max_file_bytes)
+        bus_recorder.start()
+        bus_recorder.add_frames(get_frames(10))
+        bus_recorder.stop()
+
+        self.assertEqual([len(list(file_io.iter_compiled_frames(name))) for name in bus_recorder.file_names],
+                         [4, 4, 2])
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from src import file_io
+from src import j1939
+from src import param
+from src import render
+from src import sim_clock
+from src import trace_io
+
+__author__ = 'brouk'
+
+ELD_SCENARIO = '# Stage 1\nspeed=10;distance=1000;engine_rpm=600;engine_hours=10;vin=default\nduration=2\n'
+
+
+class TestTraceRenderDriver(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+        self.clock = sim_clock.VirtualClock()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    def test_frames_have_simulation_timestamps(self):
+        file_name = os.path.join(self.directory, 'render.log')
+        driver = render.TraceRenderDriver(file_name, self.clock, 'can1', start_timestamp=100.0)
+        msg = j1939.get_message(0x18FEF101, [0x00, 0x0A, 0, 0, 0, 0, 0, 0])
+        for i in range(render.RENDER_BATCH_SIZE + 1):
+            self.clock.wait_until(i * 0.1)
+            driver.send_one_msg(msg)
+        self.assertIsNone(driver.wait_for_one_msg(1.0))
+        driver.close()
+
+        frames = list(trace_io.iter_candump(file_name))
+        self.assertEqual(len(frames), render.RENDER_BATCH_SIZE + 1)
+        self.assertAlmostEqual(frames[0][0], 100.0)
+        self.assertAlmostEqual(frames[-1][0], 100.0 + render.RENDER_BATCH_SIZE * 0.1)
+        self.assertEqual(frames[0][1].arbitration_id, 0x18FEF101)
+
+
+class TestRenderScenario(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    def get_parameters(self, output_file_name, *action):
+        return param.Param().parse_cmd_params(['canSend.py', '-render', os.path.join(self.directory, output_file_name)]
+                                              + list(action))
+
+    def test_render_messages_file(self):
+        parameters = self.get_parameters('messages.bin', '-f', 'messages_example.txt')
+        nmb_frames = render.render_scenario(parameters)
+
+        frames = list(file_io.iter_compiled_frames(parameters.render_file_name))
+        self.assertEqual(len(frames), nmb_frames)
+        expected_msgs = [msg for msg_group in file_io.iter_messages_from_file('messages_example.txt')
+                         for msg in msg_group.messages]
+        self.assertEqual(nmb_frames, len(expected_msgs))
+        self.assertEqual(frames[0][0], 0)
+
+    def test_render_eld_scenario(self):
+        scenario_file_name = os.path.join(self.directory, 'scenario.txt')
+        with open(scenario_file_name, 'w') as scenario_file:
+            scenario_file.write(ELD_SCENARIO)
+
+        parameters = self.get_parameters('eld.log', '-eld_file', scenario_file_name)
+        render.render_scenario(parameters)
+
+        frames = list(trace_io.iter_candump(parameters.render_file_name))
+        eec1_timestamps = [timestamp for timestamp, msg in frames
+                           if j1939.get_pgn(msg.arbitration_id) == j1939.PGN_EEC1]
+        # 2 s of EEC1 cycles (20 ms), both ends included
+        self.assertEqual(len(eec1_timestamps), 101)
+        self.assertAlmostEqual(eec1_timestamps[1] - eec1_timestamps[0], 0.020)
+        self.assertAlmostEqual(eec1_timestamps[-1], 2.0)
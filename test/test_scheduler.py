@@ -0,0 +1,170 @@
+from unittest import TestCase
+
+from src import scheduler
+from src import sim_clock
+
+__author__ = 'brouk'
+
+
+class FakeClock:
+    """ Clock which advances by fixed step on every reading """
+
+    def __init__(self, step_s):
+        self.now = 0.0
+        self.step_s = step_s
+
+    def __call__(self):
+        self.now += self.step_s
+        return self.now
+
+
+class TestPeriodStatistics(TestCase):
+    def test_no_cycles(self):
+        statistics = scheduler.PeriodStatistics(0.02)
+        statistics.add_cycle(1.0)
+        self.assertEqual(statistics.cycles, 0)
+        self.assertIsNone(statistics.mean_period())
+        self.assertIsNone(statistics.jitter())
+
+    def test_mean_and_jitter(self):
+        statistics = scheduler.PeriodStatistics(0.02)
+        for t in (0.0, 0.019, 0.040, 0.059, 0.080):
+            statistics.add_cycle(t)
+        self.assertEqual(statistics.cycles, 4)
+        self.assertAlmostEqual(statistics.mean_period(), 0.020)
+        self.assertAlmostEqual(statistics.jitter(), 0.001)
+        self.assertAlmostEqual(statistics.min_period_s, 0.019)
+        self.assertAlmostEqual(statistics.max_period_s, 0.021)
+        self.assertAlmostEqual(statistics.max_deviation_s, 0.001)
+
+
+class TestPeriodicScheduler(TestCase):
+    def test_deadlines_do_not_drift(self):
+        clock = FakeClock(0.0001)
+        periodic = scheduler.PeriodicScheduler(0.01, busy_wait_s=float('inf'), clock=clock)
+        cycle_times = []
+        periodic.run_count(lambda: cycle_times.append(clock.now), 100)
+
+        self.assertEqual(len(cycle_times), 100)
+        # Every cycle is performed right after its absolute deadline
+        for n, cycle_time in enumerate(cycle_times):
+            self.assertAlmostEqual(cycle_time, periodic.start_time + n * 0.01, delta=0.0005)
+
+    def test_run_for_duration(self):
+        clock = FakeClock(0.0001)
+        periodic = scheduler.PeriodicScheduler(0.02, busy_wait_s=float('inf'), clock=clock)
+        cycles = []
+        statistics = periodic.run_for(lambda: cycles.append(1), 1.0)
+        self.assertEqual(len(cycles), 51)
+        self.assertAlmostEqual(statistics.mean_period(), 0.02, delta=0.0002)
+
+    def test_missed_cycles_are_skipped(self):
+        clock = FakeClock(0.0001)
+        periodic = scheduler.PeriodicScheduler(0.01, busy_wait_s=float('inf'), clock=clock)
+        periodic.start()
+        periodic.wait_next()
+        clock.now += 0.035  # stall for more than 3 periods (0.02 and 0.03 cycles are skipped)
+        periodic.wait_next()
+        self.assertEqual(periodic.statistics.missed_cycles, 2)
+        self.assertGreater(periodic.next_deadline, clock.now)
+
+    def test_run_for_period_must_be_positive(self):
+        cycles = []
+        periodic = scheduler.PeriodicScheduler(0, clock=FakeClock(0.0001))
+        self.assertRaises(ValueError, periodic.run_for, lambda: cycles.append(1), 1.0)
+        self.assertEqual(cycles, [])
+
+
+class TestCyclicScheduler(TestCase):
+    def test_multi_rate_jobs(self):
+        clock = FakeClock(0.0001)
+        cyclic = scheduler.CyclicScheduler(busy_wait_s=float('inf'), clock=clock)
+        sent = {'fast': 0, 'slow': 0}
+        cyclic.add_periodic('fast', 0.02, lambda: sent.__setitem__('fast', sent['fast'] + 1))
+        cyclic.add_periodic('slow', 0.1, lambda: sent.__setitem__('slow', sent['slow'] + 1))
+        cyclic.run_for(0.995)
+
+        self.assertEqual(sent['fast'], 50)
+        self.assertEqual(sent['slow'], 10)
+        self.assertAlmostEqual(cyclic.jobs[0].statistics.mean_period(), 0.02, delta=0.0002)
+
+    def test_period_must_be_positive(self):
+        cyclic = scheduler.CyclicScheduler(clock=FakeClock(0.0001))
+        self.assertRaises(ValueError, cyclic.add_periodic, 'zero', 0, lambda: None)
+        self.assertRaises(ValueError, cyclic.add_periodic, 'negative', -0.1, lambda: None)
+        self.assertEqual(cyclic.jobs, [])
+
+    def test_idle_handler_gets_time_between_deadlines(self):
+        clock = FakeClock(0.0001)
+        cyclic = scheduler.CyclicScheduler(clock=clock)
+        cyclic.add_periodic('job', 0.05, lambda: None)
+        timeouts = []
+
+        def idle_handler(timeout_s):
+            timeouts.append(timeout_s)
+            clock.now += timeout_s
+
+        cyclic.run_for(0.2, idle_handler)
+        self.assertTrue(timeouts)
+        for timeout_s in timeouts:
+            self.assertLessEqual(timeout_s, 0.05)
+
+    def test_one_shot_and_remove(self):
+        clock = FakeClock(0.0001)
+        cyclic = scheduler.CyclicScheduler(busy_wait_s=float('inf'), clock=clock)
+        performed = []
+        cyclic.add_one_shot(0.01, lambda: performed.append('one-shot'))
+        removed = cyclic.add_one_shot(0.02, lambda: performed.append('removed'))
+        cyclic.remove(removed)
+        cyclic.run_for(0.05)
+        self.assertEqual(performed, ['one-shot'])
+
+    def test_lateness_handler(self):
+        clock = FakeClock(0.0001)
+        lateness = []
+        cyclic = scheduler.CyclicScheduler(clock=clock,
+                                           lateness_handler=lambda job, lateness_s: lateness.append(lateness_s))
+
+        def slow_job():
+            clock.now += 0.003
+
+        cyclic.add_periodic('job', 0.01, slow_job)
+        cyclic.add_one_shot(0.001, lambda: None)
+
+        def idle_handler(timeout_s):
+            clock.now += timeout_s + 0.002
+
+        cyclic.run_for(0.05, idle_handler)
+        self.assertLess(lateness[0], 0.001)
+        for lateness_s in lateness[1:]:
+            self.assertAlmostEqual(lateness_s, 0.002, delta=0.0005)
+
+
+class TestSimulationClock(TestCase):
+    def test_get_clock(self):
+        self.assertTrue(sim_clock.get_clock(None).is_real)
+        self.assertTrue(sim_clock.get_clock(0).is_virtual)
+        self.assertEqual(sim_clock.get_clock(10).get_real_timeout(1.0), 0.1)
+
+    def test_virtual_clock_hour_of_cycles(self):
+        clock = sim_clock.VirtualClock()
+        cyclic = scheduler.CyclicScheduler(sim_clock=clock)
+        sent = []
+        cyclic.add_periodic('EEC1', 0.02, lambda: sent.append(('EEC1', clock.now())))
+        cyclic.add_periodic('VDHR', 1.0, lambda: sent.append(('VDHR', clock.now())))
+        idle = []
+        cyclic.run_for(3600, idle.append)
+
+        # cycles at start and end of run are both performed
+        self.assertEqual(sum(1 for name, timestamp in sent if name == 'VDHR'), 3601)
+        self.assertEqual(cyclic.jobs[0].statistics.cycles, 180000)
+        self.assertEqual(cyclic.jobs[0].statistics.missed_cycles, 0)
+        self.assertAlmostEqual(sent[-1][1], 3600.0)
+        self.assertEqual(idle, [])
+
+    def test_virtual_periodic_scheduler(self):
+        clock = sim_clock.VirtualClock()
+        periodic = scheduler.PeriodicScheduler(0.1, sim_clock=clock)
+        periodic.run_for(lambda: None, 10.0)
+        self.assertEqual(periodic.statistics.cycles, 100)
+        self.assertAlmostEqual(clock.now(), 10.0)
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+from src import frame_cache
+from src import signal_profile
+from src.eld_msg_group import ELD_msg_group
+from src.eld_simulation import ELD_simulation
+
+__author__ = 'brouk'
+
+
+class TestParseProfile(TestCase):
+    def test_parse_profiles(self):
+        self.assertEqual(signal_profile.parse_profile('ramp(0,80)').parameters, [0.0, 80.0])
+        self.assertEqual(signal_profile.parse_profile('sine(1200, 300, 10)').kind, 'sine')
+        self.assertEqual(signal_profile.parse_profile('pwl(0:0,30:80)').parameters, [(0.0, 0.0), (30.0, 80.0)])
+        self.assertFalse(signal_profile.is_profile('80'))
+
+    def test_wrong_profiles(self):
+        self.assertIsNone(signal_profile.parse_profile('ramp(0)'))
+        self.assertIsNone(signal_profile.parse_profile('square(0,80)'))
+        self.assertIsNone(signal_profile.parse_profile('pwl(30:80,0:0)'))
+        self.assertIsNone(signal_profile.parse_profile('sine(1200,300,0)'))
+
+
+class TestSimulationFileProfiles(TestCase):
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    def test_profiles_in_simulation_file(self):
+        file_name = os.path.join(self.directory, 'scenario.txt')
+        with open(file_name, 'w') as scenario_file:
+            scenario_file.write('# Acceleration\nspeed=ramp(10,80);distance=2000;engine_rpm=sine(1200,300,10);'
+                                'engine_hours=10.5;vin=default\nduration=60\n')
+
+        msg_group = ELD_simulation(file_name).msg_group_list[0]
+        self.assertEqual(msg_group.vehicle_speed, 10)
+        self.assertEqual(msg_group.engine_speed, 1200)
+        self.assertEqual(sorted(msg_group.profiles), ['engine_rpm', 'speed'])
+
+
+@unittest.skipIf(not signal_profile.is_available(), 'NumPy is not installed')
+class TestStageProfile(TestCase):
+    def test_ramp_and_distance(self):
+        msg_group = ELD_msg_group('ramp', 0, 1000, 600, 10.0, None, 100)
+        msg_group.profiles['speed'] = signal_profile.parse_profile('ramp(0,72)')
+        stage = signal_profile.StageProfile(msg_group, 0.02, 0.1, 1.0, 1.0)
+
+        self.assertEqual(stage.ccvs.nmb_cycles, 1001)
+        self.assertEqual(stage.ccvs.get_msg(1000).data[1:3], bytearray([0x00, 72]))
+        # mean speed 36 km/h = 10 m/s for 100 s
+        self.assertAlmostEqual(stage.end_distance_m, 2000.0)
+        self.assertEqual(frame_cache.VDHR_DISTANCE.get_raw_value(2000), 400)
+        self.assertEqual(stage.vdhr.get_msg(100).data[0:4], bytearray([0x90, 0x01, 0x00, 0x00]))
+
+    def test_engine_hours(self):
+        msg_group = ELD_msg_group('pwl', 0, 0, 0, 10.0, None, 3600)
+        msg_group.profiles['engine_rpm'] = signal_profile.parse_profile('pwl(0:0,1799:0,1800:600)')
+        stage = signal_profile.StageProfile(msg_group, 0.02, 0.1, 1.0, 1.0)
+        self.assertAlmostEqual(stage.end_hours, 10.5, places=3)
+
+    def test_held_after_end(self):
+        msg_group = ELD_msg_group('noise', 0, 0, 600, 0, None, 1)
+        msg_group.profiles['speed'] = signal_profile.parse_profile('noise(0,5)')
+        stage = signal_profile.StageProfile(msg_group, 0.02, 0.1, 1.0, 1.0)
+        self.assertEqual(stage.ccvs.get_msg(100).data, stage.ccvs.get_msg(10).data)
+        self.assertEqual(stage.eec1.get_msg(3).data[3:5], bytearray([0xC0, 0x12]))
+
+    def test_stage_continues_from_previous_stage(self):
+        first = ELD_msg_group('first', 36, 1000, 600, 10.0, None, 100)
+        second = ELD_msg_group('second', 0, 0, 0, 0, None, 100)
+        first_stage = signal_profile.StageProfile(first, 0.02, 0.1, 1.0, 1.0)
+        second_stage = signal_profile.StageProfile(second, 0.02, 0.1, 1.0, 1.0, 0x01, 1, first_stage.end_distance_m,
+                                                   first_stage.end_hours)
+
+        self.assertAlmostEqual(first_stage.end_distance_m, 2000.0)
+        self.assertAlmostEqual(second_stage.end_distance_m, 2000.0)
+        self.assertAlmostEqual(second_stage.end_hours, 10.0 + 100 / 3600.0, places=4)
+        self.assertEqual(second_stage.vdhr.get_msg(0).data[0:4], bytearray([0x90, 0x01, 0x00, 0x00]))
+
+    def test_noise_seed_per_signal_and_stage(self):
+        msg_group = ELD_msg_group('noise', 0, 0, 0, 0, None, 10)
+        msg_group.profiles['speed'] = signal_profile.parse_profile('noise(50,5)')
+        msg_group.profiles['engine_rpm'] = signal_profile.parse_profile('noise(50,5)')
+        first = signal_profile.StageProfile(msg_group, 0.1, 0.1, 1.0, 1.0, stage_index=0)
+        second = signal_profile.StageProfile(msg_group, 0.1, 0.1, 1.0, 1.0, stage_index=1)
+        repeated = signal_profile.StageProfile(msg_group, 0.1, 0.1, 1.0, 1.0, stage_index=0)
+
+        self.assertNotEqual(first.ccvs.payloads, first.eec1.payloads)
+        self.assertNotEqual(first.ccvs.payloads, second.ccvs.payloads)
+        self.assertEqual(first.ccvs.payloads, repeated.ccvs.payloads)
+
+
+class TestConstantStageEnd(TestCase):
+    def test_constant_stage_end(self):
+        msg_group = ELD_msg_group('cruise', 72, 5000, 1200, 10.0, None, 3600)
+        self.assertEqual(signal_profile.get_constant_stage_end(msg_group, 1000.0, 2.0), (73000.0, 3.0))
+        msg_group.engine_speed = 0
+        self.assertEqual(signal_profile.get_constant_stage_end(msg_group, 1000.0, 2.0)[1], 2.0)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from src import trace_io
+
+__author__ = 'brouk'
+
+
+class TestTraceIo(TestCase):
+    def test_parse_candump_line(self):
+        timestamp, msg = trace_io.parse_candump_line('(1436509052.249713) vcan0 18FEF101#000A000000000000\n')
+        self.assertAlmostEqual(timestamp, 1436509052.249713)
+        self.assertEqual(msg.arbitration_id, 0x18FEF101)
+        self.assertEqual(list(msg.data), [0x00, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
+
+    def test_parse_candump_standard_id(self):
+        timestamp, msg = trace_io.parse_candump_line('(1436509052.250000) vcan0 123#DEAD\n')
+        self.assertEqual(msg.arbitration_id, 0x123)
+        self.assertFalse(msg.is_extended_id)
+        self.assertEqual(list(msg.data), [0xDE, 0xAD])
+
+    def test_parse_candump_remote_frame(self):
+        timestamp, msg = trace_io.parse_candump_line('(1436509052.250000) vcan0 18EA00F9#R3\n')
+        self.assertTrue(msg.is_remote_frame)
+        self.assertTrue(msg.is_extended_id)
+        self.assertEqual(msg.dlc, 3)
+        timestamp, msg = trace_io.parse_candump_line('(1436509052.250000) vcan0 7DF#R\n')
+        self.assertTrue(msg.is_remote_frame)
+        self.assertFalse(msg.is_extended_id)
+
+    def test_parse_candump_other_line(self):
+        self.assertIsNone(trace_io.parse_candump_line('\n'))
+        self.assertIsNone(trace_io.parse_candump_line('  vcan0  18FEF101   [8]  00 0A 00 00 00 00 00 00'))
+
+    def test_parse_asc_line(self):
+        timestamp, msg = trace_io.parse_asc_line('   0.004400 1  18FEF101x       Rx   d 8 00 0A 00 00 00 00 00 00')
+        self.assertAlmostEqual(timestamp, 0.0044)
+        self.assertEqual(msg.arbitration_id, 0x18FEF101)
+        self.assertEqual(list(msg.data), [0x00, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
+
+    def test_parse_asc_dec_base(self):
+        timestamp, msg = trace_io.parse_asc_line('1.5 1 419361025x Rx d 2 10 255', base=10)
+        self.assertEqual(msg.arbitration_id, 0x18FEF101)
+        self.assertEqual(list(msg.data), [10, 255])
+
+    def test_parse_asc_standard_id(self):
+        timestamp, msg = trace_io.parse_asc_line('   0.005000 1  123             Rx   d 2 DE AD')
+        self.assertEqual(msg.arbitration_id, 0x123)
+        self.assertFalse(msg.is_extended_id)
+
+    def test_parse_asc_other_line(self):
+        self.assertIsNone(trace_io.parse_asc_line('date Wed Oct 17 10:00:00 am 2018'))
+        self.assertIsNone(trace_io.parse_asc_line('   0.100000 1  ErrorFrame'))
+
+    def test_get_trace_format(self):
+        self.assertEqual(trace_io.get_trace_format('capture.ASC'), trace_io.ASC)
+        self.assertEqual(trace_io.get_trace_format('capture.log'), trace_io.CANDUMP)
@@ -0,0 +1,115 @@
+from unittest import TestCase
+
+from src import j1939
+from src import transport
+
+__author__ = 'brouk'
+
+VIN = [ord(c) for c in '5GZCZ43D13S812715*']
+
+
+class ManualClock:
+    """ Clock controlled by test """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTransportProtocol(TestCase):
+    def setUp(self):
+        """ Setting up for the test """
+        self.clock = ManualClock()
+        self.sent = []
+        self.received = []
+        self.tp = transport.TransportProtocol(self.sent.append, 0x01, packet_gap_s=0.05, clock=self.clock,
+                                              receive_function=lambda *args: self.received.append(args))
+
+    def run_until_idle(self, tp, step_s=0.01):
+        for i in range(1000):
+            if tp.is_idle():
+                return
+            self.clock.now += step_s
+            tp.poll()
+        self.fail('Transport session did not complete')
+
+    def test_bam_frames(self):
+        self.tp.send(j1939.PGN_VIN, VIN)
+        self.run_until_idle(self.tp)
+
+        self.assertEqual([msg.arbitration_id for msg in self.sent], [0x18ECFF01] + [0x18EBFF01] * 3)
+        self.assertEqual(list(self.sent[0].data), [0x20, 0x12, 0x00, 0x03, 0xFF, 0xEC, 0xFE, 0x00])
+        self.assertEqual(list(self.sent[1].data), [0x01, 53, 71, 90, 67, 90, 52, 51])
+        self.assertEqual(list(self.sent[2].data), [0x02, 68, 49, 51, 83, 56, 49, 50])
+        self.assertEqual(list(self.sent[3].data), [0x03, 55, 49, 53, 42, 0xFF, 0xFF, 0xFF])
+
+    def test_bam_packet_gap(self):
+        self.tp.send(j1939.PGN_VIN, VIN)
+        self.assertEqual(len(self.sent), 1)
+        self.clock.now += 0.049
+        self.tp.poll()
+        self.assertEqual(len(self.sent), 1)
+        self.clock.now += 0.001
+        self.tp.poll()
+        self.assertEqual(len(self.sent), 2)
+
+    def test_bam_reassembly(self):
+        sender = transport.TransportProtocol(self.tp.on_message, 0x02, packet_gap_s=0.05, clock=self.clock)
+        sender.send(j1939.PGN_VIN, VIN)
+        self.run_until_idle(sender)
+        self.assertEqual(self.received, [(j1939.PGN_VIN, VIN, 0x02)])
+
+    def test_cmdt_transfer(self):
+        receiver_received = []
+        receiver = transport.TransportProtocol(self.tp.on_message, 0x02, packet_gap_s=0.05, clock=self.clock,
+                                               receive_function=lambda *args: receiver_received.append(args))
+        sender = transport.TransportProtocol(receiver.on_message, 0x01, packet_gap_s=0.05, clock=self.clock)
+        # Replies of receiver (CTS, End of msg ACK) go back to sender
+        receiver.send_function = sender.on_message
+
+        payload = list(range(100))
+        sender.send(0xFEE5, payload, destination=0x02)
+        self.run_until_idle(sender)
+
+        self.assertEqual(receiver_received, [(0xFEE5, payload, 0x01)])
+        self.assertTrue(receiver.is_idle())
+
+    def test_cts_respects_max_packets_per_cts(self):
+        # RTS: 100 bytes in 15 packets, max. 4 packets per CTS
+        rts = j1939.get_message(0x18EC0102, transport.get_cm_data(transport.TP_CM_RTS, 100, 0, 15, 4, 0xFEE5))
+        self.tp.on_message(rts)
+        self.assertEqual(list(self.sent[-1].data[:3]), [transport.TP_CM_CTS, 4, 1])
+
+        for sequence in range(1, 5):
+            self.tp.on_message(j1939.get_message(0x18EB0102, [sequence] + [0] * 7))
+        self.assertEqual(list(self.sent[-1].data[:3]), [transport.TP_CM_CTS, 4, 5])
+        self.assertEqual(len(self.sent), 2)
+
+    def test_cts_with_invalid_next_packet_aborts(self):
+        for next_packet in (0, 4):
+            del self.sent[:]
+            self.tp.send(0xFEE5, list(range(20)), destination=0x02)
+            cts = j1939.get_message(0x18EC0102, transport.get_cm_data(transport.TP_CM_CTS, 1, next_packet, 0xFF,
+                                                                      0xFF, 0xFEE5))
+            self.tp.on_message(cts)
+            self.assertEqual(self.sent[-1].data[0], transport.TP_CM_ABORT)
+            self.assertEqual(self.sent[-1].data[1], transport.ABORT_BAD_SEQUENCE)
+            self.assertTrue(self.tp.is_idle())
+
+    def test_cmdt_timeout_without_cts(self):
+        self.tp.send(0xFEE5, list(range(20)), destination=0x02)
+        self.clock.now += transport.T3_S
+        self.tp.poll()
+        self.assertTrue(self.tp.is_idle())
+        self.assertEqual(self.tp.aborted_sessions, 1)
+        self.assertEqual(self.sent[-1].data[0], transport.TP_CM_ABORT)
+
+    def test_sessions_to_same_destination_are_queued(self):
+        self.tp.send(j1939.PGN_VIN, VIN)
+        self.tp.send(j1939.PGN_ENGINE_HOURS, list(range(10)))
+        self.assertEqual(len(self.tp.tx_queue), 1)
+        self.run_until_idle(self.tp)
+        bam_frames = [msg for msg in self.sent if msg.data[0] == transport.TP_CM_BAM]
+        self.assertEqual(len(bam_frames), 2)